@@ -2,10 +2,12 @@
 
 import asyncio
 import base64
-from contextlib import suppress
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
 from datetime import UTC, datetime
 from functools import wraps
 from json import JSONDecodeError, dumps, loads
+from logging import getLogger
 from os import getenv
 from pathlib import Path
 from time import monotonic
@@ -21,6 +23,7 @@ from pydantic import Field
 from telegram_agent.src.core.progress import ProgressTracker, has_progress_sink
 
 load_dotenv()
+logger = getLogger(__name__)
 
 
 # ============================================================
@@ -33,6 +36,12 @@ _PASSWORD = getenv("OPENCODE_SERVER_PASSWORD", "")
 _TIMEOUT = float(getenv("OPENCODE_SERVER_TIMEOUT", "600"))
 _MAX_OUTPUT = int(getenv("OPENCODE_SERVER_MAX_OUTPUT", "20000"))
 _PROGRESS_POLL = float(getenv("OPENCODE_SERVER_PROGRESS_POLL", "3"))
+# Events arriving within this window are applied together, so a streamed
+# reply edits the progress panel at most a couple of times per second
+_PROGRESS_FLUSH = float(getenv("OPENCODE_SERVER_PROGRESS_FLUSH", "0.5"))
+# The /event stream is reopened when silent this long (the server sends
+# heartbeats); polling covers the gap
+_EVENTS_IDLE = float(getenv("OPENCODE_SERVER_EVENTS_IDLE", "60"))
 _PROGRESS_LINES = int(getenv("OPENCODE_SERVER_PROGRESS_LINES", "6"))
 _WEB_URL = getenv("OPENCODE_WEB_URL", "").strip().rstrip("/")
 _ERRORS = (ClientError, PermissionError, RuntimeError, TimeoutError)
@@ -171,6 +180,12 @@ async def _persist_sessions(sessions: list[dict[str, Any]]) -> None:
 # ============================================================
 
 
+_UNAUTHORIZED = (
+    "Unauthorized: set OPENCODE_SERVER_PASSWORD (and OPENCODE_SERVER_USERNAME "
+    "if not 'opencode'), or embed credentials in OPENCODE_ACP_URL"
+)
+
+
 class OpencodeClient:
     """Minimal async client for the Opencode server HTTP API."""
 
@@ -196,11 +211,7 @@ class OpencodeClient:
         ):
             body = (await response.text()).strip()
             if response.status == 401:
-                raise PermissionError(
-                    "Unauthorized: set OPENCODE_SERVER_PASSWORD (and "
-                    "OPENCODE_SERVER_USERNAME if not 'opencode'), or embed "
-                    "credentials in OPENCODE_ACP_URL"
-                )
+                raise PermissionError(_UNAUTHORIZED)
             if response.status >= 400:
                 raise RuntimeError(
                     f"{method} {path} failed [{response.status}]: {body[:300]}"
@@ -271,10 +282,162 @@ class OpencodeClient:
             or []
         )
 
+    async def events(self) -> AsyncIterator[dict[str, Any]]:
+        """Yield the server's events ({type, properties}) from its /event SSE stream.
+
+        Runs until the stream closes or stays silent for _EVENTS_IDLE
+        seconds. Raises like other requests when it cannot be opened.
+        """
+        timeout = ClientTimeout(
+            total=None, connect=10, sock_connect=10, sock_read=_EVENTS_IDLE
+        )
+        async with (
+            ClientSession(auth=self._auth, timeout=timeout) as session,
+            session.get(
+                f"{self._base_url}/event", headers={"Accept": "text/event-stream"}
+            ) as response,
+        ):
+            if response.status == 401:
+                raise PermissionError(_UNAUTHORIZED)
+            if response.status >= 400:
+                raise RuntimeError(f"GET /event failed [{response.status}]")
+            buffer, data = b"", []
+            # Split lines by hand: a large part update can exceed aiohttp's
+            # line length limit
+            async for chunk in response.content.iter_any():
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for raw in lines:
+                    line = raw.decode("utf-8", "replace").rstrip("\r")
+                    if line.startswith("data:"):
+                        data.append(line[5:].removeprefix(" "))
+                    elif not line and data:
+                        try:
+                            event = loads("\n".join(data))
+                        except JSONDecodeError:
+                            event = None
+                        data = []
+                        if isinstance(event, dict):
+                            yield event
+
 
 _client = OpencodeClient(_BASE_URL, _AUTH, _TIMEOUT)
 
 
+def _event_session(event: dict[str, Any]) -> str | None:
+    """Session id an event belongs to, if any."""
+    props = event.get("properties") or {}
+    return (
+        props.get("sessionID")
+        or (props.get("info") or {}).get("sessionID")
+        or (props.get("part") or {}).get("sessionID")
+    )
+
+
+class SessionWatch:
+    """Events of one session, as delivered by an :class:`EventStream`."""
+
+    def __init__(self, stream: EventStream, queue: asyncio.Queue) -> None:
+        self._stream = stream
+        self._queue = queue
+        self._connection = -1
+
+    def stale(self) -> bool:
+        """True when events alone cannot be trusted: re-read state over HTTP.
+
+        That is while the stream is down (polling fallback), and once after
+        each (re)connection, since events may have been missed meanwhile.
+        """
+        if not self._stream.live:
+            return True
+        if self._connection != self._stream.connections:
+            self._connection = self._stream.connections
+            return True
+        return False
+
+    async def next(
+        self, wait: float, types: tuple[str, ...] | None = None
+    ) -> dict[str, Any] | None:
+        """Next event (of one of types, if given), or None after wait seconds."""
+        deadline = monotonic() + wait
+        while (remaining := deadline - monotonic()) > 0:
+            try:
+                event = await asyncio.wait_for(self._queue.get(), remaining)
+            except TimeoutError:
+                return None
+            if types is None or event.get("type") in types:
+                return event
+        return None
+
+    async def batch(self, first: dict[str, Any], window: float) -> list[dict[str, Any]]:
+        """first, followed by the events arriving within window seconds."""
+        events = [first]
+        deadline = monotonic() + window
+        while event := await self.next(deadline - monotonic()):
+            events.append(event)
+        return events
+
+
+class EventStream:
+    """One shared /event subscription per server, demultiplexed by session.
+
+    The stream is opened by the first watcher and closed once the last one
+    leaves; it reconnects with backoff meanwhile, whatever the error.
+    Watchers fall back to polling while it is down (see
+    :meth:`SessionWatch.stale`).
+    """
+
+    def __init__(self, client: OpencodeClient) -> None:
+        self._client = client
+        self._watchers: dict[str, set[asyncio.Queue]] = {}
+        self._task: asyncio.Task | None = None
+        self.live = False
+        self.connections = 0
+
+    @asynccontextmanager
+    async def watch(self, session_id: str) -> AsyncIterator[SessionWatch]:
+        """Receive the events of a session for the duration of the block."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._watchers.setdefault(session_id, set()).add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            yield SessionWatch(self, queue)
+        finally:
+            queues = self._watchers.get(session_id, set())
+            queues.discard(queue)
+            if not queues:
+                self._watchers.pop(session_id, None)
+            if not self._watchers and self._task:
+                self._task.cancel()
+                self._task = None
+                self.live = False
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                async for event in self._client.events():
+                    if not self.live:
+                        self.live = True
+                        self.connections += 1
+                        backoff = 1.0
+                    for queue in self._watchers.get(_event_session(event) or "", ()):
+                        queue.put_nowait(event)
+            except _ERRORS:
+                pass  # Watchers poll until the stream is back
+            except Exception:
+                # A bad event must not end the stream for good
+                logger.exception("Opencode event stream failed, reconnecting")
+            finally:
+                self.live = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+_events = EventStream(_client)
+
+
 # ============================================================
 # PROGRESS WATCHER
 # ============================================================
@@ -319,54 +482,75 @@ def _progress_line(part: dict[str, Any]) -> str | None:
 
 
 async def _watch_progress(session_id: str, tracker: ProgressTracker) -> None:
-    """Poll the session for new message parts while a prompt runs, emitting progress lines.
+    """Follow the session's new message parts while a prompt runs, emitting progress lines.
 
     Starts at the moment of creation, so pre-existing history is not replayed.
-    `ponytail: 3s polling; switch to /event SSE if finer granularity is needed.`
+    Parts come from the shared /event stream; the messages are polled
+    instead while it is down, and once after each (re)connection.
     """
     start_ms = int(datetime.now(UTC).timestamp() * 1000) - 1000
     emitted: dict[str, str] = {}  # part id -> last emitted text (for text parts)
     tool_status: dict[str, str] = {}  # part id -> last seen status
-    while True:
-        try:
-            messages = await _client.messages(session_id, limit=20)
-        except Exception:
-            messages = []  # Transient poll failures must not break the run
-        for message in messages:
-            info = message.get("info") or {}
-            created = (info.get("time") or {}).get("created") or 0
-            if created < start_ms:
+    roles: dict[str, str] = {}  # message id -> role, for messages of this run
+
+    def see_message(info: dict[str, Any]) -> None:
+        created = (info.get("time") or {}).get("created") or 0
+        if created >= start_ms and info.get("id"):
+            roles[info["id"]] = info.get("role") or ""
+
+    def apply(part: dict[str, Any]) -> None:
+        if roles.get(part.get("messageID") or "") != "assistant":
+            return  # Don't echo the user's own prompt (or history) as progress
+        pid = part.get("id")
+        if not pid:
+            return
+        kind = part.get("type")
+        if kind == "tool":
+            status = (part.get("state") or {}).get("status")
+            if status and tool_status.get(pid) != status:
+                tool_status[pid] = status
+                if line := _progress_line(part):
+                    # Keyed by part id: the running line is replaced
+                    # in place by its completion line, not appended.
+                    tracker.set_line(f"tool:{pid}", line)
+        elif kind in ("text", "reasoning"):
+            text = part.get("text") or ""
+            last = emitted.get(pid, "")
+            if len(text) > len(last):
+                emitted[pid] = text
+                if delta := text[len(last) :].strip():
+                    prefix = "💭" if kind == "reasoning" else "💬"
+                    tracker.set_line(f"{kind}:{pid}", f"{prefix} {delta}")
+        elif kind == "patch":
+            if pid not in emitted:
+                emitted[pid] = "patch"
+                if line := _progress_line(part):
+                    tracker.add_line(line)
+
+    async with _events.watch(session_id) as events:
+        while True:
+            if events.stale():
+                try:
+                    messages = await _client.messages(session_id, limit=20)
+                except Exception:
+                    messages = []  # Transient poll failures must not break the run
+                for message in messages:
+                    see_message(message.get("info") or {})
+                    for part in message.get("parts") or []:
+                        apply(part)
+                await tracker.emit()
+            event = await events.next(
+                _PROGRESS_POLL, ("message.updated", "message.part.updated")
+            )
+            if event is None:
                 continue
-            if info.get("role") != "assistant":
-                continue  # Don't echo the user's own prompt back as progress
-            for part in message.get("parts") or []:
-                pid = part.get("id")
-                if not pid:
-                    continue
-                kind = part.get("type")
-                if kind == "tool":
-                    status = (part.get("state") or {}).get("status")
-                    if status and tool_status.get(pid) != status:
-                        tool_status[pid] = status
-                        if line := _progress_line(part):
-                            # Keyed by part id: the running line is replaced
-                            # in place by its completion line, not appended.
-                            tracker.set_line(f"tool:{pid}", line)
-                elif kind in ("text", "reasoning"):
-                    text = part.get("text") or ""
-                    last = emitted.get(pid, "")
-                    if len(text) > len(last):
-                        emitted[pid] = text
-                        if delta := text[len(last) :].strip():
-                            prefix = "💭" if kind == "reasoning" else "💬"
-                            tracker.set_line(f"{kind}:{pid}", f"{prefix} {delta}")
-                elif kind == "patch":
-                    if pid not in emitted:
-                        emitted[pid] = "patch"
-                        if line := _progress_line(part):
-                            tracker.add_line(line)
-        await tracker.emit()
-        await asyncio.sleep(_PROGRESS_POLL)
+            for ev in await events.batch(event, _PROGRESS_FLUSH):
+                props = ev.get("properties") or {}
+                if ev.get("type") == "message.updated":
+                    see_message(props.get("info") or {})
+                elif ev.get("type") == "message.part.updated":
+                    apply(props.get("part") or {})
+            await tracker.emit()
 
 
 # ============================================================
@@ -550,16 +734,34 @@ async def _start_tracker(session_id: str) -> ProgressTracker | None:
     return tracker
 
 
+def _is_idle(event: dict[str, Any]) -> bool:
+    """Whether an event reports its session went idle."""
+    if event.get("type") == "session.idle":
+        return True
+    status = (event.get("properties") or {}).get("status") or {}
+    return event.get("type") == "session.status" and status.get("type") == "idle"
+
+
 async def _wait_for_idle(
     session_id: str, deadline: float, tracker: ProgressTracker | None
 ) -> None:
-    """Poll /session/status until the session is idle or the deadline passes."""
-    while monotonic() < deadline:
-        status = (await _client.session_status()) or {}
-        state = (status.get(session_id) or {}).get("type")
-        if state is None or state == "idle":
-            return
-        await asyncio.sleep(_PROGRESS_POLL)
+    """Wait until the session is idle or the deadline passes.
+
+    Listens for the idle event, checking /session/status when events may
+    have been missed (and every _PROGRESS_POLL seconds without the stream).
+    """
+    async with _events.watch(session_id) as events:
+        while (remaining := deadline - monotonic()) > 0:
+            if events.stale():
+                status = (await _client.session_status()) or {}
+                state = (status.get(session_id) or {}).get("type")
+                if state is None or state == "idle":
+                    return
+            event = await events.next(
+                min(_PROGRESS_POLL, remaining), ("session.idle", "session.status")
+            )
+            if event is not None and _is_idle(event):
+                return
     if tracker:
         tracker.set_status("🔸 Status: Timed out (still running)")
         await tracker.emit()
@@ -569,20 +771,23 @@ async def _wait_for_idle(
 async def _wait_for_message(
     session_id: str, deadline: float, role: str = "assistant"
 ) -> dict[str, Any] | None:
-    """Poll /session/{id}/message for the latest message matching `role`.
+    """Fetch /session/{id}/message until the latest message matching `role` is there.
 
-    If the deadline passes before a matching message appears, the most
-    recent message of any role (if any) is returned as a fallback.
+    Refetches when a message of the session is updated (or every
+    _PROGRESS_POLL seconds). If the deadline passes before a matching
+    message appears, the most recent message of any role (if any) is
+    returned as a fallback.
     """
     last: dict[str, Any] | None = None
-    while monotonic() < deadline:
-        messages = await _client.messages(session_id, limit=10)
-        if messages:
-            last = messages[-1]
-        for m in reversed(messages):
-            if (m.get("info") or {}).get("role") == role:
-                return m
-        await asyncio.sleep(_PROGRESS_POLL)
+    async with _events.watch(session_id) as events:
+        while (remaining := deadline - monotonic()) > 0:
+            messages = await _client.messages(session_id, limit=10)
+            if messages:
+                last = messages[-1]
+            for m in reversed(messages):
+                if (m.get("info") or {}).get("role") == role:
+                    return m
+            await events.next(min(_PROGRESS_POLL, remaining), ("message.updated",))
     return last
 
 
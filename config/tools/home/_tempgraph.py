@@ -0,0 +1,328 @@
+"""Temperature graph rendering (matplotlib) for the GREE AC tool.
+
+Run as a script, it is the render worker: it reads pickled render_graph
+arguments from stdin and writes back pickled (path, error) replies, so the
+process stays warm between graphs. It only imports matplotlib, never the
+bot package, and the tool loader skips it (leading underscore).
+"""
+
+import logging
+import pickle
+import sys
+from bisect import bisect_left
+from contextlib import suppress
+from datetime import datetime, timedelta, tzinfo
+from pathlib import Path
+
+logging.getLogger("matplotlib").setLevel(logging.WARNING)
+
+import matplotlib.pyplot as plt
+from matplotlib import use
+from matplotlib.collections import LineCollection
+from matplotlib.dates import DateFormatter, DayLocator, date2num
+from matplotlib.lines import Line2D
+from matplotlib.path import Path as MplPath
+
+use("Agg")
+
+# Bump when the rendering below changes, so cached graphs are redrawn
+STYLE_VERSION = 1
+
+STYLE = {
+    "figure.facecolor": "#000000",
+    "figure.edgecolor": "#000000",
+    "axes.facecolor": "#000000",
+    "savefig.facecolor": "#000000",
+    "savefig.edgecolor": "#000000",
+    "text.color": "#eaeaea",
+    "axes.labelcolor": "#eaeaea",
+    "axes.titlecolor": "#eaeaea",
+    "xtick.color": "#666666",
+    "ytick.color": "#666666",
+    "grid.color": "#222222",
+}
+
+_CLOCK_MARKER: MplPath | None = None
+
+
+def _clock_marker() -> MplPath:
+    """Build a clock-shaped marker (circle + two hands) as a matplotlib Path."""
+    global _CLOCK_MARKER
+    if _CLOCK_MARKER is not None:
+        return _CLOCK_MARKER
+    from math import cos, pi, sin
+
+    verts: list[tuple[float, float]] = []
+    codes: list[int] = []
+    # Circle outline (16 segments)
+    for i in range(17):
+        a = 2 * pi * i / 16
+        verts.append((0.5 * cos(a), 0.5 * sin(a)))
+        codes.append(int(MplPath.MOVETO) if i == 0 else int(MplPath.LINETO))
+    # Hour hand (to ~10 o'clock)
+    verts.extend([(0, 0), (-0.22, 0.13)])
+    codes.extend([int(MplPath.MOVETO), int(MplPath.LINETO)])
+    # Minute hand (to 12)
+    verts.extend([(0, 0), (0, 0.33)])
+    codes.extend([int(MplPath.MOVETO), int(MplPath.LINETO)])
+    _CLOCK_MARKER = MplPath(verts, codes)
+    return _CLOCK_MARKER
+
+
+def render_graph(
+    points: list[dict],
+    out: str,
+    title: str = "Temperature Evolution",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    events: list[dict] | None = None,
+    tz: tzinfo | None = None,
+) -> str:
+    """Render readings (already thinned) and events to a PNG at out; returns out.
+
+    Readings are dicts as returned by the AC tool, with deviceTime in tz;
+    rollup buckets (with roomMin/roomMax) get a shaded min-max band.
+    Raises ValueError when no reading has a valid time.
+    """
+    plt.rcParams.update(STYLE)
+
+    ts, rt, at, ps, band = [], [], [], [], []
+    for r in points:
+        dt_s = r.get("deviceTime")
+        if not dt_s:
+            continue
+        try:
+            ts.append(datetime.strptime(dt_s, "%Y-%m-%d %H:%M:%S").replace(tzinfo=tz))
+        except ValueError, TypeError:
+            continue
+        rv = r.get("currentTemperature")
+        if rv is None:
+            rv = r.get("roomTemperature")
+        rt.append(float(rv) if rv is not None else None)
+        av = r.get("targetTemperature")
+        at.append(float(av) if av is not None else None)
+        pv = r.get("power")
+        ps.append(pv in (True, "on", "true", "1") if not isinstance(pv, bool) else pv)
+        if r.get("roomMin") is not None and r.get("roomMax") is not None:
+            band.append((ts[-1], r["roomMin"], r["roomMax"]))
+
+    diff_ts, diff_vals = [], []
+    for i in range(len(ts)):
+        if rt[i] is not None and at[i] is not None:
+            diff_ts.append(ts[i])
+            diff_vals.append(abs(rt[i] - at[i]))
+
+    if not ts:
+        raise ValueError("No valid readings to graph.")
+
+    fig, ax = plt.subplots(figsize=(14, 6))
+    fig.patch.set_facecolor("#000000")
+    ax.set_facecolor("#000000")
+
+    if ps:
+        _on_start: datetime | None = None
+        for i, p in enumerate(ps):
+            if p and _on_start is None:
+                _on_start = ts[i]
+            elif not p and _on_start is not None:
+                ax.axvspan(_on_start, ts[i], color="#1a237e", alpha=0.07, zorder=0)
+                _on_start = None
+        if _on_start is not None:
+            ax.axvspan(_on_start, ts[-1], color="#1a237e", alpha=0.07, zorder=0)
+
+    valid_rt = [(t, v) for t, v in zip(ts, rt, strict=False) if v is not None]
+    if valid_rt:
+        rt_ts, rt_vals = zip(*valid_rt, strict=False)
+        ax.plot(date2num(rt_ts), rt_vals, color="#00bcd4", linewidth=2, alpha=0.6)
+        window = max(3, min(10, len(rt_vals) // 20))
+        sma = [
+            sum(rt_vals[max(0, i - window + 1) : i + 1]) / min(i + 1, window)
+            for i in range(len(rt_vals))
+        ]
+        ax.plot(date2num(rt_ts), sma, color="#2196F3", linewidth=0.5, alpha=0.7)
+    if band:
+        # Rollup buckets: shade the room temperature range around the average
+        band_ts, band_lo, band_hi = zip(*band, strict=True)
+        ax.fill_between(
+            date2num(band_ts), band_lo, band_hi, color="#00bcd4", alpha=0.15, lw=0
+        )
+
+    valid_at = [
+        (t, v, p, r)
+        for t, v, p, r in zip(ts, at, ps, rt, strict=False)
+        if v is not None
+    ]
+    at_vals: tuple = ()
+    if valid_at:
+        at_ts, at_vals, at_ps, at_rt = zip(*valid_at, strict=False)
+        segs, cols = [], []
+        for i in range(len(at_ts) - 1):
+            x1, y1 = date2num(at_ts[i]), at_vals[i]
+            x2, y2 = date2num(at_ts[i + 1]), at_vals[i + 1]
+            segs.append([(x1, y1), (x2, y2)])
+            p, r, a = at_ps[i], at_rt[i], at_vals[i]
+            if not p:
+                cols.append("#ff1744")  # AC off
+            elif r is not None and a is not None and abs(r - a) < 1:
+                cols.append("#00e676")  # on target
+            else:
+                cols.append("#ff9100")  # actively changing
+        lc = LineCollection(segs, colors=cols, linewidth=2, alpha=0.9)
+        ax.add_collection(lc)
+
+    ev_x, ev_y = [], []  # user actions
+    sched_x, sched_y = [], []  # auto-fired schedule events
+    if events and ts:
+        _valid_ts = [t for t, v in zip(ts, at, strict=False) if v is not None]
+        _valid_at = [v for v in at if v is not None]
+        for ev in events:
+            ev_ts = ev.get("deviceTime")
+            if not ev_ts:
+                continue
+            try:
+                ev_dt = datetime.strptime(ev_ts, "%Y-%m-%d %H:%M:%S").replace(tzinfo=tz)
+            except ValueError, TypeError:
+                continue
+            # start/end are aware local (see _generate_temp_graph); ev_dt is
+            # made aware too, so direct comparison works without tz stripping.
+            if (start is None or start <= ev_dt) and (end is None or ev_dt <= end):
+                j = bisect_left(_valid_ts, ev_dt)
+                j = min(j, len(_valid_ts) - 1)
+                y = _valid_at[j] - 0.5
+                if ev.get("action") == "schedule_fired":
+                    sched_x.append(ev_dt)
+                    sched_y.append(y)
+                else:
+                    ev_x.append(ev_dt)
+                    ev_y.append(y)
+        if ev_x:
+            ax.scatter(
+                date2num(ev_x),
+                ev_y,
+                color="#ffffff",
+                s=12,
+                zorder=6,
+                marker="o",
+                edgecolors="#666666",
+                linewidths=0.3,
+            )
+        if sched_x:
+            ax.scatter(
+                date2num(sched_x),
+                sched_y,
+                color="#ce93d8",
+                s=30,
+                zorder=7,
+                marker=_clock_marker(),
+                edgecolors="#666666",
+                linewidths=0.3,
+            )
+
+    ax.set_xlabel("Time", fontsize=11)
+    ax.set_ylabel("Temperature (°C)", fontsize=11)
+    ax.set_title(title, fontsize=14, fontweight="bold", pad=15)
+    _handles = [
+        Line2D([0], [0], color="#00bcd4", linewidth=2, alpha=0.6, label="Room"),
+        Line2D([0], [0], color="#aaaaaa", linewidth=2, label="Target"),
+    ]
+    if diff_vals:
+        _handles.append(
+            Line2D([0], [0], color="yellow", linewidth=0.5, alpha=0.4, label="Diff"),
+        )
+    if valid_rt:
+        _handles.append(
+            Line2D([0], [0], color="#2196F3", linewidth=0.5, alpha=0.7, label="SMA"),
+        )
+    if ev_x:
+        _handles.append(
+            Line2D(
+                [0],
+                [0],
+                color="#ffffff",
+                marker="o",
+                markersize=4,
+                linestyle="None",
+                markeredgecolor="#666666",
+                markeredgewidth=0.3,
+                label="User Action",
+            )
+        )
+    if sched_x:
+        _handles.append(
+            Line2D(
+                [0],
+                [0],
+                color="#ce93d8",
+                marker=_clock_marker(),
+                markersize=6,
+                linestyle="None",
+                markeredgecolor="#666666",
+                markeredgewidth=0.3,
+                label="Scheduled",
+            )
+        )
+    ax.legend(handles=_handles, loc="upper left", fontsize=9, framealpha=0.8, ncol=2)
+    ax.grid(True, linestyle="--", alpha=0.3, color="#555555")
+
+    pad = (ts[-1] - ts[0]) * 0.02 if len(ts) > 1 else timedelta(hours=1)
+    ax.set_xlim(ts[0] - pad, ts[-1] + pad)
+
+    _y_vals = [v for v in rt if v is not None] + [v for v in at if v is not None]
+    if _y_vals:
+        y_min, y_max = min(_y_vals), max(_y_vals)
+        y_pad = max(0.5, (y_max - y_min) * 0.1)
+        ax.set_ylim(y_min - y_pad, y_max + y_pad)
+
+    if diff_vals:
+        ax2 = ax.twinx()
+        ax2.set_facecolor("#000000")
+        ax2.plot(date2num(diff_ts), diff_vals, color="yellow", linewidth=0.5, alpha=0.4)
+        ax2.set_ylabel("Temp Diff (°C)", fontsize=11, color="#999999")
+        ax2.set_ylim(-1, 20)
+        ax2.tick_params(axis="y", colors="#999999")
+        ax2.spines["right"].set_color("#999999")
+        ax2.yaxis.set_major_locator(plt.MaxNLocator(integer=True))
+
+    span = ts[-1] - ts[0]
+    if span <= timedelta(days=2):
+        ax.xaxis.set_major_formatter(DateFormatter("%H:%M"))
+    elif span <= timedelta(days=14):
+        ax.xaxis.set_major_formatter(DateFormatter("%b %d\n%H:%M"))
+    else:
+        ax.xaxis.set_major_formatter(DateFormatter("%b %d"))
+        ax.xaxis.set_major_locator(DayLocator())
+    fig.autofmt_xdate()
+
+    plt.tight_layout()
+    fig.savefig(out, dpi=150, bbox_inches="tight")
+    plt.close(fig)
+    with suppress(PermissionError):
+        Path(out).chmod(0o666)
+    return out
+
+
+def serve() -> None:
+    """Answer render requests from stdin until it is closed.
+
+    Errors are sent back as builtin exceptions for the parent to raise,
+    ValueError staying one (no reading with a valid time).
+    """
+    requests, replies = sys.stdin.buffer, sys.stdout.buffer
+    sys.stdout = sys.stderr  # Stray prints must not corrupt the replies
+    while True:
+        try:
+            args = pickle.load(requests)  # noqa: S301  # Pipe from the parent tool
+        except EOFError:
+            return
+        try:
+            reply = (render_graph(*args), None)
+        except ValueError as exc:
+            reply = (None, ValueError(str(exc)))
+        except Exception as exc:
+            reply = (None, RuntimeError(f"{type(exc).__name__}: {exc}"))
+        pickle.dump(reply, replies)
+        replies.flush()
+
+
+if __name__ == "__main__":
+    serve()
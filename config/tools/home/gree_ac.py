@@ -1,35 +1,65 @@
 """GREE AC control: EWPE/UDP protocol, telemetry, and graphing."""
 
 import logging
+import pickle
+from asyncio import (
+    AbstractEventLoop,
+    DatagramProtocol,
+    DatagramTransport,
+    Future,
+    Semaphore,
+    Task,
+    gather,
+    get_running_loop,
+    new_event_loop,
+    run_coroutine_threadsafe,
+    shield,
+    sleep,
+    timeout,
+    to_thread,
+    wait,
+    wrap_future,
+)
+from asyncio import Lock as AsyncLock
 from atexit import register
 from base64 import b64decode, b64encode
-from bisect import bisect_left
+from collections.abc import Callable, Coroutine
 from contextlib import suppress
 from datetime import datetime, timedelta, tzinfo
+from hashlib import blake2b
+from heapq import heapify, heappop, heappush
+from importlib.util import module_from_spec, spec_from_file_location
 from json import JSONDecodeError, dumps, loads
+from math import isnan
 from os import getenv
 from pathlib import Path
+from random import uniform
 from re import match
 from signal import SIGTERM, signal
-from socket import AF_INET, SO_BROADCAST, SO_REUSEADDR, SOCK_DGRAM, SOL_SOCKET, socket
-from threading import Event, Lock, RLock, Thread
+from subprocess import PIPE, Popen, TimeoutExpired
+from sys import executable
+from threading import Event, Lock, RLock, Thread, current_thread
+from time import monotonic, time
 from typing import Annotated, Any
 
-logging.getLogger("matplotlib").setLevel(logging.WARNING)
-
-import matplotlib.pyplot as plt
+import numpy as np
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from dotenv import load_dotenv
 from langchain.tools import tool
-from matplotlib import use
-from matplotlib.collections import LineCollection
-from matplotlib.dates import DateFormatter, DayLocator, date2num
-from matplotlib.lines import Line2D
-from matplotlib.path import Path as MplPath
 from pydantic import BaseModel, Field
 
-use("Agg")
+from telegram_agent.src.core.timeseries import (
+    Rollup,
+    TimeSeries,
+    duty_cycle,
+    lttb,
+    run_edges,
+    time_weights,
+    transitions,
+    weighted_mean,
+)
+
 load_dotenv()
 
 
@@ -44,6 +74,13 @@ GENERIC_KEY_V2 = b"{yxAHAY_Lm6pbC/<"
 IV_V2 = bytes([0x54, 0x40, 0x78, 0x44, 0x49, 0x67, 0x5A, 0x51, 0x6C, 0x5E, 0x63, 0x13])
 AAD_V2 = b"qualcomm-test"
 TEMSEN_OFFSET = 40
+COLLECT_INTERVAL = 60  # seconds between readings, aligned to the wall clock
+COLLECT_DEADLINE = 45  # seconds a collection cycle may take
+SCHED_MAX_FIRES = 4  # schedule commands in flight at once
+SCHED_GRACE = 60  # seconds a schedule may fire late (e.g. edited as it was due)
+SCHED_MAX_SLEEP = 300  # re-check the wall clock at least this often
+PERSIST_SEEN_EVERY = 900  # seconds between config writes for lastSeen alone
+DISCOVERY_INTERVAL = 600  # seconds between background broadcast scans
 
 _DATA_DIR = Path(getenv("DATA_DIR", "./data")) / "gree_ac"
 _DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -62,6 +99,15 @@ def _device_dir(mac: str) -> Path:
     return d
 
 
+def _write_atomic(path: Path, text: str) -> None:
+    """Write a file via a temp file and rename, so it is never left half written."""
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    with suppress(PermissionError):
+        tmp.chmod(0o666)
+    tmp.replace(path)
+
+
 def _local_tz() -> tzinfo | None:
     """Return the local system timezone."""
     return datetime.now().astimezone().tzinfo
@@ -130,8 +176,13 @@ SWING_HORIZONTAL = {
 STATUS_COLS = [v for k, v in FIELDS.items() if k != "tempSensor"] + [
     FIELDS["tempSensor"]
 ]
+# Columns that move on every poll (device clock, room temperature): like
+# lastSeen, they alone rewrite config.json only every PERSIST_SEEN_EVERY
+_VOLATILE_STATUS = frozenset((FIELDS["time"], FIELDS["tempSensor"]))
 
 _FIELDS_REV = {v: k for k, v in FIELDS.items()}
+# Reply type ("t") of each request type
+REPLY_TYPES = {"status": "dat", "cmd": "res", "bind": "bindok"}
 _MODE_REV = {v: k for k, v in MODE.items()}
 _FAN_REV = {v: k for k, v in FAN_SPEED.items()}
 
@@ -162,6 +213,217 @@ class ScheduleConfig(BaseModel):
     )
 
 
+# ============================================================
+# UDP TRANSPORT
+# ============================================================
+
+
+class _GreeProtocol(DatagramProtocol):
+    """Forward datagrams received on the shared socket to the transport."""
+
+    def __init__(self, owner: UDPTransport) -> None:
+        self._owner = owner
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        self._owner._received(data, addr[0])
+
+    def error_received(self, exc: Exception) -> None:
+        self._owner._log.debug("UDP error: %s", exc)
+
+
+# Check that a datagram is the reply to a given request
+type Accept = Callable[[bytes], bool]
+
+
+class UDPTransport:
+    """One bound UDP socket serving every device, on a private event loop.
+
+    The loop runs in its own thread so that both coroutines (tools) and
+    threads (collector, scheduler) can use it: :meth:`submit` awaits a
+    coroutine on it from another loop, :meth:`run` blocks a thread on it.
+
+    GREE replies carry no request id, so a response is matched to the pending
+    request of the address it comes from, and each device gets at most
+    ``inflight`` requests at a time (one by default). A request may pass an
+    ``accept`` check of the reply (e.g. its type): a late or duplicate reply
+    to an earlier, retried request fails it and is dropped, leaving the
+    request waiting. A request to the broadcast address takes the first
+    datagram no pending request claims. Unanswered requests are retried
+    with a jittered exponential backoff, so an offline unit only delays its
+    own callers.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 2.0,
+        retries: int = 1,
+        backoff: float = 0.25,
+        inflight: int = 1,
+    ) -> None:
+        self._log = logging.getLogger(__name__)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.inflight = inflight
+        self.loop: AbstractEventLoop = new_event_loop()
+        self._thread = Thread(target=self.loop.run_forever, daemon=True, name="gree-io")
+        self._thread.start()
+        self._transport: DatagramTransport | None = None
+        self._open_lock: AsyncLock | None = None
+        self._waiters: dict[str, list[tuple[Future[bytes], Accept | None]]] = {}
+        self._listeners: list[Callable[[bytes, str], bool]] = []
+        self._limits: dict[str, Semaphore] = {}
+        self._stats: dict[str, dict[str, float]] = {}
+
+    # ---- Loop bridges ----
+
+    def run[T](self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine on the transport loop, blocking the calling thread."""
+        if current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("UDPTransport.run() called from its own loop")
+        return run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def submit[T](self, coro: Coroutine[Any, Any, T]) -> T:
+        """Await a coroutine running on the transport loop from another loop."""
+        if get_running_loop() is self.loop:
+            return await coro
+        return await wrap_future(run_coroutine_threadsafe(coro, self.loop))
+
+    def close(self) -> None:
+        """Close the socket and stop the loop."""
+        if self._transport is not None:
+            self.loop.call_soon_threadsafe(self._transport.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    # ---- Socket ----
+
+    async def _endpoint(self) -> DatagramTransport:
+        if self._transport is None:
+            if self._open_lock is None:
+                self._open_lock = AsyncLock()
+            async with self._open_lock:
+                if self._transport is None:
+                    self._transport, _ = await self.loop.create_datagram_endpoint(
+                        lambda: _GreeProtocol(self),
+                        local_addr=("0.0.0.0", 0),  # replies come from any unit
+                        allow_broadcast=True,
+                    )
+        return self._transport
+
+    def _received(self, data: bytes, ip: str) -> None:
+        waiters = self._waiters.get(ip, ())
+        for future, accept in waiters:
+            if not future.done() and (accept is None or accept(data)):
+                future.set_result(data)
+                return
+        for listener in list(self._listeners):
+            if listener(data, ip):
+                return
+        if waiters:
+            self._stat(ip)["mismatched"] += 1
+
+    def _stat(self, addr: str) -> dict[str, float]:
+        return self._stats.setdefault(
+            addr,
+            dict.fromkeys(
+                ("sent", "replies", "timeouts", "retries", "mismatched", "rtt_total"), 0
+            ),
+        )
+
+    # ---- Requests ----
+
+    async def request(
+        self,
+        addr: str,
+        payload: bytes,
+        timeout_s: float | None = None,
+        retries: int | None = None,
+        accept: Accept | None = None,
+    ) -> bytes | None:
+        """Send payload to addr and return its reply, or None if unanswered.
+
+        Only a datagram passing accept (when given) is taken as the reply.
+        """
+        transport = await self._endpoint()
+        limit = self._limits.setdefault(addr, Semaphore(self.inflight))
+        stat = self._stat(addr)
+        attempts = 1 + (self.retries if retries is None else retries)
+        async with limit:
+            for attempt in range(attempts):
+                if attempt:
+                    stat["retries"] += 1
+                    await sleep(self.backoff * 2 ** (attempt - 1) * uniform(0.5, 1.5))
+                future: Future[bytes] = self.loop.create_future()
+                if addr == BROADCAST:
+
+                    def claim(data: bytes, _ip: str, f: Future[bytes] = future) -> bool:
+                        if f.done() or (accept is not None and not accept(data)):
+                            return False
+                        f.set_result(data)
+                        return True
+
+                    self._listeners.append(claim)
+                else:
+                    waiter = (future, accept)
+                    self._waiters.setdefault(addr, []).append(waiter)
+                sent = monotonic()
+                try:
+                    transport.sendto(payload, (addr, UDP_PORT))
+                    stat["sent"] += 1
+                    async with timeout(timeout_s or self.timeout):
+                        data = await future
+                except TimeoutError:
+                    stat["timeouts"] += 1
+                    continue
+                finally:
+                    if addr == BROADCAST:
+                        self._listeners.remove(claim)
+                    else:
+                        self._waiters[addr].remove(waiter)
+                stat["replies"] += 1
+                stat["rtt_total"] += monotonic() - sent
+                return data
+        return None
+
+    async def scan(
+        self, payload: bytes, duration: float = 3.0
+    ) -> list[tuple[bytes, str]]:
+        """Broadcast payload and collect every reply received within duration."""
+        transport = await self._endpoint()
+        replies: list[tuple[bytes, str]] = []
+
+        def collect(data: bytes, ip: str) -> bool:
+            replies.append((data, ip))
+            return True
+
+        self._listeners.append(collect)
+        try:
+            transport.sendto(payload, (BROADCAST, UDP_PORT))
+            await sleep(duration)
+        finally:
+            self._listeners.remove(collect)
+        return replies
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per-address request counters and average round-trip time."""
+        return {
+            addr: {
+                "sent": int(s["sent"]),
+                "replies": int(s["replies"]),
+                "timeouts": int(s["timeouts"]),
+                "retries": int(s["retries"]),
+                "mismatched": int(s["mismatched"]),
+                "avg_rtt_ms": (
+                    round(s["rtt_total"] / s["replies"] * 1000, 1)
+                    if s["replies"]
+                    else None
+                ),
+            }
+            for addr, s in self._stats.items()
+        }
+
+
 # ============================================================
 # API CLIENT
 # ============================================================
@@ -182,10 +444,28 @@ class GREEACClient:
                 raw = config_path.read_bytes().rstrip(b"\x00").decode("utf-8")
                 for d in loads(raw).get("devices", []):
                     self._overrides[self._norm(d["mac"])] = d
+        # Guards _schedules and _state for the scheduler thread; never held
+        # across network I/O, which runs on the transport loop
         self._lock = RLock()
-        # Software scheduler
+        self._io = UDPTransport()
+        self._ensure_lock = AsyncLock()
+        self._dev_locks: dict[str, AsyncLock] = {}
+        self._status_inflight: dict[tuple[str, tuple[str, ...]], Task] = {}
+        # Persistence: what was last written per device, to skip no-op writes
+        self._persisted: dict[str, tuple[tuple, float]] = {}
+        self._saved_schedules: dict[str, str] = {}
+        self._persist_stats = {"writes": 0, "writes_avoided": 0}
+        # Background discovery (single-flight scan) and per-device reachability
+        self._discovery: Task | None = None
+        self._reach: dict[str, dict[str, Any]] = {}
+        self._scans = 0
+        # Software scheduler: (fire timestamp, mac, schedule id) min-heap,
+        # rebuilt when schedules change
+        self._sched_heap: list[tuple[float, str, int]] = []
+        self._sched_wake = Event()
         self._sched_stop = Event()
         self._sched_thread: Thread | None = None
+        self._fire_slots = Semaphore(SCHED_MAX_FIRES)
         self._start_scheduler()
 
     @staticmethod
@@ -270,87 +550,93 @@ class GREEACClient:
 
     # ---- Network ----
 
-    def _send(self, addr: str, data: dict, timeout: float = 2.0) -> dict | None:
-        """Low-level UDP send, returns response pack or None."""
+    def _reply_check(self, request: dict, key: bytes | None = None) -> Accept:
+        """Accept only a reply of the type request expects (see REPLY_TYPES).
+
+        A status reply must also carry only requested columns, and at least
+        half of them (a unit may leave out columns it does not support), so
+        a late full status and a clock read cannot answer each other.
+        """
+        expected = REPLY_TYPES[request["t"]]
+        wanted = set(request.get("cols") or ())
+
+        def accept(raw: bytes) -> bool:
+            try:
+                pack = self._unpack(raw.decode("utf-8"), key)["pack"]
+            except Exception:
+                return False
+            if str(pack.get("t", "")).lower() != expected:
+                return False
+            if expected != "dat":
+                return True
+            cols = set(pack.get("cols") or ())
+            return cols <= wanted and 2 * len(cols) >= len(wanted)
+
+        return accept
+
+    async def _send(self, addr: str, data: dict, timeout_s: float = 2.0) -> dict | None:
+        """Send an encrypted request, returns response pack or None."""
         _key = data.pop("_key", None)
         _ver = data.pop("_ver", 1)
-        sock = socket(AF_INET, SOCK_DGRAM)
-        sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+        msg = self._pack(data, addr, _ver, _key)
+        resp = await self._io.request(
+            addr,
+            msg.encode("utf-8"),
+            timeout_s,
+            accept=self._reply_check(data, _key),
+        )
+        if resp is None:
+            return None
         try:
-            msg = self._pack(data, addr, _ver, _key)
-            sock.sendto(msg.encode("utf-8"), (addr, UDP_PORT))
-            sock.settimeout(timeout)
-            try:
-                parsed = self._unpack(sock.recvfrom(4096)[0].decode("utf-8"), _key)
-                return parsed["pack"]
-            except TimeoutError:
-                return None
-        finally:
-            sock.close()
+            return self._unpack(resp.decode("utf-8"), _key)["pack"]
+        except Exception as exc:
+            self._log.warning("Device %s sent an unreadable response: %s", addr, exc)
+            return None
 
-    def _udp_send(
-        self, addr: str, payload: bytes, timeout: float = 2.0
+    async def _udp_send(
+        self,
+        addr: str,
+        payload: bytes,
+        timeout_s: float = 2.0,
+        accept: Accept | None = None,
     ) -> bytes | None:
-        """Raw UDP send (for scan/bind which use generic keys)."""
-        sock = socket(AF_INET, SOCK_DGRAM)
-        sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
-        if addr == BROADCAST:
-            sock.setsockopt(SOL_SOCKET, SO_BROADCAST, 1)
-        try:
-            sock.sendto(payload, (addr, UDP_PORT))
-            sock.settimeout(timeout)
-            try:
-                return sock.recvfrom(4096)[0]
-            except TimeoutError:
-                return None
-        finally:
-            sock.close()
+        """Raw UDP request (for scan/bind which use generic keys)."""
+        return await self._io.request(addr, payload, timeout_s, accept=accept)
 
     # ---- Device discovery ----
 
-    def discover(self) -> dict[str, dict[str, Any]]:
+    async def discover(self) -> dict[str, dict[str, Any]]:
         """Broadcast scan, return dict of discovered devices keyed by MAC."""
         found: dict[str, dict[str, Any]] = {}
-        sock = socket(AF_INET, SOCK_DGRAM)
-        sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
-        sock.setsockopt(SOL_SOCKET, SO_BROADCAST, 1)
-        try:
-            sock.sendto(b'{"t":"scan"}', (BROADCAST, UDP_PORT))
-            sock.settimeout(3.0)
-            while True:
-                try:
-                    data, rinfo = sock.recvfrom(4096)
-                    parsed = self._unpack(data.decode("utf-8"))
-                    p = parsed["pack"]
-                    if str(p.get("t", "")).lower() == "dev":
-                        mac = str(p.get("mac", p.get("cid", ""))).lower()
-                        if mac and mac not in found:
-                            found[mac] = {
-                                "mac": mac,
-                                "address": rinfo[0],
-                                "name": p.get("name", mac),
-                                "model": p.get("model"),
-                                "encryptionVersion": 0,
-                                "info": dict(p),
-                            }
-                except TimeoutError:
-                    break
-                except Exception as exc:
-                    self._log.warning("Device discovery error: %s", exc)
-                    continue
-        finally:
-            sock.close()
+        for data, address in await self._io.scan(b'{"t":"scan"}', 3.0):
+            try:
+                p = self._unpack(data.decode("utf-8"))["pack"]
+            except Exception as exc:
+                self._log.warning("Device discovery error: %s", exc)
+                continue
+            if str(p.get("t", "")).lower() == "dev":
+                mac = str(p.get("mac", p.get("cid", ""))).lower()
+                if mac and mac not in found:
+                    found[mac] = {
+                        "mac": mac,
+                        "address": address,
+                        "name": p.get("name", mac),
+                        "model": p.get("model"),
+                        "encryptionVersion": 0,
+                        "info": dict(p),
+                    }
         return found
 
-    def _bind(self, device: dict, version_hint: int = 0) -> dict | None:
+    async def _bind(self, device: dict, version_hint: int = 0) -> dict | None:
         """Bind to device, return cache entry or None."""
         mac = self._norm(device["mac"])
         addr = device.get("address", BROADCAST)
         for ver in [version_hint] if version_hint else [1, 2]:
-            payload = self._pack({"mac": mac, "t": "bind", "uid": 0}, mac, ver).encode(
-                "utf-8"
+            request = {"mac": mac, "t": "bind", "uid": 0}
+            payload = self._pack(request, mac, ver).encode("utf-8")
+            resp = await self._udp_send(
+                addr, payload, accept=self._reply_check(request)
             )
-            resp = self._udp_send(addr, payload)
             if resp is None:
                 continue
             try:
@@ -370,10 +656,24 @@ class GREEACClient:
                 continue
         return None
 
-    def _status(
+    async def _status(
         self, mac: str, cache: dict, cols: list[str] | None = None
     ) -> dict | None:
-        """Fetch status for given cols. Returns decoded {field: value} or None."""
+        """Fetch status for given cols. Returns decoded {field: value} or None.
+
+        Concurrent reads of the same columns of a device share one request.
+        """
+        key = (mac, tuple(cols or STATUS_COLS))
+        task = self._status_inflight.get(key)
+        if task is None:
+            task = get_running_loop().create_task(self._fetch_status(mac, cache, cols))
+            self._status_inflight[key] = task
+            task.add_done_callback(lambda _: self._status_inflight.pop(key, None))
+        return await shield(task)
+
+    async def _fetch_status(
+        self, mac: str, cache: dict, cols: list[str] | None
+    ) -> dict | None:
         d = {
             "mac": mac,
             "t": "status",
@@ -381,16 +681,12 @@ class GREEACClient:
             "_ver": cache["version"],
             "_key": cache["key"],
         }
-        st = self._send(cache["address"], d)
+        st = await self._send(cache["address"], d)
         if st is None:
             return None
         t = str(st.get("t", "")).lower()
         if t == "dat":
             return dict(zip(st.get("cols", []), st.get("dat", []), strict=False))
-        if t == "res":
-            return dict(
-                zip(st.get("opt", []), st.get("p", st.get("val", [])), strict=False)
-            )
         return None
 
     def _query_timers(self, mac: str, cache: dict) -> list[dict] | None:
@@ -404,7 +700,7 @@ class GREEACClient:
             result.append(entry)
         return result
 
-    def _cmd(
+    async def _cmd(
         self, _mac: str, cache: dict, opt: list[str], p: list, sub: str | None = None
     ) -> dict | None:
         """Send command, return response. Optional 'sub' for time sync."""
@@ -417,44 +713,138 @@ class GREEACClient:
         }
         if sub:
             cmd["sub"] = sub
-        resp = self._send(cache["address"], cmd)
+        resp = await self._send(cache["address"], cmd)
         if resp is not None:
             for idx, k in enumerate(opt):
                 cache["status"][k] = p[idx]
         return resp
 
-    def _resolve_one(
+    async def _resolve_one(
         self, mac: str | None = None, name: str | None = None, refresh: bool = False
     ) -> tuple[dict, dict]:
         """Resolve device to (device, cache). Raises string on failure."""
-        r = self.resolve(mac, name, refresh=refresh)
+        r = await self.resolve(mac, name, refresh=refresh)
         if isinstance(r, str):
             raise ValueError(r)  # noqa: TRY004
         return r
 
-    def _ensure(self) -> None:
-        """Lazy-init: scan + merge config overrides."""
-        if not self._state["loaded"]:
-            discovered = self.discover()
+    async def _ensure(self) -> None:
+        """Lazy-init: load known devices (once, whoever asks first).
+
+        Devices saved by earlier runs are usable at once, by unicast to their
+        last address with their saved bind key; only a first run, with no
+        saved device, waits for a broadcast scan. Scans otherwise run in the
+        background (see start_discovery).
+        """
+        if self._state["loaded"]:
+            return
+        async with self._ensure_lock:
+            if self._state["loaded"]:
+                return
             for mac, override in self._overrides.items():
-                if mac in discovered:
-                    discovered[mac].update(override)
-                else:
-                    discovered[mac] = override
                 last = override.get("lastStatus")
                 if mac not in self._cache:
                     self._cache[mac] = {
-                        "key": b"",
+                        "key": override.get("bindKey", "").encode("utf-8"),
                         "address": override.get("address", BROADCAST),
                         "port": UDP_PORT,
                         "version": override.get("encryptionVersion", 0) or 1,
                         "status": self._encode(last) if last else {},
                         "last_seen": 0,
                     }
-            for mac in self._overrides:
-                self._load_schedules(mac)
-            self._state["devices"] = discovered
-            self._state["loaded"] = True
+            if not self._overrides:
+                await self._rediscover()
+            with self._lock:
+                for mac, override in self._overrides.items():
+                    self._load_schedules(mac)
+                    self._state["devices"].setdefault(mac, dict(override))
+                self._state["loaded"] = True
+                self._rebuild_schedule_heap()
+
+    async def _rediscover(self) -> None:
+        """Scan for devices and merge them in; concurrent callers share one scan."""
+        task = self._discovery
+        if task is None or task.done():
+            task = get_running_loop().create_task(self._scan_and_merge())
+            self._discovery = task
+        await shield(task)
+
+    async def _scan_and_merge(self) -> None:
+        found = {self._norm(mac): d for mac, d in (await self.discover()).items()}
+        now = time()
+        with self._lock:
+            self._scans += 1
+            devs = self._state["devices"]
+            added = False
+            for mac, d in found.items():
+                reach = self._reach.setdefault(
+                    mac, {"found": 0, "missed": 0, "address_changes": 0}
+                )
+                reach.update(found=reach["found"] + 1, missed=0, last_found_at=now)
+                known = devs.get(mac)
+                if known is None:
+                    # Saved settings (e.g. a custom name) win, not the address
+                    devs[mac] = {**d, **self._overrides.get(mac, {})}
+                    devs[mac]["address"] = d["address"]
+                    self._load_schedules(mac)
+                    added = True
+                elif known.get("address") != d["address"]:
+                    self._log.info(
+                        "GREE %s moved: %s -> %s",
+                        mac,
+                        known.get("address"),
+                        d["address"],
+                    )
+                    known["address"] = d["address"]
+                    reach["address_changes"] += 1
+                    if mac in self._cache:
+                        self._cache[mac]["address"] = d["address"]
+            for mac in devs.keys() - found.keys():
+                reach = self._reach.setdefault(
+                    mac, {"found": 0, "missed": 0, "address_changes": 0}
+                )
+                reach["missed"] += 1
+            if added:
+                self._rebuild_schedule_heap()
+
+    async def _discovery_loop(self) -> None:
+        while True:
+            try:
+                await self._rediscover()
+            except Exception:
+                self._log.exception("GREE discovery failed")
+            await sleep(DISCOVERY_INTERVAL)
+
+    def start_discovery(self) -> None:
+        """Scan for devices now and every DISCOVERY_INTERVAL, on the transport loop."""
+        run_coroutine_threadsafe(self._discovery_loop(), self._io.loop)
+
+    def reachability(self) -> dict[str, dict[str, Any]]:
+        """Per-device discovery counters, address and last reply time."""
+        with self._lock:
+            result = {}
+            for mac, d in self._state["devices"].items():
+                reach = self._reach.get(mac, {})
+                seen = self._cache.get(mac, {}).get("last_seen")
+                found_at = reach.get("last_found_at")
+                result[mac] = {
+                    "address": d.get("address"),
+                    "scans": self._scans,
+                    "found": reach.get("found", 0),
+                    "missed_in_a_row": reach.get("missed", 0),
+                    "address_changes": reach.get("address_changes", 0),
+                    "last_found_at": (
+                        datetime.fromtimestamp(found_at, _local_tz()).isoformat()
+                        if found_at
+                        else None
+                    ),
+                    "last_reply_at": (
+                        datetime.fromtimestamp(seen, _local_tz()).isoformat()
+                        if seen
+                        else None
+                    ),
+                }
+            return result
 
     def _load_schedules(self, mac: str) -> None:
         """Load persisted schedules for a device."""
@@ -463,15 +853,19 @@ class GREEACClient:
             self._schedules[mac] = loads(
                 path.read_bytes().rstrip(b"\x00").decode("utf-8")
             )
+            self._saved_schedules[mac] = dumps(self._schedules[mac], indent=2) + "\n"
         if mac not in self._schedules:
             self._schedules[mac] = []
 
     def _save_schedules(self, mac: str) -> None:
-        """Persist schedules for a device."""
-        path = _device_dir(mac) / "schedules.json"
-        path.write_text(dumps(self._schedules.get(mac, []), indent=2) + "\n")
-        with suppress(PermissionError):
-            path.chmod(0o666)
+        """Persist schedules for a device, if they changed since last written."""
+        text = dumps(self._schedules.get(mac, []), indent=2) + "\n"
+        if self._saved_schedules.get(mac) == text:
+            self._persist_stats["writes_avoided"] += 1
+            return
+        _write_atomic(_device_dir(mac) / "schedules.json", text)
+        self._saved_schedules[mac] = text
+        self._persist_stats["writes"] += 1
 
     def _dev(self, mac: str | None = None, name: str | None = None) -> dict | None:
         """Look up device by MAC or name."""
@@ -484,29 +878,30 @@ class GREEACClient:
                     return d
         return None
 
-    def resolve(
+    async def resolve(
         self, mac: str | None = None, name: str | None = None, refresh: bool = False
     ) -> tuple[dict, dict] | str:
         """Resolve device + bind + get status. Returns (device, cache) or error string."""
-        with self._lock:
-            self._ensure()
-            devs = self._state["devices"]
-            if not devs:
-                return "No GREE devices found. Check config and network."
-            if not mac and not name:
-                if len(devs) == 1:
-                    device = next(iter(devs.values()))
-                else:
-                    return (
-                        "Multiple devices found. Provide 'mac' or 'name' to select one."
-                    )
+        await self._ensure()
+        devs = self._state["devices"]
+        if not devs:
+            return "No GREE devices found. Check config and network."
+        if not mac and not name:
+            if len(devs) == 1:
+                device = next(iter(devs.values()))
             else:
-                device = self._dev(mac, name)
-                if not device:
-                    return f"No configured device matches '{mac or name}'."
-            return self._bind_dev(device, refresh)
+                return "Multiple devices found. Provide 'mac' or 'name' to select one."
+        else:
+            device = self._dev(mac, name)
+            if not device:
+                return f"No configured device matches '{mac or name}'."
+        return await self._bind_dev(device, refresh)
+
+    def _device_lock(self, mac: str) -> AsyncLock:
+        """Lock serializing command/verify sequences of one device."""
+        return self._dev_locks.setdefault(mac, AsyncLock())
 
-    def _bind_dev(self, device: dict, refresh: bool) -> tuple[dict, dict] | str:
+    async def _bind_dev(self, device: dict, refresh: bool) -> tuple[dict, dict] | str:
         """Bind to device if not cached, or refresh status. Returns (device, cache) or error."""
         mac_n = self._norm(device["mac"])
         cache = self._cache.get(mac_n)
@@ -518,18 +913,24 @@ class GREEACClient:
         ):
             return (device, cache)
         if cache and cache.get("key"):
-            st = self._status(mac_n, cache)
+            st = await self._status(mac_n, cache)
             if st is not None:
                 cache["status"] = st
                 cache["last_seen"] = datetime.now(_local_tz()).timestamp()
-                self._sync_device_time(mac_n, cache, status=st)
+                await self._sync_device_time(mac_n, cache, status=st)
                 return (device, cache)
-        cache = self._bind(device)
+        cache = await self._bind(device)
+        address = device.get("address", BROADCAST)
+        if cache is None and address != BROADCAST:
+            # The device may have a new DHCP address: scan, and retry if so
+            await self._rediscover()
+            if device.get("address") != address:
+                cache = await self._bind(device)
         if cache is None:
             return f"Device {mac_n} ({device['name']}) is not reachable."
         self._cache[mac_n] = cache
-        self._sync_device_time(mac_n, cache)
-        st = self._status(mac_n, cache)
+        await self._sync_device_time(mac_n, cache)
+        st = await self._status(mac_n, cache)
         if st is not None:
             cache["status"] = st
             cache["last_seen"] = datetime.now(_local_tz()).timestamp()
@@ -675,17 +1076,43 @@ class GREEACClient:
                 raw[FIELDS[fk]] = decoded[dk]
         return raw
 
-    def _persist(self, _device: dict | None = None, _cache: dict | None = None) -> None:
-        """Write per-device config JSON files."""
+    def _persist(self, device: dict | None = None, _cache: dict | None = None) -> None:
+        """Write per-device config JSON files (only device's, if given).
+
+        A device's file is rewritten only when its entry, status or
+        schedules changed since the last write, or lastSeen is over
+        PERSIST_SEEN_EVERY old on disk: a poll alone only moves lastSeen,
+        the device clock and the room temperature, which are left out of
+        the comparison.
+        """
         with self._lock:
             devs = self._state.get("devices", {})
+            if device is not None:
+                devs = {self._norm(device["mac"]): device}
             for d in devs.values():
-                entry = {
-                    k: v for k, v in d.items() if v is not None and k != "lastStatus"
-                }
                 mn = self._norm(d["mac"])
                 c = self._cache.get(mn, {})
                 st = c.get("status", {})
+                seen = c.get("last_seen")
+                # Compare the inputs, so an unchanged device is not even decoded
+                inputs = (
+                    dict(d),
+                    {k: v for k, v in st.items() if k not in _VOLATILE_STATUS},
+                    [dict(s) for s in self._schedules.get(mn, [])],
+                    c.get("key"),
+                    c.get("version"),
+                )
+                written = self._persisted.get(mn)
+                if (
+                    written is not None
+                    and written[0] == inputs
+                    and (not seen or seen - written[1] < PERSIST_SEEN_EVERY)
+                ):
+                    self._persist_stats["writes_avoided"] += 1
+                    continue
+                entry = {
+                    k: v for k, v in d.items() if v is not None and k != "lastStatus"
+                }
                 if st:
                     decoded = self.decode(d, c, st)
                     decoded.pop("lastSeen", None)
@@ -693,19 +1120,23 @@ class GREEACClient:
                     scheds = self._query_timers(mn, c)
                     decoded["schedules"] = scheds if scheds is not None else []
                     entry["lastStatus"] = decoded
+                if c.get("key"):
+                    # Reused at startup, so commands work before discovery
+                    entry["bindKey"] = c["key"].decode("utf-8")
+                    entry["encryptionVersion"] = c["version"]
                 if "last_seen" in c:
                     entry["lastSeen"] = (
-                        datetime.fromtimestamp(
-                            c["last_seen"], tz=_local_tz()
-                        ).isoformat()
-                        if c["last_seen"]
+                        datetime.fromtimestamp(seen, tz=_local_tz()).isoformat()
+                        if seen
                         else None
                     )
                 if entry:
-                    config_path = _device_dir(mn) / "config.json"
-                    config_path.write_text(dumps({"devices": [entry]}, indent=2) + "\n")
-                    with suppress(PermissionError):
-                        config_path.chmod(0o666)
+                    _write_atomic(
+                        _device_dir(mn) / "config.json",
+                        dumps({"devices": [entry]}, indent=2) + "\n",
+                    )
+                    self._persist_stats["writes"] += 1
+                self._persisted[mn] = (inputs, seen or 0)
 
     # ---- Public command helpers ----
 
@@ -733,12 +1164,12 @@ class GREEACClient:
             FIELDS["turbo"]: ON_OFF["off"],
         }
 
-    def status(
+    async def status(
         self, mac: str | None = None, name: str | None = None, refresh: bool = True
     ) -> dict[str, Any]:
         """Get decoded status including schedules. Returns error dict on failure."""
         try:
-            device, cache = self._resolve_one(mac, name, refresh=refresh)
+            device, cache = await self._resolve_one(mac, name, refresh=refresh)
         except ValueError as e:
             return {"error": str(e)}
         result = self.decode(device, cache, cache.get("status", {}))
@@ -747,12 +1178,12 @@ class GREEACClient:
         result["schedules"] = timers if timers is not None else []
         return result
 
-    def room_temp(
+    async def room_temp(
         self, mac: str | None = None, name: str | None = None
     ) -> dict[str, Any]:
         """Get current room temperature from AC sensor. Returns {temperature, estimated, unit}."""
         try:
-            device, cache = self._resolve_one(mac, name, refresh=True)
+            device, cache = await self._resolve_one(mac, name, refresh=True)
         except ValueError as e:
             return {"error": str(e)}
         celsius, estimated = self._decode_temp(device, cache.get("status", {}))
@@ -773,38 +1204,38 @@ class GREEACClient:
             "estimated": estimated,
         }
 
-    def set_power(
+    async def set_power(
         self, on: bool, mac: str | None = None, name: str | None = None
     ) -> dict[str, Any]:
         """Power AC on or off. Returns decoded status."""
         try:
-            device, cache = self._resolve_one(mac, name)
+            device, cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
-        return self._cmd_verify(
+        return await self._cmd_verify(
             device, cache, {FIELDS["power"]: ON_OFF["on"] if on else ON_OFF["off"]}
         )
 
-    def set_mode(
+    async def set_mode(
         self, mode: str, mac: str | None = None, name: str | None = None
     ) -> dict[str, Any]:
         """Set AC operating mode. Also powers unit on. Returns decoded status."""
         if mode not in MODE:
             return {"error": f"Invalid mode '{mode}'. Valid: {list(MODE)}"}
         try:
-            device, cache = self._resolve_one(mac, name)
+            device, cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
-        return self._cmd_verify(
+        return await self._cmd_verify(
             device, cache, {FIELDS["mode"]: MODE[mode], FIELDS["power"]: ON_OFF["on"]}
         )
 
-    def set_temp(
+    async def set_temp(
         self, temperature: float, mac: str | None = None, name: str | None = None
     ) -> dict[str, Any]:
         """Set target temperature. Validates range, rounds to int. Returns decoded status."""
         try:
-            device, cache = self._resolve_one(mac, name)
+            device, cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
         mn = self._norm(device["mac"])
@@ -814,7 +1245,7 @@ class GREEACClient:
             return {
                 "error": f"Temperature {temperature}C is out of range for {mn} (allowed {min_t}-{max_t}C)."
             }
-        return self._cmd_verify(
+        return await self._cmd_verify(
             device,
             cache,
             {
@@ -823,7 +1254,7 @@ class GREEACClient:
             },
         )
 
-    def set_fan(
+    async def set_fan(
         self, speed: str, mac: str | None = None, name: str | None = None
     ) -> dict[str, Any]:
         """Set fan speed. Validates speed, handles quiet/turbo. Returns decoded status."""
@@ -833,19 +1264,19 @@ class GREEACClient:
         if speed not in VALID_FAN_SPEEDS:
             return {"error": f"Invalid speed '{speed}'. Valid: {VALID_FAN_SPEEDS}"}
         try:
-            device, cache = self._resolve_one(mac, name)
+            device, cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
-        return self._cmd_verify(
+        return await self._cmd_verify(
             device, cache, self._fan_cmd(speed, device.get("speedSteps", 5))
         )
 
-    def set_swing(
+    async def set_swing(
         self, on: bool, mac: str | None = None, name: str | None = None
     ) -> dict[str, Any]:
         """Enable/disable louver swing. Uses device oscillation config. Returns decoded status."""
         try:
-            device, cache = self._resolve_one(mac, name)
+            device, cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
         osc = device.get("oscillation", {})
@@ -859,14 +1290,14 @@ class GREEACClient:
             cmd[FIELDS["swingHorizontal"]] = SWING_HORIZONTAL[horiz]
         if not cmd:
             return {"error": "No valid swing positions configured for this device."}
-        return self._cmd_verify(device, cache, cmd)
+        return await self._cmd_verify(device, cache, cmd)
 
-    def set_xfan(
+    async def set_xfan(
         self, on: bool, mac: str | None = None, name: str | None = None
     ) -> dict[str, Any]:
         """Toggle X-Fan (coil drying). Checks device capability. Returns decoded status."""
         try:
-            device, cache = self._resolve_one(mac, name)
+            device, cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
         mn = self._norm(device["mac"])
@@ -874,16 +1305,16 @@ class GREEACClient:
             return {
                 "error": f'X-Fan is not enabled for {mn} ({device["name"]}); set "xFan": true in config.'
             }
-        return self._cmd_verify(
+        return await self._cmd_verify(
             device, cache, {FIELDS["xFan"]: ON_OFF["on"] if on else ON_OFF["off"]}
         )
 
-    def set_light(
+    async def set_light(
         self, on: bool, mac: str | None = None, name: str | None = None
     ) -> dict[str, Any]:
         """Toggle front-panel display LED. Checks device capability. Returns decoded status."""
         try:
-            device, cache = self._resolve_one(mac, name)
+            device, cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
         mn = self._norm(device["mac"])
@@ -891,51 +1322,51 @@ class GREEACClient:
             return {
                 "error": f'Light control is not enabled for {mn} ({device["name"]}); set "lightControl": true in config.'
             }
-        return self._cmd_verify(
+        return await self._cmd_verify(
             device, cache, {FIELDS["light"]: ON_OFF["on"] if on else ON_OFF["off"]}
         )
 
-    def set_quiet(
+    async def set_quiet(
         self, on: bool, mac: str | None = None, name: str | None = None
     ) -> dict[str, Any]:
         """Toggle quiet mode. Disables turbo when enabled. Returns decoded status."""
         try:
-            device, cache = self._resolve_one(mac, name)
+            device, cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
         cmd: dict[str, int] = {FIELDS["quiet"]: QUIET["on"] if on else QUIET["off"]}
         if on:
             cmd[FIELDS["turbo"]] = ON_OFF["off"]
-        return self._cmd_verify(device, cache, cmd)
+        return await self._cmd_verify(device, cache, cmd)
 
-    def set_turbo(
+    async def set_turbo(
         self, on: bool, mac: str | None = None, name: str | None = None
     ) -> dict[str, Any]:
         """Toggle turbo mode. Disables quiet when enabled. Returns decoded status."""
         try:
-            device, cache = self._resolve_one(mac, name)
+            device, cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
         cmd: dict[str, int] = {FIELDS["turbo"]: ON_OFF["on"] if on else ON_OFF["off"]}
         if on:
             cmd[FIELDS["quiet"]] = QUIET["off"]
-        return self._cmd_verify(device, cache, cmd)
+        return await self._cmd_verify(device, cache, cmd)
 
-    def get_time(
+    async def get_time(
         self, mac: str | None = None, name: str | None = None
     ) -> dict[str, Any]:
         """Fetch AC unit's internal clock. Returns deviceTime string."""
         try:
-            device, cache = self._resolve_one(mac, name, refresh=True)
+            device, cache = await self._resolve_one(mac, name, refresh=True)
         except ValueError as e:
             return {"error": str(e)}
         mn = self._norm(device["mac"])
-        st = self._status(mn, cache, ["time"])
+        st = await self._status(mn, cache, ["time"])
         if st is None:
             return {"error": "Could not fetch time from device.", "mac": mn}
         return {"mac": mn, "name": device["name"], "deviceTime": st.get("time")}
 
-    def set_time(
+    async def set_time(
         self,
         time_str: str | None = None,
         mac: str | None = None,
@@ -943,13 +1374,13 @@ class GREEACClient:
     ) -> dict[str, Any]:
         """Set AC clock. Defaults to current local time if time_str omitted."""
         try:
-            device, cache = self._resolve_one(mac, name)
+            device, cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
         mn = self._norm(device["mac"])
         if time_str is None:
             time_str = datetime.now(_local_tz()).strftime("%Y-%m-%d %H:%M:%S")
-        resp = self._cmd(mn, cache, ["time"], [time_str], sub=mn)
+        resp = await self._cmd(mn, cache, ["time"], [time_str], sub=mn)
         _record_event(mn, "set_time", time=time_str)
         return {
             "mac": mn,
@@ -958,12 +1389,12 @@ class GREEACClient:
             "response": resp,
         }
 
-    def list_schedules(
+    async def list_schedules(
         self, mac: str | None = None, name: str | None = None
     ) -> dict[str, Any]:
         """List all scheduled timer events on the AC unit."""
         try:
-            device, cache = self._resolve_one(mac, name, refresh=True)
+            device, cache = await self._resolve_one(mac, name, refresh=True)
         except ValueError as e:
             return {"error": str(e)}
         mn = self._norm(device["mac"])
@@ -1012,75 +1443,113 @@ class GREEACClient:
     def _stop_scheduler(self) -> None:
         """Signal the scheduler thread to stop."""
         self._sched_stop.set()
+        self._sched_wake.set()
+
+    @staticmethod
+    def _next_fire_ts(s: dict, after: datetime) -> float | None:
+        """Timestamp of the next fire of a schedule strictly after a time."""
+        nxt = GREEACClient._compute_next_fire(s, after)
+        if nxt is None:
+            return None
+        return (
+            datetime.strptime(nxt, "%Y-%m-%d %H:%M")
+            .replace(tzinfo=after.tzinfo)
+            .timestamp()
+        )
+
+    def _rebuild_schedule_heap(self) -> None:
+        """Recompute the fire heap from all schedules and wake the scheduler.
+
+        Call with the lock held, after schedules change. Fire times are
+        computed from SCHED_GRACE ago, so an occurrence due during the
+        rebuild is not skipped; lastFired prevents firing one twice.
+        """
+        since = datetime.now(_local_tz()) - timedelta(seconds=SCHED_GRACE)
+        heap = []
+        for mn, scheds in self._schedules.items():
+            for s in scheds:
+                sid = s.get("id")
+                ts = self._next_fire_ts(s, since) if isinstance(sid, int) else None
+                if ts is not None:
+                    heap.append((ts, mn, sid))
+        heapify(heap)
+        self._sched_heap = heap
+        self._sched_wake.set()
+
+    def _pop_due(self, now: float) -> list[tuple[str, int, bool]]:
+        """Pop the due fires, reschedule repeating ones; returns (mac, id, power_on).
+
+        Call with the lock held.
+        """
+        fired: list[tuple[str, int, bool]] = []
+        changed: set[str] = set()
+        while self._sched_heap and self._sched_heap[0][0] <= now:
+            ts, mn, sid = heappop(self._sched_heap)
+            scheds = self._schedules.get(mn, [])
+            s = next((x for x in scheds if x.get("id") == sid), None)
+            if s is None:
+                continue
+            due = datetime.fromtimestamp(ts, _local_tz())
+            day = due.strftime("%Y-%m-%d")
+            repeat = s.get("repeat", False)
+            if s.get("lastFired", "") != day and (repeat or not s.get("lastFired")):
+                fired.append((mn, sid, s.get("power_on", False)))
+                s["lastFired"] = day
+                changed.add(mn)
+            if not repeat:
+                self._schedules[mn] = [x for x in scheds if x.get("id") != sid]
+                changed.add(mn)
+                continue
+            nxt = self._next_fire_ts(s, due)
+            if nxt is not None:
+                heappush(self._sched_heap, (nxt, mn, sid))
+        for mn in changed:
+            self._save_schedules(mn)
+        return fired
+
+    def next_schedule_fire(self) -> str | None:
+        """Local time of the earliest pending schedule fire, or None."""
+        with self._lock:
+            if not self._sched_heap:
+                return None
+            ts = self._sched_heap[0][0]
+        return datetime.fromtimestamp(ts, _local_tz()).strftime("%Y-%m-%d %H:%M")
 
     def _scheduler_loop(self) -> None:
-        """Background loop: check schedules every 10s and fire due events."""
+        """Background loop: sleep until the earliest schedule is due, then fire it.
+
+        Woken early when the heap is rebuilt or on stop. Commands are sent on
+        the transport loop, at most SCHED_MAX_FIRES at once.
+        """
         while not self._sched_stop.is_set():
-            now = datetime.now(_local_tz())
-            to_fire: list[tuple[str, int, bool]] = []
-            to_delete: list[tuple[str, int]] = []
             with self._lock:
-                for mn, scheds in self._schedules.items():
-                    for s in scheds:
-                        if not s.get("enabled", True):
-                            continue
-                        sid = s.get("id")
-                        if not isinstance(sid, int):
-                            continue
-                        hour, minute = s.get("hour", 0), s.get("minute", 0)
-                        target_hm = hour * 60 + minute
-                        cur_hm = now.hour * 60 + now.minute
-                        # Fire when current time >= target time (within same minute)
-                        if cur_hm < target_hm:
-                            continue
-                        # For recurring: check weekday is enabled
-                        if s.get("repeat", False):
-                            gree_wd = (now.weekday() + 1) % 7
-                            weekdays = s.get("weekdays", [1] * 7)
-                            if gree_wd < len(weekdays) and not weekdays[gree_wd]:
-                                continue
-                        # Check if already fired today (for recurring) or ever (for one-shot)
-                        last_fired = s.get("lastFired", "")
-                        today_str = now.strftime("%Y-%m-%d")
-                        if s.get("repeat", False) and last_fired == today_str:
-                            continue
-                        if not s.get("repeat", False) and last_fired:
-                            continue
-                        to_fire.append((mn, sid, s.get("power_on", False)))
-                        if not s.get("repeat", False):
-                            to_delete.append((mn, sid))
-            # Fire outside lock to avoid blocking
-            for mn, sid, power_on in to_fire:
-                Thread(
-                    target=self._fire_schedule,
-                    args=(mn, sid, power_on),
-                    daemon=True,
-                ).start()
-            # Mark fired and auto-delete one-shots
-            if to_fire:
-                with self._lock:
-                    now_str = now.strftime("%Y-%m-%d")
-                    for mn, sid, _ in to_fire:
-                        scheds = self._schedules.get(mn, [])
-                        for s in scheds:
-                            if s.get("id") == sid:
-                                s["lastFired"] = now_str
-                                break
-                    for mn, sid in to_delete:
-                        self._schedules[mn] = [
-                            s for s in self._schedules.get(mn, []) if s.get("id") != sid
-                        ]
-                    for mn in {m for m, _, _ in to_fire} | {m for m, _ in to_delete}:
-                        self._save_schedules(mn)
-            self._sched_stop.wait(10)
-
-    def _fire_schedule(self, mac: str, schedule_id: int, power_on: bool) -> None:
+                self._sched_wake.clear()
+                fired = self._pop_due(time())
+                delay = (
+                    self._sched_heap[0][0] - time()
+                    if self._sched_heap
+                    else SCHED_MAX_SLEEP
+                )
+            for mn, sid, power_on in fired:
+                run_coroutine_threadsafe(
+                    self._fire_bounded(mn, sid, power_on), self._io.loop
+                )
+            self._sched_wake.wait(min(max(delay, 0), SCHED_MAX_SLEEP))
+
+    async def _fire_bounded(self, mac: str, schedule_id: int, power_on: bool) -> None:
+        async with self._fire_slots:
+            try:
+                await self._fire_schedule(mac, schedule_id, power_on)
+            except Exception:
+                self._log.exception("Schedule %d of %s failed", schedule_id, mac)
+
+    async def _fire_schedule(self, mac: str, schedule_id: int, power_on: bool) -> None:
         """Send a power command for a fired schedule."""
         try:
-            device, cache = self._resolve_one(mac=mac, refresh=True)
+            device, cache = await self._resolve_one(mac=mac, refresh=True)
         except ValueError:
             return
-        self._cmd(
+        await self._cmd(
             self._norm(device["mac"]),
             cache,
             [FIELDS["power"]],
@@ -1093,7 +1562,7 @@ class GREEACClient:
             power_on=power_on,
         )
 
-    def set_schedule(
+    async def set_schedule(
         self,
         hour: int,
         minute: int,
@@ -1113,7 +1582,7 @@ class GREEACClient:
         if schedule_id is not None and (schedule_id < 0 or schedule_id > 15):
             return {"error": "schedule_id must be 0-15"}
         try:
-            device, _cache = self._resolve_one(mac, name)
+            device, _cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
         mn = self._norm(device["mac"])
@@ -1146,6 +1615,7 @@ class GREEACClient:
             scheds.append(entry)
             self._schedules[mn] = scheds
             self._save_schedules(mn)
+            self._rebuild_schedule_heap()
         _record_event(
             mn,
             "set_schedule",
@@ -1165,7 +1635,7 @@ class GREEACClient:
             "schedule": entry,
         }
 
-    def delete_schedule(
+    async def delete_schedule(
         self,
         schedule_id: int,
         mac: str | None = None,
@@ -1175,7 +1645,7 @@ class GREEACClient:
         if schedule_id < 0 or schedule_id > 15:
             return {"error": "schedule_id must be 0-15"}
         try:
-            device, _cache = self._resolve_one(mac, name)
+            device, _cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
         mn = self._norm(device["mac"])
@@ -1184,6 +1654,7 @@ class GREEACClient:
                 s for s in self._schedules.get(mn, []) if s.get("id") != schedule_id
             ]
             self._save_schedules(mn)
+            self._rebuild_schedule_heap()
         _record_event(mn, "delete_schedule", schedule_id=schedule_id)
         return {
             "mac": mn,
@@ -1191,14 +1662,14 @@ class GREEACClient:
             "deletedScheduleId": schedule_id,
         }
 
-    def set_multiple(self, **kwargs: Any) -> dict[str, Any]:
+    async def set_multiple(self, **kwargs: Any) -> dict[str, Any]:
         """Set multiple AC parameters at once. kwargs match set_home_ac tool params."""
         mac = kwargs.pop("mac", None)
         name = kwargs.pop("name", None)
         schedule: ScheduleConfig | None = kwargs.pop("schedule", None)
         delete_schedule_id: int | None = kwargs.pop("delete_schedule_id", None)
         try:
-            device, cache = self._resolve_one(mac, name)
+            device, cache = await self._resolve_one(mac, name)
         except ValueError as e:
             return {"error": str(e)}
         cmd: dict[str, int] = {}
@@ -1311,7 +1782,7 @@ class GREEACClient:
 
         # Handle schedule deletion
         if delete_schedule_id is not None:
-            del_result = self.delete_schedule(delete_schedule_id, mac, name)
+            del_result = await self.delete_schedule(delete_schedule_id, mac, name)
             if "error" in del_result:
                 warnings.append(del_result["error"])
             else:
@@ -1319,7 +1790,7 @@ class GREEACClient:
 
         # Handle schedule creation/update
         if schedule is not None:
-            sched_result = self.set_schedule(
+            sched_result = await self.set_schedule(
                 schedule.hour,
                 schedule.minute,
                 schedule.power_on,
@@ -1347,29 +1818,32 @@ class GREEACClient:
             delete_schedule_id=delete_schedule_id,
         )
         if cmd:
-            status_result = self._cmd_verify(device, cache, cmd)
+            status_result = await self._cmd_verify(device, cache, cmd)
             result.update(status_result)
         else:
             # Only schedule ops — return current status too
-            with self._lock:
-                mn = self._norm(device["mac"])
-                st = self._status(mn, cache)
-                if st is not None:
-                    cache["status"] = st
-                    cache["last_seen"] = datetime.now(_local_tz()).timestamp()
-                self._persist(device, cache)
-                result.update(self.decode(device, cache, cache.get("status", {})))
+            mn = self._norm(device["mac"])
+            st = await self._status(mn, cache)
+            if st is not None:
+                cache["status"] = st
+                cache["last_seen"] = datetime.now(_local_tz()).timestamp()
+            await to_thread(self._persist, device, cache)
+            result.update(self.decode(device, cache, cache.get("status", {})))
             result["schedules"] = self._query_timers(mn, cache) or []
         if warnings:
             result["warnings"] = warnings
         return result
 
-    def _cmd_verify(self, device: dict, cache: dict, cmd: dict) -> dict[str, Any]:
-        """Send command, try best-effort status re-fetch, return decoded status."""
-        with self._lock:
-            mac = self._norm(device["mac"])
+    async def _cmd_verify(self, device: dict, cache: dict, cmd: dict) -> dict[str, Any]:
+        """Send command, try best-effort status re-fetch, return decoded status.
+
+        Commands to one device are serialized; other devices are not held up.
+        The re-fetch bypasses shared status reads, which may predate the command.
+        """
+        mac = self._norm(device["mac"])
+        async with self._device_lock(mac):
             old_status = dict(cache.get("status", {}))
-            self._cmd(mac, cache, list(cmd.keys()), list(cmd.values()))
+            await self._cmd(mac, cache, list(cmd.keys()), list(cmd.values()))
             changes = {}
             for code, raw_val in cmd.items():
                 if old_status.get(code) == raw_val:
@@ -1383,12 +1857,12 @@ class GREEACClient:
                 changes[name] = decoded
             if changes:
                 _record_event(mac, "cmd", changes=changes)
-            st = self._status(mac, cache)
+            st = await self._fetch_status(mac, cache, None)
             if st is not None:
                 cache["status"] = st
                 cache["last_seen"] = datetime.now(_local_tz()).timestamp()
-            self._persist(device, cache)
-            return self.decode(device, cache, cache.get("status", {}))
+        await to_thread(self._persist, device, cache)
+        return self.decode(device, cache, cache.get("status", {}))
 
     def _device_time_offset_minutes(self, cache: dict) -> int:
         """
@@ -1409,7 +1883,7 @@ class GREEACClient:
         local = datetime.now(_local_tz())
         return round((dt - local).total_seconds() / 60)
 
-    def _sync_device_time(
+    async def _sync_device_time(
         self, mac: str, cache: dict, status: dict | None = None
     ) -> None:
         """
@@ -1420,7 +1894,7 @@ class GREEACClient:
         to reuse an already-fetched status instead of a separate UDP round-trip.
         """
         if status is None:
-            status = self._status(mac, cache, ["time"])
+            status = await self._status(mac, cache, ["time"])
             if status is None:
                 return
         dt_raw = status.get(FIELDS["time"])
@@ -1435,7 +1909,7 @@ class GREEACClient:
         local = datetime.now(_local_tz())
         if abs((local - dt).total_seconds()) > 60:
             time_str = local.strftime("%Y-%m-%d %H:%M:%S")
-            self._cmd(mac, cache, ["time"], [time_str], sub=mac)
+            await self._cmd(mac, cache, ["time"], [time_str], sub=mac)
             cache["status"][FIELDS["time"]] = time_str
 
 
@@ -1447,15 +1921,35 @@ _client = GREEACClient()
 # ============================================================
 
 _telemetry_lock = Lock()
+# Columns of the per-device readings store; mode and fan hold MODE/FAN_SPEED codes
+_READING_COLUMNS = {"room": "f", "target": "f", "power": "b", "mode": "b", "fan": "b"}
+_stores: dict[str, TimeSeries] = {}
+# Rollup tiers (bucket seconds), aligned on local time, and their aggregates
+_ROLLUP_TIERS = {"5m": 300, "1h": 3600, "1d": 86400}
+_ROLLUP_AGGREGATES = {
+    "room_min": ("room", "min"),
+    "room_max": ("room", "max"),
+    "room_avg": ("room", "avg"),
+    "target_avg": ("target", "avg"),
+    "on_s": ("on_s", "sum"),
+    "switches": ("switches", "sum"),
+}
+_rollup_lock = Lock()
+_rollups: dict[str, dict[str, Rollup]] = {}
+_last_power: dict[str, int] = {}
 _collector_thread: Thread | None = None
 _stop_event = Event()
+# Collection counters: per device, and for the cycles as a whole
+_collect_stats: dict[str, dict[str, Any]] = {}
+_cycle_stats: dict[str, Any] = dict.fromkeys(
+    ("cycles", "missed_ticks", "last_cycle_s", "last_cycle_at"), 0
+)
 
 
 def _record_event(mac: str, action: str, **details: Any) -> None:
-    """Append a user action event to the per-device telemetry stream."""
-    tdir = _device_dir(mac) / "telemetry"
+    """Append a user action event to the per-device events stream."""
+    path = _device_dir(mac) / "telemetry" / "events.jsonl"
     now = datetime.now(_local_tz())
-    path = tdir / f"{now.strftime('%Y-%m-%d')}.jsonl"
     event = {
         "deviceTime": now.strftime("%Y-%m-%d %H:%M:%S"),
         "action": action,
@@ -1467,9 +1961,54 @@ def _record_event(mac: str, action: str, **details: Any) -> None:
         path.chmod(0o666)
 
 
-def _telemetry_fetch(mac: str | None = None) -> dict | None:
+def _store_for(mac: str) -> TimeSeries:
+    """Return the readings store of a device."""
+    mn = GREEACClient._norm(mac)
+    with _telemetry_lock:
+        store = _stores.get(mn)
+        if store is None:
+            path = _device_dir(mn) / "telemetry" / "readings"
+            store = _stores[mn] = TimeSeries(path, _READING_COLUMNS)
+    return store
+
+
+def _is_on(value: Any) -> bool:
+    """Whether a recorded power value means on."""
+    return (
+        value in (True, "on", "true", "1", 1) if not isinstance(value, bool) else value
+    )
+
+
+def _reading_row(reading: dict) -> dict[str, float | None]:
+    """Map a decoded reading to the columns of the readings store."""
+    room = reading.get("currentTemperature")
+    if room is None:
+        room = reading.get("roomTemperature")
+    power = reading.get("power")
+    return {
+        "room": room,
+        "target": reading.get("targetTemperature"),
+        "power": None if power is None else int(_is_on(power)),
+        "mode": MODE.get(reading.get("mode") or ""),
+        "fan": FAN_SPEED.get(reading.get("fanSpeed") or ""),
+    }
+
+
+def _parse_time(value: Any) -> float | None:
+    """UNIX timestamp of a recorded local "YYYY-MM-DD HH:MM:SS", or None."""
+    try:
+        return (
+            datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+            .replace(tzinfo=_local_tz())
+            .timestamp()
+        )
+    except TypeError, ValueError:
+        return None
+
+
+async def _telemetry_fetch(mac: str | None = None) -> dict | None:
     """Fetch current AC status for telemetry logging. Returns decoded status or error dict."""
-    r = _client.resolve(mac=mac, refresh=True)
+    r = await _client.resolve(mac=mac, refresh=True)
     if isinstance(r, str):
         return {"error": r}
     device, cache = r[0], r[1]
@@ -1505,45 +2044,280 @@ def _telemetry_fetch(mac: str | None = None) -> dict | None:
     return decoded
 
 
+def _rollup_values(mac: str, room: Any, target: Any, power: Any) -> dict[str, Any]:
+    """Rollup inputs of a reading: power-on seconds and power switches."""
+    values = {"room": room, "target": target, "on_s": None, "switches": None}
+    if power is not None and power >= 0:
+        values["on_s"] = COLLECT_INTERVAL if power else 0
+        values["switches"] = int(_last_power.get(mac, power) != power)
+        _last_power[mac] = power
+    return values
+
+
+def _rollups_for(mac: str) -> dict[str, Rollup]:
+    """Return the rollup tiers of a device, catching up with its readings.
+
+    Open buckets only live in memory: on first use, the readings since the
+    last written bucket of each tier are aggregated again.
+    """
+    mn = GREEACClient._norm(mac)
+    with _rollup_lock:
+        tiers = _rollups.get(mn)
+        if tiers is not None:
+            return tiers
+        tdir = _device_dir(mn) / "telemetry"
+        offset = datetime.now(_local_tz()).utcoffset() or timedelta()
+        tiers = {
+            name: Rollup(
+                tdir / f"rollup-{name}",
+                size,
+                _ROLLUP_AGGREGATES,
+                offset.total_seconds(),
+            )
+            for name, size in _ROLLUP_TIERS.items()
+        }
+        resume = {name: tier.resume_from() for name, tier in tiers.items()}
+        starts = [t for t in resume.values() if t is not None]
+        since = None if None in resume.values() else min(starts)
+        cols = _store_for(mn).range(since, None, ["room", "target", "power"])
+        for ts, room, target, power in zip(
+            cols["time"].tolist(),
+            cols["room"].tolist(),
+            cols["target"].tolist(),
+            cols["power"].tolist(),
+            strict=True,
+        ):
+            values = _rollup_values(mn, room, target, power)
+            for name, tier in tiers.items():
+                if resume[name] is None or ts >= resume[name]:
+                    tier.add(ts, values)
+        _rollups[mn] = tiers
+    return tiers
+
+
 def _save_reading(reading: dict) -> None:
-    """Append a telemetry reading to today's per-device JSONL file."""
-    mac = reading.get("mac", "unknown")
-    tdir = _device_dir(mac) / "telemetry"
-    path = tdir / f"{datetime.now(_local_tz()).strftime('%Y-%m-%d')}.jsonl"
-    with _telemetry_lock, path.open("a", encoding="utf-8") as f:
-        f.write(dumps(reading, default=str) + "\n")
-    with suppress(PermissionError):
-        path.chmod(0o666)
+    """Append a telemetry reading to the device's readings store and rollups."""
+    mac = GREEACClient._norm(reading.get("mac", "unknown"))
+    tiers = _rollups_for(mac)
+    ts, row = time(), _reading_row(reading)
+    _store_for(mac).append(ts, **row)
+    values = _rollup_values(mac, row["room"], row["target"], row["power"])
+    for tier in tiers.values():
+        tier.add(ts, values)
+
+
+def _rollup_tier(span: float) -> str | None:
+    """Coarsest resolution needed to chart span seconds: None for raw readings.
+
+    Raw readings are kept up to 2 days, then the finest tier that fits in
+    _GRAPH_MAX_POINTS buckets is used.
+    """
+    if span <= 2 * 86400:
+        return None
+    for name, size in _ROLLUP_TIERS.items():
+        if span / size <= _GRAPH_MAX_POINTS:
+            return name
+    return next(reversed(_ROLLUP_TIERS))
+
+
+def _query_rollup(
+    mac: str, tier: str, start: datetime | None = None, end: datetime | None = None
+) -> list[dict]:
+    """Rollup buckets of a device as readings (bucket averages), oldest first.
+
+    Each also carries roomMin/roomMax, onSeconds, switches and samples;
+    power is on when the unit was on for at least half the bucket.
+    """
+    rows = _rollups_for(mac)[tier].rows(
+        start.timestamp() if start else None, end.timestamp() if end else None
+    )
+    tz = _local_tz()
+    readings = []
+    for ts, lo, hi, room, target, on_s, switches, samples in zip(
+        rows["time"],
+        rows["room_min"],
+        rows["room_max"],
+        rows["room_avg"],
+        rows["target_avg"],
+        rows["on_s"],
+        rows["switches"],
+        rows["samples"],
+        strict=True,
+    ):
+        readings.append(
+            {
+                "deviceTime": datetime.fromtimestamp(ts, tz).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                ),
+                "power": None
+                if isnan(on_s)
+                else on_s * 2 >= samples * COLLECT_INTERVAL,
+                "targetTemperature": None if isnan(target) else round(target, 1),
+                "currentTemperature": None if isnan(room) else round(room, 1),
+                "roomMin": None if isnan(lo) else round(lo, 1),
+                "roomMax": None if isnan(hi) else round(hi, 1),
+                "onSeconds": None if isnan(on_s) else on_s,
+                "switches": None if isnan(switches) else int(switches),
+                "samples": samples,
+            }
+        )
+    return readings
+
+
+async def _fetch_timed(mac: str) -> tuple[dict | None, float]:
+    """Fetch one device's reading, returning it with its latency in seconds."""
+    started = monotonic()
+    reading = await _telemetry_fetch(mac)
+    return reading, monotonic() - started
+
+
+async def _collect_cycle(deadline: float) -> dict[str, tuple[Any, float | None]]:
+    """Fetch every device concurrently, giving up on those not done by deadline.
+
+    Returns {mac: (reading, error or exception, latency)}; a device that
+    missed the deadline gets a TimeoutError and no latency.
+    """
+    await _client._ensure()
+    macs = list(_client._state["devices"].keys())
+    tasks = {mac: get_running_loop().create_task(_fetch_timed(mac)) for mac in macs}
+    if tasks:
+        await wait(tasks.values(), timeout=max(deadline - monotonic(), 0))
+    results: dict[str, tuple[Any, float | None]] = {}
+    for mac, task in tasks.items():
+        if not task.done():
+            task.cancel()
+            results[mac] = (TimeoutError("missed the collection deadline"), None)
+        elif task.exception() is not None:
+            results[mac] = (task.exception(), None)
+        else:
+            results[mac] = task.result()
+    return results
+
+
+def _record_collect(mac: str, outcome: Any, latency: float | None) -> None:
+    """Update the collection counters of a device."""
+    stats = _collect_stats.setdefault(
+        mac,
+        {
+            "readings": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "last_latency_ms": None,
+            "avg_latency_ms": None,
+            "last_error": None,
+            "last_reading_at": None,
+        },
+    )
+    now = datetime.now(_local_tz()).isoformat(timespec="seconds")
+    if isinstance(outcome, TimeoutError):
+        stats["timeouts"] += 1
+        stats["last_error"] = f"{now}: {outcome}"
+    elif isinstance(outcome, BaseException) or not outcome or "error" in outcome:
+        stats["errors"] += 1
+        error = outcome.get("error") if isinstance(outcome, dict) else outcome
+        stats["last_error"] = f"{now}: {error}"
+    else:
+        stats["readings"] += 1
+        stats["last_reading_at"] = now
+    if latency is not None:
+        ms = round(latency * 1000, 1)
+        avg = stats["avg_latency_ms"]
+        # Exponential moving average over roughly the last 10 cycles
+        stats["avg_latency_ms"] = ms if avg is None else round(avg + (ms - avg) / 10, 1)
+        stats["last_latency_ms"] = ms
+
+
+def _log_collect_error(error: object) -> None:
+    """Append a collection error to the shared errors log."""
+    err_path = _DATA_DIR / "errors.jsonl"
+    with _telemetry_lock, err_path.open("a", encoding="utf-8") as f:
+        f.write(
+            dumps(
+                {
+                    "_error": str(error),
+                    "deviceTime": datetime.now(_local_tz()).strftime(
+                        "%Y-%m-%d %H:%M:%S"
+                    ),
+                },
+                default=str,
+            )
+            + "\n"
+        )
 
 
 def _collect() -> None:
-    """Background loop: fetch status every 1 min until stopped."""
+    """Background loop: fetch every device at each wall-clock minute until stopped.
+
+    Devices are queried concurrently and a cycle is cut off after
+    COLLECT_DEADLINE, so an offline unit neither delays the others nor
+    shifts the schedule. Ticks are computed from the clock rather than by
+    sleeping a fixed time after each cycle, so the cadence does not drift;
+    ticks that pass while a cycle still runs are counted as missed.
+    """
     while not _stop_event.is_set():
+        tick = time()
+        started = monotonic()
         try:
-            with _client._lock:
-                _client._ensure()
-                macs = list(_client._state["devices"].keys())
-            for mac in macs:
-                r = _telemetry_fetch(mac)
-                if r and "error" not in r:
-                    _save_reading(r)
+            results = _client._io.run(_collect_cycle(started + COLLECT_DEADLINE))
+            for mac, (outcome, latency) in results.items():
+                _record_collect(mac, outcome, latency)
+                if isinstance(outcome, dict) and "error" not in outcome:
+                    _save_reading(outcome)
+                elif isinstance(outcome, BaseException):
+                    _log_collect_error(f"{mac}: {outcome}")
             _client._persist(None, None)
         except Exception as e:
-            err_path = _DATA_DIR / "errors.jsonl"
-            with _telemetry_lock, err_path.open("a", encoding="utf-8") as f:
-                f.write(
-                    dumps(
-                        {
-                            "_error": str(e),
-                            "deviceTime": datetime.now(_local_tz()).strftime(
-                                "%Y-%m-%d %H:%M:%S"
-                            ),
-                        },
-                        default=str,
-                    )
-                    + "\n"
-                )
-        _stop_event.wait(60)
+            _log_collect_error(e)
+        _cycle_stats["cycles"] += 1
+        _cycle_stats["last_cycle_s"] = round(monotonic() - started, 2)
+        _cycle_stats["last_cycle_at"] = datetime.fromtimestamp(
+            tick, _local_tz()
+        ).isoformat(timespec="seconds")
+        now = time()
+        next_tick = (now // COLLECT_INTERVAL + 1) * COLLECT_INTERVAL
+        _cycle_stats["missed_ticks"] += max(
+            int(now // COLLECT_INTERVAL - tick // COLLECT_INTERVAL) - 1, 0
+        )
+        _stop_event.wait(next_tick - now)
+
+
+def _query_columns(
+    mac: str, start: datetime | None = None, end: datetime | None = None
+) -> dict[str, np.ndarray]:
+    """Copy a date range of a device's readings store as NumPy columns."""
+    cols = _store_for(mac).range(
+        start.timestamp() if start else None, end.timestamp() if end else None
+    )
+    return {name: np.array(view) for name, view in cols.items()}
+
+
+def _readings_from(
+    mac: str, cols: dict[str, np.ndarray], rows: np.ndarray | None = None
+) -> list[dict]:
+    """Build reading dicts from columns, for all rows or the given row indices."""
+    if rows is not None:
+        cols = {name: col[rows] for name, col in cols.items()}
+    tz = _local_tz()
+    return [
+        {
+            "deviceTime": datetime.fromtimestamp(ts, tz).strftime("%Y-%m-%d %H:%M:%S"),
+            "mac": mac,
+            "power": None if power < 0 else bool(power),
+            "mode": _MODE_REV.get(mode),
+            "fanSpeed": _FAN_REV.get(fan),
+            "targetTemperature": None if isnan(target) else round(target, 2),
+            "currentTemperature": None if isnan(room) else round(room, 2),
+        }
+        for ts, room, target, power, mode, fan in zip(
+            cols["time"].tolist(),
+            cols["room"].tolist(),
+            cols["target"].tolist(),
+            cols["power"].tolist(),
+            cols["mode"].tolist(),
+            cols["fan"].tolist(),
+            strict=True,
+        )
+    ]
 
 
 def _query_readings(
@@ -1554,44 +2328,94 @@ def _query_readings(
 ) -> list[dict]:
     """Query telemetry readings by date range. Returns sorted list oldest-first (chronological).
 
-    With ``limit=None`` (the default) all matching readings are returned — the
-    caller is expected to prune via ``_dedup_unchanged`` / ``_downsample``.
+    With ``limit=None`` (the default) all matching readings are returned,
+    otherwise the latest ``limit`` ones. For long ranges, prefer working on
+    :func:`_query_columns`.
     """
+    macs = [mac] if mac else [p.parent.name for p in _DATA_DIR.glob("*/telemetry")]
     results = []
+    for mn in macs:
+        results += _readings_from(mn, _query_columns(mn, start, end))
+    if not mac:
+        results.sort(key=lambda r: r["deviceTime"])
+    return results[-limit:] if limit else results
+
+
+def _query_events(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    mac: str | None = None,
+) -> list[dict]:
+    """Query user action events by date range, oldest first."""
     start_s = start.strftime("%Y-%m-%d %H:%M:%S") if start else ""
     end_s = end.strftime("%Y-%m-%d %H:%M:%S") if end else ""
     if mac:
-        files = sorted(
-            (_device_dir(mac) / "telemetry").glob("*.jsonl"),
-            key=lambda p: p.name,
-            reverse=True,
-        )
+        paths = [_device_dir(mac) / "telemetry" / "events.jsonl"]
     else:
-        files = sorted(
-            _DATA_DIR.glob("*/telemetry/*.jsonl"), key=lambda p: p.name, reverse=True
-        )
-    for fpath in files:
-        if limit is not None and len(results) >= limit:
-            break
-        with fpath.open(encoding="utf-8") as f:
-            for raw_line in f:
-                line = raw_line.strip()
-                if not line:
+        paths = list(_DATA_DIR.glob("*/telemetry/events.jsonl"))
+    events = []
+    for path in paths:
+        with suppress(FileNotFoundError), path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    ev = loads(line)
+                except JSONDecodeError:
                     continue
+                dt = ev.get("deviceTime", "")
+                if (not start_s or dt >= start_s) and (not end_s or dt <= end_s):
+                    events.append(ev)
+    events.sort(key=lambda e: e.get("deviceTime", ""))
+    return events
+
+
+def _migrate_jsonl(tdir: Path) -> None:
+    """Move a device's daily JSONL files into the readings store and events stream.
+
+    Readings already in the store (an interrupted migration) are skipped.
+    The JSONL files are kept in telemetry/jsonl afterwards.
+    """
+    files = sorted(tdir.glob("????-??-??.jsonl"))
+    if not files:
+        return
+    rows, events = [], []
+    for path in files:
+        with path.open(encoding="utf-8") as f:
+            for line in f:
                 try:
                     rec = loads(line)
                 except JSONDecodeError:
                     continue
-                dt = rec.get("deviceTime", "")
-                if start_s and dt < start_s:
-                    continue
-                if end_s and dt > end_s:
+                ts = _parse_time(rec.get("deviceTime"))
+                if ts is None:
                     continue
-                results.append(rec)
-                if limit is not None and len(results) >= limit:
-                    break
-    results.sort(key=lambda r: r.get("deviceTime", ""))
-    return results
+                if "action" in rec:
+                    events.append(rec)
+                else:
+                    rows.append((ts, _reading_row(rec)))
+    store = _store_for(tdir.parent.name)
+    last = store.last_time()
+    rows.sort(key=lambda row: row[0])
+    written = store.append_many(row for row in rows if last is None or row[0] > last)
+    events_path = tdir / "events.jsonl"
+    with suppress(FileNotFoundError):
+        events += [loads(line) for line in events_path.read_text().splitlines()]
+    # Drop the copies of an interrupted migration
+    events = list({dumps(e, sort_keys=True): e for e in events}.values())
+    events.sort(key=lambda e: e.get("deviceTime", ""))
+    part = events_path.with_suffix(".part")
+    part.write_text("".join(dumps(e, default=str) + "\n" for e in events))
+    part.replace(events_path)
+    archive = tdir / "jsonl"
+    archive.mkdir(exist_ok=True)
+    for path in files:
+        path.replace(archive / path.name)
+    logging.getLogger(__name__).info(
+        "Migrated %s telemetry: %d readings, %d events from %d files",
+        tdir.parent.name,
+        written,
+        len(events),
+        len(files),
+    )
 
 
 def _dedup_unchanged(readings: list[dict]) -> list[dict]:
@@ -1669,39 +2493,20 @@ _GRAPH_MAX_POINTS = 1000
 _SERIES_MAX_POINTS = 200
 _EVENTS_MAX_POINTS = 500
 
-_CLOCK_MARKER: MplPath | None = None
-
-
-def _clock_marker() -> MplPath:
-    """Build a clock-shaped marker (circle + two hands) as a matplotlib Path."""
-    global _CLOCK_MARKER
-    if _CLOCK_MARKER is not None:
-        return _CLOCK_MARKER
-    from math import cos, pi, sin
-
-    verts: list[tuple[float, float]] = []
-    codes: list[int] = []
-    # Circle outline (16 segments)
-    for i in range(17):
-        a = 2 * pi * i / 16
-        verts.append((0.5 * cos(a), 0.5 * sin(a)))
-        codes.append(int(MplPath.MOVETO) if i == 0 else int(MplPath.LINETO))
-    # Hour hand (to ~10 o'clock)
-    verts.extend([(0, 0), (-0.22, 0.13)])
-    codes.extend([int(MplPath.MOVETO), int(MplPath.LINETO)])
-    # Minute hand (to 12)
-    verts.extend([(0, 0), (0, 0.33)])
-    codes.extend([int(MplPath.MOVETO), int(MplPath.LINETO)])
-    _CLOCK_MARKER = MplPath(verts, codes)
-    return _CLOCK_MARKER
+# Rendering takes ~0.5s of CPU: it runs in a worker process, and the result of
+# a (device, range) is reused until a reading or an event is added
+_GRAPH_CACHE_SIZE = 32
+_graph_lock = Lock()
+_graph_cache: dict[tuple, dict[str, Any]] = {}
+_graph_stats: dict[str, Any] = {"hits": 0, "renders": 0, "last_render_ms": None}
 
 
 def _downsample(readings: list[dict], max_points: int) -> list[dict]:
     """
-    Uniformly thin readings to at most `max_points`, keeping the last sample.
+    Uniformly thin records (events) to at most `max_points`, keeping the last one.
 
-    Index-stride is exact for our regular 1/min cadence. Sparse data
-    (fewer than `max_points`) is returned untouched (step=1).
+    Sparse data (fewer than `max_points`) is returned untouched (step=1).
+    Charted readings use LTTB instead (see `_lttb_readings`), which keeps peaks.
     """
     if not readings or len(readings) <= max_points:
         return readings
@@ -1712,31 +2517,92 @@ def _downsample(readings: list[dict], max_points: int) -> list[dict]:
     return thinned
 
 
-def _summarize_readings(readings: list[dict]) -> dict[str, Any]:
-    room_temps = [
-        v
-        for r in readings
-        if (
-            v := (
-                r.get("currentTemperature")
-                if r.get("currentTemperature") is not None
-                else r.get("roomTemperature")
+def _chart_rows(cols: dict[str, np.ndarray], max_points: int) -> np.ndarray:
+    """Row indices to chart: ends of unchanged runs, then LTTB on room temperature."""
+    rows = np.flatnonzero(run_edges([cols[name] for name in _READING_COLUMNS]))
+    return rows[lttb(cols["time"][rows], cols["room"][rows], max_points)]
+
+
+def _summarize_columns(mac: str, cols: dict[str, np.ndarray]) -> dict[str, Any]:
+    """Summary of raw readings columns.
+
+    Averages and the power-on share are weighted by the time each reading
+    stands for, so missed readings do not skew them.
+    """
+    room, target, power = cols["room"], cols["target"], cols["power"]
+    weights = time_weights(cols["time"], COLLECT_INTERVAL)
+    rooms = room[~np.isnan(room)].astype(float)
+    targets = target[~np.isnan(target) & (target != 0)].astype(float)
+    room_avg = weighted_mean(room, weights)
+    on_share = duty_cycle(power, weights)
+    return {
+        "data_points": len(room),
+        "room_temperature": round(rooms[-1], 2) if len(rooms) else None,
+        "room_temp_min": round(rooms.min(), 2) if len(rooms) else None,
+        "room_temp_max": round(rooms.max(), 2) if len(rooms) else None,
+        "room_temp_avg": None if room_avg is None else round(room_avg, 1),
+        "target_temperature": round(targets[-1], 2) if len(targets) else None,
+        "power_on_pct": None if on_share is None else round(on_share * 100, 1),
+        "power_transitions": transitions(power),
+        "series": _series_of(
+            _readings_from(mac, cols, _chart_rows(cols, _SERIES_MAX_POINTS))
+        ),
+    }
+
+
+def _summarize_rollups(buckets: list[dict]) -> dict[str, Any]:
+    """Summary of rollup buckets, in the shape of :func:`_summarize_columns`."""
+    samples = sum(b["samples"] for b in buckets)
+    rooms = [b for b in buckets if b["currentTemperature"] is not None]
+    room_weight = sum(b["samples"] for b in rooms)
+    targets = [b["targetTemperature"] for b in buckets if b["targetTemperature"]]
+    powered = [b for b in buckets if b["onSeconds"] is not None]
+    powered_s = sum(b["samples"] for b in powered) * COLLECT_INTERVAL
+    return {
+        "data_points": samples,
+        "room_temperature": rooms[-1]["currentTemperature"] if rooms else None,
+        "room_temp_min": min(b["roomMin"] for b in rooms) if rooms else None,
+        "room_temp_max": max(b["roomMax"] for b in rooms) if rooms else None,
+        "room_temp_avg": (
+            round(
+                sum(b["currentTemperature"] * b["samples"] for b in rooms)
+                / room_weight,
+                1,
             )
-        )
-        is not None
-    ]
-    target_temps = [
-        r["targetTemperature"] for r in readings if r.get("targetTemperature")
-    ]
-    power_vals = [r.get("power") for r in readings]
-    power_on_count = sum(1 for p in power_vals if p in (True, "on", "true", "1", 1))
-    transitions = sum(
-        1 for i in range(1, len(power_vals)) if power_vals[i] != power_vals[i - 1]
+            if room_weight
+            else None
+        ),
+        "target_temperature": targets[-1] if targets else None,
+        "power_on_pct": (
+            round(sum(b["onSeconds"] for b in powered) / powered_s * 100, 1)
+            if powered_s
+            else None
+        ),
+        "power_transitions": sum(b["switches"] or 0 for b in buckets),
+        "series": _series_of(
+            _lttb_readings(_dedup_unchanged(buckets), _SERIES_MAX_POINTS)
+        ),
+    }
+
+
+def _lttb_readings(readings: list[dict], max_points: int) -> list[dict]:
+    """Thin readings to at most max_points with LTTB on room temperature."""
+    if len(readings) <= max_points:
+        return readings
+    x = np.array([_parse_time(r.get("deviceTime")) or 0.0 for r in readings])
+    y = np.array(
+        [
+            np.nan if r.get("currentTemperature") is None else r["currentTemperature"]
+            for r in readings
+        ]
     )
-    # Stats above use the raw uniform samples (time-correct averages/percentages);
-    # the charted series is deduped + downsampled so flat runs draw clean.
+    return [readings[i] for i in lttb(x, y, max_points)]
+
+
+def _series_of(readings: list[dict]) -> list[dict]:
+    """Charted series of a summary, from already thinned readings."""
     series = []
-    for r in _downsample(_dedup_unchanged(readings), _SERIES_MAX_POINTS):
+    for r in readings:
         rv = (
             r.get("currentTemperature")
             if r.get("currentTemperature") is not None
@@ -1750,21 +2616,69 @@ def _summarize_readings(readings: list[dict]) -> dict[str, Any]:
                 "power": r.get("power"),
             }
         )
-    return {
-        "data_points": len(readings),
-        "room_temperature": room_temps[-1] if room_temps else None,
-        "room_temp_min": min(room_temps) if room_temps else None,
-        "room_temp_max": max(room_temps) if room_temps else None,
-        "room_temp_avg": (
-            round(sum(room_temps) / len(room_temps), 1) if room_temps else None
-        ),
-        "target_temperature": target_temps[-1] if target_temps else None,
-        "power_on_pct": (
-            round(power_on_count / len(power_vals) * 100, 1) if power_vals else None
-        ),
-        "power_transitions": transitions,
-        "series": series,
-    }
+    return series
+
+
+# The renderer is a sibling script (skipped by the tool loader), run as the
+# render worker; it is also loaded here for its style version and as fallback
+_TEMPGRAPH = Path(__file__).with_name("_tempgraph.py")
+_spec = spec_from_file_location("gree_ac_tempgraph", _TEMPGRAPH)
+if _spec is None or _spec.loader is None:
+    raise ImportError(f"Cannot load the graph renderer {_TEMPGRAPH}")
+_tempgraph = module_from_spec(_spec)
+_spec.loader.exec_module(_tempgraph)
+
+
+class _RenderWorker:
+    """The graph renderer process, started on first use and kept warm.
+
+    It runs _tempgraph.py as a plain script, so it imports matplotlib and
+    nothing of the bot (a multiprocessing child would re-run the entry
+    point, which imports the whole stack). Arguments and replies are
+    pickled over its stdin/stdout; graphs render one at a time.
+    """
+
+    def __init__(self) -> None:
+        self._proc: Popen[bytes] | None = None
+        self._lock = Lock()
+
+    def render(self, *args: Any) -> str:
+        """Render a graph in the worker; ChildProcessError if it died."""
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._proc = Popen(  # noqa: S603
+                    [executable, str(_TEMPGRAPH)], stdin=PIPE, stdout=PIPE
+                )
+            proc = self._proc
+            try:
+                pickle.dump(args, proc.stdin)
+                proc.stdin.flush()
+                path, error = pickle.load(proc.stdout)  # noqa: S301  # Our worker
+            except OSError, EOFError, pickle.UnpicklingError:
+                self._stop()
+                raise ChildProcessError("Graph render worker died") from None
+        if error is not None:
+            raise error
+        return path
+
+    def _stop(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        with suppress(OSError):
+            proc.stdin.close()  # The worker exits at end of input
+        try:
+            proc.wait(5)
+        except TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stop()
+
+
+_renderer = _RenderWorker()
 
 
 def _generate_graph(
@@ -1774,239 +2688,26 @@ def _generate_graph(
     end: datetime | None = None,
     events: list[dict] | None = None,
     mac: str = "unknown",
+    key: tuple = (),
 ) -> str:
-    """Generate a temperature evolution PNG with power-state overlays. Returns file path."""
-    plt.rcParams.update(
-        {
-            "figure.facecolor": "#000000",
-            "figure.edgecolor": "#000000",
-            "axes.facecolor": "#000000",
-            "savefig.facecolor": "#000000",
-            "savefig.edgecolor": "#000000",
-            "text.color": "#eaeaea",
-            "axes.labelcolor": "#eaeaea",
-            "axes.titlecolor": "#eaeaea",
-            "xtick.color": "#666666",
-            "ytick.color": "#666666",
-            "grid.color": "#222222",
-        }
-    )
-
-    sampled = _downsample(_dedup_unchanged(readings), _GRAPH_MAX_POINTS)
-    ts, rt, at, ps = [], [], [], []
-    for r in sampled:
-        dt_s = r.get("deviceTime")
-        if not dt_s:
-            continue
-        try:
-            ts.append(
-                datetime.strptime(dt_s, "%Y-%m-%d %H:%M:%S").replace(tzinfo=_local_tz())
-            )
-        except ValueError, TypeError:
-            continue
-        rv = r.get("currentTemperature")
-        if rv is None:
-            rv = r.get("roomTemperature")
-        rt.append(float(rv) if rv is not None else None)
-        av = r.get("targetTemperature")
-        at.append(float(av) if av is not None else None)
-        pv = r.get("power")
-        ps.append(pv in (True, "on", "true", "1") if not isinstance(pv, bool) else pv)
-
-    diff_ts, diff_vals = [], []
-    for i in range(len(ts)):
-        if rt[i] is not None and at[i] is not None:
-            diff_ts.append(ts[i])
-            diff_vals.append(abs(rt[i] - at[i]))
-
-    if not ts:
-        raise ValueError("No valid readings to graph.")
-
-    fig, ax = plt.subplots(figsize=(14, 6))
-    fig.patch.set_facecolor("#000000")
-    ax.set_facecolor("#000000")
-
-    if ps:
-        _on_start: datetime | None = None
-        for i, p in enumerate(ps):
-            if p and _on_start is None:
-                _on_start = ts[i]
-            elif not p and _on_start is not None:
-                ax.axvspan(_on_start, ts[i], color="#1a237e", alpha=0.07, zorder=0)
-                _on_start = None
-        if _on_start is not None:
-            ax.axvspan(_on_start, ts[-1], color="#1a237e", alpha=0.07, zorder=0)
-
-    valid_rt = [(t, v) for t, v in zip(ts, rt, strict=False) if v is not None]
-    if valid_rt:
-        rt_ts, rt_vals = zip(*valid_rt, strict=False)
-        ax.plot(date2num(rt_ts), rt_vals, color="#00bcd4", linewidth=2, alpha=0.6)
-        window = max(3, min(10, len(rt_vals) // 20))
-        sma = [
-            sum(rt_vals[max(0, i - window + 1) : i + 1]) / min(i + 1, window)
-            for i in range(len(rt_vals))
-        ]
-        ax.plot(date2num(rt_ts), sma, color="#2196F3", linewidth=0.5, alpha=0.7)
-
-    valid_at = [
-        (t, v, p, r)
-        for t, v, p, r in zip(ts, at, ps, rt, strict=False)
-        if v is not None
-    ]
-    at_vals: tuple = ()
-    if valid_at:
-        at_ts, at_vals, at_ps, at_rt = zip(*valid_at, strict=False)
-        segs, cols = [], []
-        for i in range(len(at_ts) - 1):
-            x1, y1 = date2num(at_ts[i]), at_vals[i]
-            x2, y2 = date2num(at_ts[i + 1]), at_vals[i + 1]
-            segs.append([(x1, y1), (x2, y2)])
-            p, r, a = at_ps[i], at_rt[i], at_vals[i]
-            if not p:
-                cols.append("#ff1744")  # AC off
-            elif r is not None and a is not None and abs(r - a) < 1:
-                cols.append("#00e676")  # on target
-            else:
-                cols.append("#ff9100")  # actively changing
-        lc = LineCollection(segs, colors=cols, linewidth=2, alpha=0.9)
-        ax.add_collection(lc)
-
-    if events and ts:
-        ev_x, ev_y = [], []  # user actions
-        sched_x, sched_y = [], []  # auto-fired schedule events
-        ev_x, ev_y = [], []  # user actions
-        _valid_ts = [t for t, v in zip(ts, at, strict=False) if v is not None]
-        _valid_at = [v for v in at if v is not None]
-        for ev in events:
-            ev_ts = ev.get("deviceTime")
-            if not ev_ts:
-                continue
-            try:
-                ev_dt = datetime.strptime(ev_ts, "%Y-%m-%d %H:%M:%S").replace(
-                    tzinfo=_local_tz()
-                )
-            except ValueError, TypeError:
-                continue
-            # start/end are aware local (see _generate_temp_graph); ev_dt is
-            # made aware too, so direct comparison works without tz stripping.
-            if (start is None or start <= ev_dt) and (end is None or ev_dt <= end):
-                j = bisect_left(_valid_ts, ev_dt)
-                j = min(j, len(_valid_ts) - 1)
-                y = _valid_at[j] - 0.5
-                if ev.get("action") == "schedule_fired":
-                    sched_x.append(ev_dt)
-                    sched_y.append(y)
-                else:
-                    ev_x.append(ev_dt)
-                    ev_y.append(y)
-        if ev_x:
-            ax.scatter(
-                date2num(ev_x),
-                ev_y,
-                color="#ffffff",
-                s=12,
-                zorder=6,
-                marker="o",
-                edgecolors="#666666",
-                linewidths=0.3,
-            )
-        if sched_x:
-            ax.scatter(
-                date2num(sched_x),
-                sched_y,
-                color="#ce93d8",
-                s=30,
-                zorder=7,
-                marker=_clock_marker(),
-                edgecolors="#666666",
-                linewidths=0.3,
-            )
-
-    ax.set_xlabel("Time", fontsize=11)
-    ax.set_ylabel("Temperature (°C)", fontsize=11)
-    ax.set_title(title, fontsize=14, fontweight="bold", pad=15)
-    _handles = [
-        Line2D([0], [0], color="#00bcd4", linewidth=2, alpha=0.6, label="Room"),
-        Line2D([0], [0], color="#aaaaaa", linewidth=2, label="Target"),
-    ]
-    if diff_vals:
-        _handles.append(
-            Line2D([0], [0], color="yellow", linewidth=0.5, alpha=0.4, label="Diff"),
-        )
-    if valid_rt:
-        _handles.append(
-            Line2D([0], [0], color="#2196F3", linewidth=0.5, alpha=0.7, label="SMA"),
-        )
-    if ev_x:
-        _handles.append(
-            Line2D(
-                [0],
-                [0],
-                color="#ffffff",
-                marker="o",
-                markersize=4,
-                linestyle="None",
-                markeredgecolor="#666666",
-                markeredgewidth=0.3,
-                label="User Action",
-            )
-        )
-    if sched_x:
-        _handles.append(
-            Line2D(
-                [0],
-                [0],
-                color="#ce93d8",
-                marker=_clock_marker(),
-                markersize=6,
-                linestyle="None",
-                markeredgecolor="#666666",
-                markeredgewidth=0.3,
-                label="Scheduled",
-            )
-        )
-    ax.legend(handles=_handles, loc="upper left", fontsize=9, framealpha=0.8, ncol=2)
-    ax.grid(True, linestyle="--", alpha=0.3, color="#555555")
-
-    pad = (ts[-1] - ts[0]) * 0.02 if len(ts) > 1 else timedelta(hours=1)
-    ax.set_xlim(ts[0] - pad, ts[-1] + pad)
-
-    _y_vals = [v for v in rt if v is not None] + [v for v in at if v is not None]
-    if _y_vals:
-        y_min, y_max = min(_y_vals), max(_y_vals)
-        y_pad = max(0.5, (y_max - y_min) * 0.1)
-        ax.set_ylim(y_min - y_pad, y_max + y_pad)
-
-    if diff_vals:
-        ax2 = ax.twinx()
-        ax2.set_facecolor("#000000")
-        ax2.plot(date2num(diff_ts), diff_vals, color="yellow", linewidth=0.5, alpha=0.4)
-        ax2.set_ylabel("Temp Diff (°C)", fontsize=11, color="#999999")
-        ax2.set_ylim(-1, 20)
-        ax2.tick_params(axis="y", colors="#999999")
-        ax2.spines["right"].set_color("#999999")
-        ax2.yaxis.set_major_locator(plt.MaxNLocator(integer=True))
-
-    span = ts[-1] - ts[0]
-    if span <= timedelta(days=2):
-        ax.xaxis.set_major_formatter(DateFormatter("%H:%M"))
-    elif span <= timedelta(days=14):
-        ax.xaxis.set_major_formatter(DateFormatter("%b %d\n%H:%M"))
-    else:
-        ax.xaxis.set_major_formatter(DateFormatter("%b %d"))
-        ax.xaxis.set_major_locator(DayLocator())
-    fig.autofmt_xdate()
+    """Render a temperature evolution PNG in the render worker. Returns file path.
 
-    plt.tight_layout()
+    The file name ends with a hash of the graph's cache key, so ranges
+    rendered within the same second do not overwrite each other. Blocks the
+    calling (worker) thread until the graph is written; falls back to
+    rendering in-thread if the worker process died.
+    """
+    points = _lttb_readings(_dedup_unchanged(readings), _GRAPH_MAX_POINTS)
     gdir = _device_dir(mac) / "graphs"
-    out = str(
-        gdir / f"ac_graph_{datetime.now(_local_tz()).strftime('%Y%m%d_%H%M%S')}.png"
-    )
-    fig.savefig(out, dpi=150, bbox_inches="tight")
-    plt.close(fig)
-    with suppress(PermissionError):
-        Path(out).chmod(0o666)
-    return out
+    stamp = datetime.now(_local_tz()).strftime("%Y%m%d_%H%M%S")
+    tag = blake2b(repr(key).encode(), digest_size=4).hexdigest()
+    out = str(gdir / f"ac_graph_{stamp}_{tag}.png")
+    args = (points, out, title, start, end, events, _local_tz())
+    try:
+        return _renderer.render(*args)
+    except ChildProcessError:
+        logging.getLogger(__name__).warning("Graph render worker died, restarting it")
+        return _tempgraph.render_graph(*args)
 
 
 # ============================================================
@@ -2015,13 +2716,28 @@ def _generate_graph(
 
 _stop_event.clear()
 
-# Sync AC clock(s) to local server time on startup.
-with suppress(Exception):
-    _client._ensure()
+# One-time move of the JSONL telemetry of earlier versions
+for _tdir in _DATA_DIR.glob("*/telemetry"):
+    try:
+        _migrate_jsonl(_tdir)
+    except Exception:
+        logging.getLogger(__name__).exception("Telemetry migration of %s failed", _tdir)
+
+
+async def _sync_all_clocks() -> None:
+    """Bind every device and sync its clock to local server time."""
+    await _client._ensure()
     for mac, d in _client._state["devices"].items():
-        r = _client._bind_dev(d, refresh=True)
+        r = await _client._bind_dev(d, refresh=True)
         if not isinstance(r, str):
-            _client._sync_device_time(mac, r[1])
+            await _client._sync_device_time(mac, r[1])
+
+
+_client.start_discovery()
+
+# Sync AC clock(s) to local server time on startup.
+with suppress(Exception):
+    _client._io.run(_sync_all_clocks())
     _client._persist(None, None)
 
 _collector_thread = Thread(target=_collect, daemon=True)
@@ -2038,8 +2754,10 @@ register(_stop_collector)
 with suppress(ValueError, OSError):  # ponytail: only works in main thread
     signal(SIGTERM, lambda *_: _stop_collector())
 
-# Stop the software scheduler on exit
+# Stop the software scheduler and the UDP transport on exit
 register(_client._stop_scheduler)
+register(_client._io.close)
+register(_renderer.stop)
 
 # ============================================================
 # MCP TOOLS — only convenience tools are exposed to the agent.
@@ -2050,27 +2768,70 @@ _mac_desc = "Device MAC address (12 hex digits). Omit if only one device."
 _name_desc = "Device name. Omit if only one device."
 
 
-def _list_devices() -> dict[str, Any]:
-    """List all GREE AC units with live status."""
-    with _client._lock:
-        _client._ensure()
-        devices = []
-        for mac, d in _client._state["devices"].items():
-            r = _client._bind_dev(d, refresh=True)
-            if isinstance(r, str):
-                devices.append({"mac": mac, "name": d["name"], "error": r})
-            else:
-                devices.append(_client.decode(d, r[1], r[1].get("status", {})))
-        _client._persist(None, None)
+async def _list_devices() -> dict[str, Any]:
+    """List all GREE AC units with live status, querying them concurrently."""
+    await _client._ensure()
+    items = list(_client._state["devices"].items())
+    results = await gather(*(_client._bind_dev(d, refresh=True) for _, d in items))
+    devices = []
+    for (mac, d), r in zip(items, results, strict=True):
+        if isinstance(r, str):
+            devices.append({"mac": mac, "name": d["name"], "error": r})
+        else:
+            devices.append(_client.decode(d, r[1], r[1].get("status", {})))
+    await to_thread(_client._persist, None, None)
     return {"devices": devices}
 
 
+def _graph_key(
+    mac: str, window: str | tuple, start: datetime | None, end: datetime
+) -> tuple:
+    """Cache key of a graph: device, range, last reading in it, events, style.
+
+    window is the period for ranges ending now (e.g. '6h'), so the graph is
+    reused while no reading arrives, or the absolute range otherwise.
+    """
+    times = _store_for(mac).range(
+        start.timestamp() if start else None, end.timestamp(), ["room"]
+    )["time"]
+    try:
+        st = (_device_dir(mac) / "telemetry" / "events.jsonl").stat()
+        events_mark = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        events_mark = None
+    last = times[-1] if len(times) else None
+    return (mac, window, last, events_mark, _tempgraph.STYLE_VERSION)
+
+
+def _cached_graph(key: tuple) -> dict[str, Any] | None:
+    """Return the cached result of a graph key if its PNG still exists."""
+    with _graph_lock:
+        result = _graph_cache.pop(key, None)
+        if result is None or not Path(result["graph_path"]).is_file():
+            return None
+        _graph_cache[key] = result  # Most recently used last
+        _graph_stats["hits"] += 1
+    return {**result, "cached": True}
+
+
+def _cache_graph(key: tuple, result: dict[str, Any], render_s: float) -> None:
+    with _graph_lock:
+        _graph_cache[key] = result
+        while len(_graph_cache) > _GRAPH_CACHE_SIZE:
+            del _graph_cache[next(iter(_graph_cache))]
+        _graph_stats["renders"] += 1
+        _graph_stats["last_render_ms"] = round(render_s * 1000)
+
+
 def _generate_temp_graph(
     range: str | None = None,
     mac: str | None = None,
     name: str | None = None,
 ) -> dict[str, Any]:
-    """Generate a temperature evolution graph (PNG) + structured data summary."""
+    """Generate a temperature evolution graph (PNG) + structured data summary.
+
+    Blocking (file reads and rendering): run it in a worker thread.
+    """
     now = datetime.now(_local_tz())
     period = (range or "all").lower()
 
@@ -2118,30 +2879,50 @@ def _generate_temp_graph(
             }
 
     try:
-        dev, _ = _client._resolve_one(mac, name)
+        dev, _ = _client._io.run(_client._resolve_one(mac, name))
     except ValueError as e:
         return {"error": str(e)}
     dev_mac = _client._norm(dev["mac"])
 
-    readings = _query_readings(start, end, mac=dev_mac)
-    if not readings:
-        return {"error": f"No readings found for period: {period}"}
-    events_list = [r for r in readings if "action" in r]
-    readings = [r for r in readings if "action" not in r]
+    window = period if end is now else (start and start.timestamp(), end.timestamp())
+    key = _graph_key(dev_mac, window, start, end)
+    cached = _cached_graph(key)
+    if cached is not None:
+        return cached
+
+    first = _store_for(dev_mac).first_time()
+    if first is None:
+        return {"error": f"No telemetry readings found for period: {period}"}
+    span_start = max(start.timestamp(), first) if start else first
+    tier = _rollup_tier(end.timestamp() - span_start)
+    if tier is None:
+        # Raw readings: stats on all columns, only the charted rows become dicts
+        cols = _query_columns(dev_mac, start, end)
+        readings = _readings_from(dev_mac, cols, _chart_rows(cols, _GRAPH_MAX_POINTS))
+    else:
+        readings = _query_rollup(dev_mac, tier, start, end)
     if not readings:
         return {"error": f"No telemetry readings found for period: {period}"}
-    # Prune: collapse consecutive identical readings so long flat runs don't
-    # bloat memory or the returned series. Stats are computed on the pruned
-    # set — averages/percentages stay accurate because flat runs are
-    # represented by their first & last sample (correct time weighting is
-    # preserved by the endpoints).
-    readings = _dedup_unchanged(readings)
-    events_list = _dedup_events(events_list, _EVENTS_MAX_POINTS)
+    events_list = _dedup_events(
+        _query_events(start, end, mac=dev_mac), _EVENTS_MAX_POINTS
+    )
     try:
+        render_start = monotonic()
         path = _generate_graph(
-            readings, title=title, start=start, end=end, events=events_list, mac=dev_mac
+            readings,
+            title=title,
+            start=start,
+            end=end,
+            events=events_list,
+            mac=dev_mac,
+            key=key,
         )
-        summary = _summarize_readings(readings)
+        render_s = monotonic() - render_start
+        if tier is None:
+            summary = _summarize_columns(dev_mac, cols)
+        else:
+            summary = _summarize_rollups(readings)
+        summary["resolution"] = tier or "raw"
         summary["events"] = events_list
         summary["event_counts"] = {
             "user_actions": sum(
@@ -2151,33 +2932,35 @@ def _generate_temp_graph(
                 1 for e in events_list if e.get("action") == "schedule_fired"
             ),
         }
-        return {
+        result = {
             "graph_path": path,
             "title": title,
             "period": period,
             "summary": summary,
         }
+        _cache_graph(key, result, render_s)
+        return result
     except ValueError as e:
         return {"error": str(e)}
 
 
 @tool
-def list_home_ac() -> dict[str, Any]:
+async def list_home_ac() -> dict[str, Any]:
     """List all home AC units with live status. Use this first to discover available units."""
-    return _list_devices()
+    return await _client._io.submit(_list_devices())
 
 
 @tool
-def status_home_ac(
+async def status_home_ac(
     mac: Annotated[str | None, Field(description=_mac_desc, default=None)] = None,
     name: Annotated[str | None, Field(description=_name_desc, default=None)] = None,
 ) -> dict[str, Any]:
     """Get full live status of a home AC unit, including any scheduled timers. Omit mac/name if only one unit."""
-    return _client.status(mac, name)
+    return await _client._io.submit(_client.status(mac, name))
 
 
 @tool
-def set_home_ac(
+async def set_home_ac(
     power: Annotated[
         bool | None,
         Field(description="Power on/off. Omit to leave unchanged.", default=None),
@@ -2310,34 +3093,36 @@ def set_home_ac(
     name: Annotated[str | None, Field(description=_name_desc, default=None)] = None,
 ) -> dict[str, Any]:
     """Set one or more AC settings at once. Only provided parameters are applied. Can also create, update, or delete scheduled timers via the schedule and delete_schedule_id params."""
-    return _client.set_multiple(
-        power=power,
-        mode=mode,
-        temperature=temperature,
-        fan_speed=fan_speed,
-        oscillation=oscillation,
-        swing_vertical=swing_vertical,
-        swing_horizontal=swing_horizontal,
-        xfan=xfan,
-        light=light,
-        quiet=quiet,
-        turbo=turbo,
-        fresh_air=fresh_air,
-        health=health,
-        sleep=sleep,
-        sleep_mode=sleep_mode,
-        no_frost=no_frost,
-        energy_saving=energy_saving,
-        heat_cool_type=heat_cool_type,
-        schedule=schedule,
-        delete_schedule_id=delete_schedule_id,
-        mac=mac,
-        name=name,
+    return await _client._io.submit(
+        _client.set_multiple(
+            power=power,
+            mode=mode,
+            temperature=temperature,
+            fan_speed=fan_speed,
+            oscillation=oscillation,
+            swing_vertical=swing_vertical,
+            swing_horizontal=swing_horizontal,
+            xfan=xfan,
+            light=light,
+            quiet=quiet,
+            turbo=turbo,
+            fresh_air=fresh_air,
+            health=health,
+            sleep=sleep,
+            sleep_mode=sleep_mode,
+            no_frost=no_frost,
+            energy_saving=energy_saving,
+            heat_cool_type=heat_cool_type,
+            schedule=schedule,
+            delete_schedule_id=delete_schedule_id,
+            mac=mac,
+            name=name,
+        )
     )
 
 
 @tool
-def graph_home_ac(
+async def graph_home_ac(
     range: Annotated[
         str | None,
         Field(
@@ -2348,13 +3133,13 @@ def graph_home_ac(
     mac: Annotated[str | None, Field(description=_mac_desc, default=None)] = None,
     name: Annotated[str | None, Field(description=_name_desc, default=None)] = None,
 ) -> dict[str, Any]:
-    """Generate a temperature evolution graph (PNG) + structured data summary. Graph: blue line=room temp, green/red/orange line=AC target temp (green=room≈target, orange=heating/cooling, red=AC off). Summary includes current temps, power stats, and user action events. Returns {graph_path, title, period, summary}."""
-    return _generate_temp_graph(range=range, mac=mac, name=name)
+    """Generate a temperature evolution graph (PNG) + structured data summary. Graph: blue line=room temp, green/red/orange line=AC target temp (green=room≈target, orange=heating/cooling, red=AC off). Ranges over 2 days are drawn from 5-minute/hourly/daily averages, with the room temperature min-max range shaded (summary.resolution tells which). Summary includes current temps, power stats, and user action events. Returns {graph_path, title, period, summary}; cached=true when the same graph was already drawn and no reading or event arrived since."""
+    return await to_thread(_generate_temp_graph, range=range, mac=mac, name=name)
 
 
 @tool
 def restart_ac_data_collection() -> dict[str, Any]:
-    """Restart the background data collection thread (auto-started on MCP init, polls every 1min)."""
+    """Restart the background data collection thread (auto-started on MCP init, polls every wall-clock minute)."""
     global _collector_thread
     _stop_event.set()
     if _collector_thread:
@@ -2369,7 +3154,7 @@ def restart_ac_data_collection() -> dict[str, Any]:
 
 @tool
 def ac_data_collection_status() -> dict[str, Any]:
-    """Check if data collection and scheduler are running, and how much data exists."""
+    """Check if data collection and scheduler are running, how much data exists, per-device collection errors/latency, per-address UDP request stats, per-device reachability (discovery scans, address changes), and graph cache hits."""
     collector_running = _collector_thread is not None and _collector_thread.is_alive()
     scheduler_running = (
         _client._sched_thread is not None and _client._sched_thread.is_alive()
@@ -2379,15 +3164,24 @@ def ac_data_collection_status() -> dict[str, Any]:
         "collector_running": collector_running,
         "scheduler_running": scheduler_running,
         "data_dir": str(_DATA_DIR),
-        "total_files": len(list(_DATA_DIR.glob("*/telemetry/*.jsonl"))),
+        "total_readings": sum(
+            len(_store_for(p.parent.name)) for p in _DATA_DIR.glob("*/telemetry")
+        ),
         "active_schedules": total_schedules,
+        "next_schedule_fire": _client.next_schedule_fire(),
         "devices": {
             mn: len(scheds) for mn, scheds in _client._schedules.items() if scheds
         },
+        "collection": {**_cycle_stats, "interval_s": COLLECT_INTERVAL},
+        "collection_by_device": _collect_stats,
+        "transport": _client._io.stats(),
+        "persistence": _client._persist_stats,
+        "reachability": _client.reachability(),
+        "graph_cache": {**_graph_stats, "entries": len(_graph_cache)},
     }
 
 
 if __name__ == "__main__":
     print("=== status ===")
-    r = _client.status()
+    r = _client._io.run(_client.status())
     print(dumps(r, indent=2, default=str))
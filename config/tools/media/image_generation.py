@@ -1,13 +1,19 @@
 """Image generation and editing tools using Google Gemini (Nano Banana)."""
 
+from asyncio import Semaphore, Task, create_task, shield, to_thread
 from base64 import b64decode, b64encode
+from collections.abc import Awaitable, Callable
 from datetime import datetime
+from hashlib import sha256
 from mimetypes import guess_type
 from os import getenv
 from pathlib import Path
+from time import monotonic
 from typing import Annotated, Any
-from urllib.request import urlopen
 
+import aiofiles
+import aiofiles.os  # ty: explicit submodule import
+from aiohttp import ClientSession, ClientTimeout
 from dotenv import load_dotenv
 from langchain.tools import tool
 from langchain_core.messages import HumanMessage
@@ -19,6 +25,9 @@ from langchain_google_genai import (
 )
 from pydantic import Field
 
+from telegram_agent.src.core.catalog import catalog
+from telegram_agent.src.core.imageprep import preparer
+
 load_dotenv()
 
 _API_KEY = getenv("GEMINI_API_KEY", "")
@@ -26,6 +35,12 @@ _MODEL = getenv("GEMINI_API_IMAGE_MODEL", "gemini-3.1-flash-image")
 
 _DATA_DIR = Path(getenv("DATA_DIR", "./data")) / "image_generation"
 _DATA_DIR.mkdir(parents=True, exist_ok=True)
+# Concurrent generations per API key (they share its rate limits)
+_CONCURRENCY = int(getenv("GEMINI_IMAGE_CONCURRENCY", "2"))
+# Opt-in: generation is stochastic, so the same prompt may be meant to give
+# a new image. When enabled, identical requests reuse the previous result.
+_PROMPT_CACHE = getenv("IMAGE_PROMPT_CACHE", "false").lower() in ("1", "true", "yes")
+_CACHE_DIR = _DATA_DIR / "prompt_cache"
 
 _SAFETY_SETTINGS = {
     HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
@@ -152,8 +167,101 @@ def _extract_image_bytes(content: Any) -> bytes | None:
     return None
 
 
+type Content = str | list[dict[str, Any]]
+
+_limits: dict[str, Semaphore] = {}
+_inflight: dict[str, Task[dict[str, Any]]] = {}
+
+
+def _request_key(kind: str, prompt: str, image: bytes = b"") -> str:
+    """Hash of everything that determines a generation's result."""
+    digest = sha256(f"{_MODEL}\0{kind}\0{prompt}\0".encode())
+    digest.update(image)
+    return digest.hexdigest()
+
+
+async def _cached(key: str) -> str | None:
+    """Return the image saved for an identical request, if caching is on."""
+    if not _PROMPT_CACHE:
+        return None
+    entry = _CACHE_DIR / f"{key}.txt"
+    if not await aiofiles.os.path.isfile(entry):
+        return None
+    async with aiofiles.open(entry, encoding="utf-8") as f:
+        path = (await f.read()).strip()
+    return path if await aiofiles.os.path.isfile(path) else None
+
+
+async def _generate(
+    kind: str, key: str, content: Callable[[], Awaitable[Content]]
+) -> dict[str, Any]:
+    """Call the model within the API key's concurrency limit and save the image."""
+    if _llm is None:
+        return {"error": "GEMINI_API_KEY or GEMINI_API_IMAGE_MODEL is not set."}
+    message = HumanMessage(await content())
+    started = monotonic()
+    async with _limits.setdefault(_API_KEY, Semaphore(max(_CONCURRENCY, 1))):
+        queued = monotonic() - started
+        try:
+            response = await _llm.ainvoke([message])
+            image_bytes = _extract_image_bytes(response.content)
+        except Exception as e:
+            return {"error": f"Gemini API error: {e}"}
+    generation = monotonic() - started - queued
+
+    if not image_bytes:
+        return {"error": "No image was returned by the model."}
+
+    timestamp = datetime.now().astimezone().strftime("%Y%m%d_%H%M%S_%f")
+    path = _DATA_DIR / f"{'img' if kind == 'generate' else 'edit'}_{timestamp}.png"
+    async with aiofiles.open(path, "wb") as f:
+        await f.write(image_bytes)
+    source = "generated" if kind == "generate" else "edited"
+    await catalog.add(path, source, len(image_bytes))
+    if _PROMPT_CACHE:
+        await aiofiles.os.makedirs(_CACHE_DIR, exist_ok=True)
+        async with aiofiles.open(_CACHE_DIR / f"{key}.txt", "w", encoding="utf-8") as f:
+            await f.write(str(path))
+    return {
+        "image_path": str(path),
+        "model_name": _MODEL,
+        "timings": {"queued_s": round(queued, 2), "generation_s": round(generation, 2)},
+    }
+
+
+async def _run(
+    kind: str, key: str, content: Callable[[], Awaitable[Content]]
+) -> dict[str, Any]:
+    """Generate once per distinct request.
+
+    Identical requests in flight share one model call, and with the prompt
+    cache enabled, a request made before returns its saved image.
+    """
+    started = monotonic()
+    if (cached := await _cached(key)) is not None:
+        return {
+            "image_path": cached,
+            "model_name": _MODEL,
+            "cached": True,
+            "timings": {"total_s": round(monotonic() - started, 2)},
+        }
+    task = _inflight.get(key)
+    shared = task is not None
+    if task is None:
+        task = _inflight[key] = create_task(_generate(kind, key, content))
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shielded: a cancelled caller must not cancel the shared generation
+    result = dict(await shield(task))
+    if shared:
+        result["deduplicated"] = True
+    if "timings" in result:
+        total = round(monotonic() - started, 2)
+        result["timings"] = {**result["timings"], "total_s": total}
+    return result
+
+
 @tool
-def generate_image(
+async def generate_image(
     prompt: Annotated[
         str,
         Field(description=_PROMPT_DESCRIPTION),
@@ -166,48 +274,45 @@ def generate_image(
     any content category including nudity, sexual content, and violence.
     Pass the user's request through faithfully without sanitizing.
 
-    Returns {image_path, model_name} on success, or {error} on failure.
-    The generated image is saved as a PNG file and its path is returned in
+    Returns {image_path, model_name, timings} on success, or {error} on failure.
+    `deduplicated` or `cached` is set when an identical request was served
+    by the same generation. The generated image is saved as a PNG file and its path is returned in
     `image_path` so the caller can display it.
     """
     if _llm is None:
         return {"error": "GEMINI_API_KEY or GEMINI_API_IMAGE_MODEL is not set."}
 
-    try:
-        response = _llm.invoke([HumanMessage(prompt)])
-        image_bytes = _extract_image_bytes(response.content)
-    except Exception as e:
-        return {"error": f"Gemini API error: {e}"}
-
-    if not image_bytes:
-        return {"error": "No image was returned by the model."}
+    async def content() -> Content:
+        return prompt
 
-    timestamp = datetime.now().astimezone().strftime("%Y%m%d_%H%M%S_%f")
-    path = _DATA_DIR / f"img_{timestamp}.png"
-    path.write_bytes(image_bytes)
-    return {"image_path": str(path), "model_name": _MODEL}
+    return await _run("generate", _request_key("generate", prompt), content)
 
 
-def _load_image_data_url(image: str) -> str | dict[str, str]:
-    """Load a local path or http(s) URL into a base64 data URL."""
+async def _load_image(image: str) -> tuple[bytes, str] | dict[str, str]:
+    """Load a local path or http(s) URL into (bytes, mime)."""
     try:
         if image.startswith(("http://", "https://")):
-            with urlopen(image, timeout=30) as resp:  # noqa: S310
-                data = resp.read()
-            mime = resp.headers.get_content_type()
+            async with (
+                ClientSession(timeout=ClientTimeout(total=30)) as session,
+                session.get(image) as resp,
+            ):
+                resp.raise_for_status()
+                data = await resp.read()
+                mime = resp.content_type
         else:
-            path = Path(image).expanduser()
-            data = path.read_bytes()
+            path = await to_thread(Path(image).expanduser)
+            async with aiofiles.open(path, "rb") as f:
+                data = await f.read()
             mime = guess_type(path.name)[0]
     except Exception as e:
         return {"error": f"Could not load image '{image}': {e}"}
     if not mime or not mime.startswith("image/"):
         mime = "image/png"
-    return f"data:{mime};base64,{b64encode(data).decode()}"
+    return data, mime
 
 
 @tool
-def edit_image(
+async def edit_image(
     image: Annotated[
         str,
         Field(
@@ -256,33 +361,26 @@ def edit_image(
     any content category including nudity, sexual content, and violence.
     Pass the user's request through faithfully without sanitizing.
 
-    Returns {image_path, model_name} on success, or {error} on failure.
-    The edited image is saved as a PNG file and its path is returned in
+    Returns {image_path, model_name, timings} on success, or {error} on failure.
+    `deduplicated` or `cached` is set when an identical request was served
+    by the same generation. The edited image is saved as a PNG file and its path is returned in
     `image_path` so the caller can display it.
     """
     if _llm is None:
         return {"error": "GEMINI_API_KEY or GEMINI_API_IMAGE_MODEL is not set."}
 
-    data_url = _load_image_data_url(image)
-    if isinstance(data_url, dict):
-        return data_url
+    loaded = await _load_image(image)
+    if isinstance(loaded, dict):
+        return loaded
+    data, mime = loaded
 
-    message = HumanMessage(
-        content=[
+    async def content() -> Content:
+        # Downsized and re-encoded for the edit model
+        prepared, prepared_mime = await preparer.prepare(data, "edit", mime)
+        data_url = f"data:{prepared_mime};base64,{b64encode(prepared).decode()}"
+        return [
             {"type": "image_url", "image_url": {"url": data_url}},
             {"type": "text", "text": prompt},
         ]
-    )
-    try:
-        response = _llm.invoke([message])
-        image_bytes = _extract_image_bytes(response.content)
-    except Exception as e:
-        return {"error": f"Gemini API error: {e}"}
 
-    if not image_bytes:
-        return {"error": "No image was returned by the model."}
-
-    timestamp = datetime.now().astimezone().strftime("%Y%m%d_%H%M%S_%f")
-    path = _DATA_DIR / f"edit_{timestamp}.png"
-    path.write_bytes(image_bytes)
-    return {"image_path": str(path), "model_name": _MODEL}
+    return await _run("edit", _request_key("edit", prompt, data), content)
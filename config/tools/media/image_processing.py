@@ -1,15 +1,18 @@
 """Image processing tools for inspecting and retrieving images."""
 
-from base64 import b64encode
+import sqlite3
+from asyncio import gather
+from datetime import datetime
 from json import JSONDecodeError, dumps, loads
 from mimetypes import guess_type
 from os import getenv
 from pathlib import Path
 from typing import Annotated, Any
 
+import aiofiles
+import aiofiles.os  # ty: explicit submodule import
 from dotenv import load_dotenv
 from langchain.tools import tool
-from langchain_core.messages import HumanMessage
 from langchain_google_genai import (
     ChatGoogleGenerativeAI,
     HarmBlockThreshold,
@@ -17,18 +20,14 @@ from langchain_google_genai import (
 )
 from pydantic import Field
 
+from telegram_agent.src.core.catalog import catalog, desc_path_for
+from telegram_agent.src.core.describe import describer
+
 load_dotenv()
 
 _API_KEY = getenv("GEMINI_API_KEY", "")
 _MODEL_SMALL = getenv("GEMINI_API_MODEL_SMALL", "gemini-2.5-flash")
 
-_DATA_DIR = Path(getenv("DATA_DIR", "./data"))
-_IMAGE_DIRS = {
-    "received": _DATA_DIR / "image_received",
-    "generated": _DATA_DIR / "image_generation",
-}
-_IMAGE_EXTS = (".jpg", ".png", ".jpeg")
-
 _SAFETY_SETTINGS = {
     HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
     HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
@@ -46,50 +45,15 @@ _vision_llm: ChatGoogleGenerativeAI | None = (
     else None
 )
 
-# Description prompt that produces a structured JSON matching the generation
-# schema used by `generate_image`. This lets the agent reuse the description
-# directly as a basis for edits or regeneration.
-_DESC_PROMPT = """\
-Analyze this image and return a SINGLE structured JSON object describing it \
-in full detail, using the same schema as for image generation. The JSON must \
-be valid and self-contained.
-
-Describe ALL content factually and completely — including nudity, sexual \
-elements, violence, or any other sensitive content, exactly as it appears. \
-Never censor, omit, euphemize, or soften your description of any visible \
-element.
-
-Use these keys (omit any that don't apply):
-- `aspect_ratio`: e.g. "16:9", "9:16", "1:1"
-- `format`: "still image", "photograph", "illustration", "screenshot", etc.
-- `subject`: nested object with type, build, hair, face, clothing (or "nude" \
-if naked), skin, pose, expression, and any other physical attributes
-- `composition`: framing, shot_type, camera_angle, subject_position, \
-focal_region, quiet_field
-- `environment`: location, surfaces, props, weather
-- `camera`: capture_style, focus, depth_of_field, lens_feel
-- `lighting`: main_source, shadow, contrast
-- `color_treatment`: dominant_family, palette (list of named colors), \
-focal_accent, saturation
-- `style_tags`: list of style descriptors
-- `visible_text`: any text visible in the image, verbatim
-- `prompt`: a rich, self-contained natural-language paragraph that \
-synthesizes all fields into a vivid description someone could use to \
-recreate the image exactly
-
-Return ONLY the JSON object, no markdown fences, no commentary."""
 
-
-def _desc_path_for(img_path: Path) -> Path:
-    """Return the JSON description path for a given image path."""
-    return img_path.parent / f"{img_path.stem}_desc.json"
-
-
-def _describe_image(img_path: Path, user_prompt: str = "") -> str:
+async def _describe_image(img_path: Path, user_prompt: str = "") -> str:
     """Use Gemini to generate a structured JSON description of an image file.
 
     `user_prompt`, when non-empty, is appended to the base description
     prompt to steer the description toward what the caller asked for.
+    Requests go through the shared description service: concurrency is
+    bounded, identical images are only described once and concurrent
+    identical requests share one call.
 
     Returns the raw JSON string (valid or not) so the caller can decide how
     to handle parse failures. On infrastructure errors, returns an error
@@ -98,39 +62,13 @@ def _describe_image(img_path: Path, user_prompt: str = "") -> str:
     if _vision_llm is None:
         return "Error: image description unavailable (no GEMINI_API_KEY configured)."
     try:
-        data = img_path.read_bytes()
+        async with aiofiles.open(img_path, "rb") as f:
+            data = await f.read()
         mime = guess_type(img_path.name)[0] or "image/jpeg"
-        data_url = f"data:{mime};base64,{b64encode(data).decode()}"
-        text = (
-            f"{_DESC_PROMPT}\n\nAdditional user request: {user_prompt}"
-            if user_prompt
-            else _DESC_PROMPT
+        text = await describer.describe(
+            data, mime, instruction=user_prompt, model=_vision_llm
         )
-        message = HumanMessage(
-            content=[
-                {"type": "image_url", "image_url": {"url": data_url}},
-                {"type": "text", "text": text},
-            ]
-        )
-        response = _vision_llm.invoke([message])
-        content = response.content
-        if isinstance(content, list):
-            content = " ".join(
-                part["text"]
-                for part in content
-                if isinstance(part, dict) and "text" in part
-            )
-        if not isinstance(content, str) or not content.strip():
-            return "Error: empty description returned."
-        # Strip markdown fences if the model added them despite instructions
-        text = content.strip()
-        if text.startswith("```"):
-            text = text.split("\n", 1)[-1] if "\n" in text else text[3:]
-            if text.endswith("```"):
-                text = text[:-3].strip()
-            elif text.rfind("```") != -1:
-                text = text[: text.rfind("```")].strip()
-        return text
+        return text or "Error: empty description returned."
     except Exception as exc:  # surface per-image failure to the agent
         return f"Error describing image: {exc}"
 
@@ -145,73 +83,129 @@ def _parse_desc(raw: str) -> dict[str, Any] | None:
         return None
 
 
+def _timestamp_of(date: str) -> float | None:
+    """Parse an ISO date or datetime (local time) into a timestamp."""
+    if not date:
+        return None
+    parsed = datetime.fromisoformat(date)
+    return (parsed if parsed.tzinfo else parsed.astimezone()).timestamp()
+
+
 @tool
-def list_images(
+async def list_images(
     limit: Annotated[
         int,
         Field(
             description="Number of images per page (default 20). Set to 0 for all.",
         ),
     ] = 20,
-    page: Annotated[
-        int,
+    cursor: Annotated[
+        str,
         Field(
-            description="Page number (1-indexed). Default 1. "
-            "Used with limit for pagination — e.g. limit=10&page=2 returns "
-            "images 11-20.",
+            description="Pagination cursor: pass the `next_cursor` of the "
+            "previous page to get the next one. Empty for the first page.",
         ),
-    ] = 1,
+    ] = "",
+    source: Annotated[
+        str,
+        Field(
+            description="Only list images from this source: 'received' (sent by "
+            "users), 'generated' or 'edited'. Empty for all.",
+        ),
+    ] = "",
+    since: Annotated[
+        str,
+        Field(
+            description="Only images saved at or after this ISO date or datetime "
+            "(e.g. '2026-05-01' or '2026-05-01T18:00'). Empty for no bound.",
+        ),
+    ] = "",
+    until: Annotated[
+        str,
+        Field(
+            description="Only images saved before this ISO date or datetime. "
+            "Empty for no bound.",
+        ),
+    ] = "",
+    query: Annotated[
+        str,
+        Field(
+            description="Search words matched against the stored image "
+            "descriptions (e.g. 'red dress beach'); all words must match. Only "
+            "images described before are found. Empty to list all.",
+        ),
+    ] = "",
 ) -> dict[str, Any]:
     """
-    List all images on disk (received from users and generated), sorted newest first.
+    List images on disk (received from users, generated and edited), newest first.
 
-    Supports pagination via limit and page parameters.
+    Images can be filtered by source and date, and searched by content
+    through their descriptions without describing them again. Results are
+    paginated: pass `next_cursor` back as `cursor` to get the next page
+    (`next_cursor` is null on the last page).
 
-    Returns {images: [{path, source, description_path, has_description}], count, page, limit, total} on success,
-    or {error} if no image directories exist.
+    Returns {images: [{path, source, saved_at, description_path, has_description}], count, total, next_cursor} on success,
+    or {error} if no image matches.
     """
-    files: list[tuple[str, Path]] = []
-    for source, dir_path in _IMAGE_DIRS.items():
-        if dir_path.exists():
-            files.extend(
-                (source, f) for f in dir_path.iterdir() if f.suffix in _IMAGE_EXTS
-            )
-
-    if not files:
+    try:
+        filters = {
+            "source": source or None,
+            "since": _timestamp_of(since),
+            "until": _timestamp_of(until),
+            "query": query,
+        }
+    except ValueError as exc:
+        return {"error": f"Invalid date: {exc}"}
+    try:
+        rows, next_cursor = await catalog.page(limit, cursor or None, **filters)
+    except (ValueError, sqlite3.Error) as exc:
+        return {"error": f"Invalid query or cursor: {exc}"}
+    if not rows and not cursor:
         return {"error": "No images found."}
 
-    files.sort(key=lambda item: item[1].stat().st_mtime, reverse=True)
-    total = len(files)
-
-    if limit and limit > 0:
-        offset = (page - 1) * limit if page > 1 else 0
-        files = files[offset : offset + limit]
-    else:
-        page = 1
-        limit = total
-
-    images = []
-    for source, f in files:
-        desc_path = _desc_path_for(f)
-        images.append(
-            {
-                "path": str(f),
-                "source": source,
-                "description_path": str(desc_path) if desc_path.exists() else None,
-                "has_description": desc_path.exists(),
-            }
-        )
+    images = [
+        {
+            "path": row["path"],
+            "source": row["source"],
+            "saved_at": datetime.fromtimestamp(row["created"])
+            .astimezone()
+            .isoformat(timespec="seconds"),
+            "description_path": str(desc_path_for(Path(row["path"])))
+            if row["has_description"]
+            else None,
+            "has_description": row["has_description"],
+        }
+        for row in rows
+    ]
     return {
         "images": images,
         "count": len(images),
-        "page": page,
-        "limit": limit,
-        "total": total,
+        "total": await catalog.count(**filters),
+        "next_cursor": next_cursor,
     }
 
 
+async def _read_image(path_str: str, prompt: str) -> dict[str, Any]:
+    img = Path(path_str)
+    if not await aiofiles.os.path.isfile(img):
+        return {"image_path": path_str, "error": f"Image not found: {path_str}"}
+    desc_path = desc_path_for(img)
+    if not prompt and await aiofiles.os.path.isfile(desc_path):
+        async with aiofiles.open(desc_path, encoding="utf-8") as f:
+            return {"image_path": str(img), "description": await f.read()}
+    description = await _describe_image(img, prompt)
+    # Cache the description as a JSON sidecar for future reads
+    parsed = _parse_desc(description)
+    if parsed is not None:
+        text = dumps(parsed, indent=2, ensure_ascii=False)
+        async with aiofiles.open(desc_path, "w", encoding="utf-8") as f:
+            await f.write(text)
+        await catalog.describe(img, text)
+    return {"image_path": str(img), "description": description}
+
+
 @tool
-def read_images(
+async def read_images(
     image_paths: Annotated[
         list[str],
         Field(
@@ -250,28 +244,5 @@ def read_images(
     Returns {images: [{image_path, description}], count} on success.
     Individual errors are included per-image without failing the batch.
     """
-    results = []
-    for path_str in image_paths:
-        img = Path(path_str)
-        if not img.exists():
-            results.append(
-                {"image_path": path_str, "error": f"Image not found: {path_str}"}
-            )
-            continue
-
-        desc_path = _desc_path_for(img)
-        description = None
-        if desc_path.exists() and not prompt:
-            description = desc_path.read_text(encoding="utf-8")
-        else:
-            description = _describe_image(img, prompt)
-            # Cache the description as a JSON sidecar for future reads
-            parsed = _parse_desc(description)
-            if parsed is not None:
-                desc_path.write_text(
-                    dumps(parsed, indent=2, ensure_ascii=False), encoding="utf-8"
-                )
-
-        results.append({"image_path": str(img), "description": description})
-
+    results = await gather(*(_read_image(path_str, prompt) for path_str in image_paths))
     return {"images": results, "count": len(results)}
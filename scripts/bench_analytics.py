@@ -0,0 +1,189 @@
+"""Check and benchmark of the NumPy telemetry analytics against the dict path.
+
+Builds synthetic AC readings (one per minute, with flat runs, sensor gaps
+and unknown power states), then checks that the column functions of
+core/timeseries.py give the same results as the former per-reading code:
+run dedup keeps the same rows, and on evenly spaced readings the
+time-weighted averages, duty cycle and transitions match plain counts.
+It also shows how far index striding and LTTB miss the temperature peak,
+and times both paths.
+
+Usage: uv run python scripts/bench_analytics.py [days]
+"""
+
+from math import isclose
+from random import Random
+from sys import argv
+from time import perf_counter
+
+import numpy as np
+
+from telegram_agent.src.core.timeseries import (
+    duty_cycle,
+    lttb,
+    run_edges,
+    time_weights,
+    transitions,
+    weighted_mean,
+)
+
+INTERVAL = 60
+
+
+def make_readings(days: int, seed: int = 7) -> list[dict]:
+    """Readings with runs of unchanged values, as the collector records them."""
+    rng = Random(seed)
+    readings, room, power = [], 22.0, True
+    for i in range(days * 1440):
+        if rng.random() < 0.05:
+            room = round(room + rng.choice((-0.5, 0.5)), 1)
+        if rng.random() < 0.01:
+            power = not power
+        spike = rng.choice((-6.0, 6.0)) if rng.random() < 0.0005 else 0.0
+        readings.append(
+            {
+                "time": 1_767_225_600 + i * INTERVAL,
+                "power": None if rng.random() < 0.001 else power,
+                "mode": "cool",
+                "fanSpeed": "auto",
+                "targetTemperature": 24.0,
+                "currentTemperature": (None if rng.random() < 0.002 else room + spike),
+            }
+        )
+    return readings
+
+
+def to_columns(readings: list[dict]) -> dict[str, np.ndarray]:
+    """The same readings as store columns (NaN / -1 for missing values)."""
+    return {
+        "time": np.array([r["time"] for r in readings], dtype=float),
+        "room": np.array(
+            [r["currentTemperature"] for r in readings], dtype=float
+        ),  # None -> NaN
+        "target": np.array([r["targetTemperature"] for r in readings], dtype=float),
+        "power": np.array(
+            [-1 if r["power"] is None else int(r["power"]) for r in readings],
+            dtype=np.int8,
+        ),
+        "mode": np.full(len(readings), 1, dtype=np.int8),
+        "fan": np.zeros(len(readings), dtype=np.int8),
+    }
+
+
+# ---- Former per-reading implementations (reference) ----
+
+
+def dedup_unchanged(readings: list[dict]) -> list[dict]:
+    deduped: list[dict] = []
+    run_sig: tuple | None = None
+    run_last: dict | None = None
+    for r in readings:
+        sig = tuple(sorted((k, v) for k, v in r.items() if k != "time"))
+        if sig != run_sig:
+            if run_last is not None:
+                deduped.append(run_last)
+                run_last = None
+            deduped.append(r)
+            run_sig = sig
+        else:
+            run_last = r
+    if run_last is not None:
+        deduped.append(run_last)
+    return deduped
+
+
+def downsample(readings: list[dict], max_points: int) -> list[dict]:
+    if len(readings) <= max_points:
+        return readings
+    step = -(-len(readings) // max_points)
+    thinned = readings[::step]
+    if thinned[-1] is not readings[-1]:
+        thinned.append(readings[-1])
+    return thinned
+
+
+def summarize(readings: list[dict]) -> dict:
+    rooms = [
+        r["currentTemperature"] for r in readings if r["currentTemperature"] is not None
+    ]
+    powers = [r["power"] for r in readings]
+    known = [p for p in powers if p is not None]
+    return {
+        "room_avg": sum(rooms) / len(rooms),
+        "power_on": sum(1 for p in known if p) / len(known),
+        "transitions": sum(
+            1 for i in range(1, len(powers)) if powers[i] != powers[i - 1]
+        ),
+    }
+
+
+# ---- Column path ----
+
+
+def summarize_columns(cols: dict[str, np.ndarray]) -> dict:
+    weights = time_weights(cols["time"], INTERVAL)
+    return {
+        "room_avg": weighted_mean(cols["room"], weights),
+        "power_on": duty_cycle(cols["power"], weights),
+        "transitions": transitions(cols["power"]),
+    }
+
+
+def check(readings: list[dict], cols: dict[str, np.ndarray]) -> None:
+    names = ("room", "target", "power", "mode", "fan")
+    kept = np.flatnonzero(run_edges([cols[name] for name in names]))
+    expected = [r["time"] for r in dedup_unchanged(readings)]
+    old, new = summarize(readings), summarize_columns(cols)
+    mismatches = [
+        label
+        for label, same in (
+            ("dedup", cols["time"][kept].tolist() == expected),
+            ("transitions", old["transitions"] == new["transitions"]),
+            ("room_avg", isclose(old["room_avg"], new["room_avg"], rel_tol=1e-9)),
+            ("power_on", isclose(old["power_on"], new["power_on"], rel_tol=1e-9)),
+        )
+        if not same
+    ]
+    if mismatches:
+        raise SystemExit(f"column path differs: {', '.join(mismatches)}")
+    print(f"equivalent: {len(kept)} of {len(readings)} rows kept, {new}")
+
+
+def peaks(readings: list[dict], cols: dict[str, np.ndarray], points: int) -> None:
+    true_max = np.nanmax(cols["room"])
+    strided = downsample(dedup_unchanged(readings), points)
+    stride_max = max(
+        r["currentTemperature"] for r in strided if r["currentTemperature"] is not None
+    )
+    rows = np.flatnonzero(run_edges([cols["room"], cols["power"]]))
+    picked = rows[lttb(cols["time"][rows], cols["room"][rows], points)]
+    print(
+        f"max room over {points} points: true {true_max}, "
+        f"stride {stride_max}, lttb {np.nanmax(cols['room'][picked])}"
+    )
+
+
+def bench(label: str, run: object) -> None:
+    start = perf_counter()
+    run()  # type: ignore[operator]
+    print(f"{label:<24} {(perf_counter() - start) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    days = int(argv[1]) if len(argv) > 1 else 30
+    readings = make_readings(days)
+    cols = to_columns(readings)
+    check(readings, cols)
+    peaks(readings, cols, 200)
+    bench(
+        "dicts: dedup+summary", lambda: (dedup_unchanged(readings), summarize(readings))
+    )
+    bench(
+        "numpy: dedup+summary",
+        lambda: (
+            run_edges(
+                [cols[name] for name in ("room", "target", "power", "mode", "fan")]
+            ),
+            summarize_columns(cols),
+        ),
+    )
@@ -0,0 +1,75 @@
+"""Micro-benchmark for the Markdown to Telegram HTML compiler.
+
+Simulates a live progress message whose tool log grows by one line per
+update (the hot path of streamed agent runs) and a typical final answer.
+
+Usage: uv run python scripts/bench_markdown.py [updates]
+"""
+
+from sys import argv
+from time import perf_counter
+
+from telegram_agent.src.bot.markdown import _code_block, _paragraph, _pre_block
+from telegram_agent.src.bot.utils import compile_telegram, fixed_telegram
+
+ANSWER = """## Results
+
+Found **3** releases for *Dune* (2021) & its sequel:
+
+| Title | Size | Seeds |
+|-------|------|-------|
+| Dune.2021.1080p | 2.1 GB | 120 |
+| Dune.Part.Two.2024.2160p | 18 GB | 340 |
+
+1. Pick a release
+2. Confirm the download
+
+- [x] Search done
+- [ ] Download started
+
+> Tip: use `/downloads` to follow progress, see [the docs](https://example.org/?a=1&b=2).
+
+```python
+print("done")
+```
+"""
+
+
+def progress_renders(updates: int) -> list[str]:
+    """Build the successive renders of a progress message with a growing log."""
+    lines: list[str] = []
+    renders: list[str] = []
+    for i in range(updates):
+        lines.append(f"✅ Web Search: {i * 0.13:.2f}s -> query={{'q': 'dune <{i}>'}}")
+        log = "\n".join(lines).replace("<", "&lt;").replace(">", "&gt;")
+        renders.append(
+            f'<pre><code class="language-Agent">{log}\n</code></pre>\n'
+            f"🟢 Status: Working\n🔗 Live: [session](https://x.y/s?a=1&b=2)"
+        )
+    return renders
+
+
+def clear() -> None:
+    for cached in (compile_telegram, _paragraph, _code_block, _pre_block):
+        cached.cache_clear()
+
+
+def bench(label: str, renders: list[str], memoized: bool) -> None:
+    clear()
+    start = perf_counter()
+    for text in renders:
+        if not memoized:
+            clear()
+        fixed_telegram(None, text)
+        fixed_telegram(None, text, classic=False)
+    elapsed = perf_counter() - start
+    print(f"{label:<24} {elapsed * 1000:8.1f} ms  ({len(renders)} renders)")
+
+
+if __name__ == "__main__":
+    updates = int(argv[1]) if len(argv) > 1 else 300
+    renders = progress_renders(updates)
+    bench("progress, cold", renders, memoized=False)
+    bench("progress, memoized", renders, memoized=True)
+    bench("answer, cold", [ANSWER] * updates, memoized=False)
+    bench("answer, memoized", [ANSWER] * updates, memoized=True)
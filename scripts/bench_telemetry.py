@@ -0,0 +1,125 @@
+"""Benchmark of AC telemetry range queries: daily JSONL files vs columnar store.
+
+Writes the same synthetic readings (one per minute) both as the daily JSONL
+files the GREE tool used to keep and as a TimeSeries store, then times
+reading the last day and the whole history from each.
+
+Usage: uv run python scripts/bench_telemetry.py [days]
+"""
+
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from json import JSONDecodeError, dumps, loads
+from math import isnan
+from pathlib import Path
+from sys import argv
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from telegram_agent.src.core.timeseries import TimeSeries
+
+COLUMNS = {"room": "f", "target": "f", "power": "b", "mode": "b", "fan": "b"}
+
+
+def write_data(root: Path, days: int) -> TimeSeries:
+    """Write days of readings to root/*.jsonl and to a store in root/readings."""
+    store = TimeSeries(root / "readings", COLUMNS)
+    start = datetime(2026, 1, 1)
+    for day in range(days):
+        rows, lines = [], []
+        for minute in range(1440):
+            at = start + timedelta(days=day, minutes=minute)
+            on = (minute // 90) % 2 == 0
+            room = 20 + (minute % 120) / 20
+            reading = {
+                "deviceTime": at.strftime("%Y-%m-%d %H:%M:%S"),
+                "mac": "bench",
+                "power": on,
+                "mode": "heat",
+                "fanSpeed": "auto",
+                "targetTemperature": 22,
+                "currentTemperature": room,
+                "swingVertical": "default",
+                "schedules": [],
+            }
+            lines.append(dumps(reading))
+            rows.append(
+                (
+                    at.timestamp(),
+                    {"room": room, "target": 22, "power": on, "mode": 4, "fan": 0},
+                )
+            )
+        day_name = (start + timedelta(days=day)).strftime("%Y-%m-%d")
+        (root / f"{day_name}.jsonl").write_text("\n".join(lines) + "\n")
+        store.append_many(rows)
+    return store
+
+
+def query_jsonl(root: Path, start: datetime | None) -> list[dict]:
+    """The former query: parse every line of every file, filter, sort."""
+    start_s = start.strftime("%Y-%m-%d %H:%M:%S") if start else ""
+    results = []
+    for path in sorted(root.glob("*.jsonl"), reverse=True):
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = loads(line)
+                except JSONDecodeError:
+                    continue
+                if start_s and rec.get("deviceTime", "") < start_s:
+                    continue
+                results.append(rec)
+    results.sort(key=lambda r: r.get("deviceTime", ""))
+    return results
+
+
+def query_store(store: TimeSeries, start: datetime | None) -> list[dict]:
+    """Range query on the store, materialized as reading dicts."""
+    cols = store.range(start.timestamp() if start else None)
+    return [
+        {
+            "deviceTime": datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"),
+            "power": bool(power),
+            "targetTemperature": target,
+            "currentTemperature": None if isnan(room) else room,
+        }
+        for ts, room, target, power in zip(
+            cols["time"].tolist(),
+            cols["room"].tolist(),
+            cols["target"].tolist(),
+            cols["power"].tolist(),
+            strict=True,
+        )
+    ]
+
+
+def query_columns(store: TimeSeries, start: datetime | None) -> list[float]:
+    """Range query on the store, copying the columns only."""
+    cols = store.range(start.timestamp() if start else None)
+    values = {name: view.tolist() for name, view in cols.items()}
+    return values["time"]
+
+
+def bench(label: str, query: Callable[..., list], *args: object) -> None:
+    start = perf_counter()
+    rows = query(*args)
+    elapsed = perf_counter() - start
+    print(f"{label:<24} {elapsed * 1000:9.1f} ms  ({len(rows)} readings)")
+
+
+if __name__ == "__main__":
+    days = int(argv[1]) if len(argv) > 1 else 90
+    with TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        store = write_data(root, days)
+        jsonl_size = sum(p.stat().st_size for p in root.glob("*.jsonl"))
+        store_size = sum(p.stat().st_size for p in (root / "readings").iterdir())
+        print(
+            f"{days} days: JSONL {jsonl_size >> 10} KiB, store {store_size >> 10} KiB"
+        )
+        last_day = datetime(2026, 1, 1) + timedelta(days=days - 1)
+        bench("jsonl, last day", query_jsonl, root, last_day)
+        bench("store, last day", query_store, store, last_day)
+        bench("jsonl, all", query_jsonl, root, None)
+        bench("store, all", query_store, store, None)
+        bench("store, all (columns)", query_columns, store, None)
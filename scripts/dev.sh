@@ -17,6 +17,9 @@ uv run ruff check --fix
 echo "==> Type checking"
 uv run ty check
 
+echo "==> Running tests"
+uv run pytest -q
+
 # ---------------------------------------------------------------------------
 # Bash checks (scripts + config)
 # ---------------------------------------------------------------------------
@@ -150,6 +150,11 @@ def cli() -> None:
         action="store_true",
         help="Run as Telegram bot. Default: CLI",
     )
+    parser.add_argument(
+        "--webhook",
+        action="store_true",
+        help="Receive Telegram updates via webhook server instead of polling. Default: False",
+    )
     parser.add_argument(
         "--dev",
         action="store_true",
@@ -188,7 +193,7 @@ def cli() -> None:
     elif args.clear:
         run(GraphRAG.init(clear=True))
     elif args.telegram:
-        run(run_telegram_bot(dev=args.dev))
+        run(run_telegram_bot(dev=args.dev, webhook=args.webhook))
     else:
         run(run_agent(dev=args.dev))
 
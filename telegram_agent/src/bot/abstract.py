@@ -1,18 +1,18 @@
 """Abstract base classes for bot architecture."""
 
 from abc import ABC, abstractmethod
-from asyncio import Event, Lock, gather, sleep
+from asyncio import Event, gather, sleep
 from collections.abc import Awaitable, Callable
 from functools import partial, wraps
 from logging import INFO, WARNING, basicConfig, getLogger
 from logging import Logger as Logging
-from time import monotonic
 from typing import Any, Self
 
 from rich.logging import RichHandler
 
 from ..core import Agent
 from ..utils import Timer
+from .ratelimit import Priority, RateLimiter, set_api_priority
 
 # Cap for Telegram 429 flood-wait retries (seconds). Telegram can request very
 # large retry_after values; capping prevents the retry loop from blocking for
@@ -114,11 +114,10 @@ class Bot(ABC):
             self.waiting = waiting
         if retries:
             self.retries = retries
-        # Async rate limiter: enforces a minimum gap between consecutive
-        # Telegram API calls across all chats, but yields to the event loop
-        # while waiting so other handlers can run concurrently.
-        self._api_lock: Lock = Lock()
-        self._last_api_call: float = 0.0
+        # Async rate limiter: a global budget of one call per `delay`, with
+        # waits yielding to the event loop. Platforms with per-chat limits
+        # replace it with a finer-grained limiter.
+        self.limiter: RateLimiter = RateLimiter(global_rate=1 / self.delay)
 
     @abstractmethod
     async def initialize(self, **kwargs: Callable[..., Awaitable[Any]]) -> None:
@@ -128,31 +127,28 @@ class Bot(ABC):
     async def start(self) -> None:
         pass
 
-    async def _throttle(self) -> None:
-        """Wait if the last API call was too recent, then record the call.
-
-        Uses an async lock so only one task checks/updates the timestamp at a
-        time, but the wait is done with ``await sleep`` which yields to the
-        event loop — other handlers keep running during the gap.
-        """
-        async with self._api_lock:
-            now = monotonic()
-            gap = now - self._last_api_call
-            if gap < self.delay:
-                await sleep(self.delay - gap)
-            self._last_api_call = monotonic()
+    async def close(self) -> None:
+        """Release network resources on shutdown."""
+        return
 
     async def _exec(
         self,
         method: Callable[..., Awaitable[Any]],
         *args: Any,
         retries: int | None = None,
+        chat_id: int | None = None,
+        priority: Priority | None = None,
         **kwargs: Any,
     ) -> Any:
+        """Call an API method under the rate limiter, retrying on failures.
+
+        chat_id selects the per-chat bucket and priority the grant order
+        (defaults to the priority bound in the current task context).
+        """
         max_retries = self.retries if retries is None else retries
         retry = 0
         while True:
-            await self._throttle()
+            await self.limiter.acquire(chat_id, priority)
             try:
                 result: Any = await method(*args, **kwargs)
                 return result
@@ -163,22 +159,24 @@ class Bot(ABC):
                 if "message to edit not found" in exc_str:
                     raise
                 # Handle Telegram 429 flood-wait: respect retry_after
-                # instead of blind retrying at the default delay. Cap the
-                # wait so an absurd retry_after (e.g. 3600s) doesn't block
-                # the retry loop indefinitely.
+                # instead of blind retrying at the default delay. The wait
+                # is applied to the limiter bucket, so every call to the
+                # same chat slows down, not just this retry. Cap the wait
+                # so an absurd retry_after (e.g. 3600s) doesn't block the
+                # retry loop indefinitely.
                 retry_after = self._extract_retry_after(exc)
                 if retry_after and retry_after > 0:
                     retry += 1
+                    wait = min(retry_after, _FLOOD_WAIT_CAP)
+                    self.limiter.penalize(chat_id, wait)
                     if retry > max_retries:
                         raise
-                    wait = min(retry_after, _FLOOD_WAIT_CAP)
                     if wait < retry_after:
                         getLogger(__name__).warning(
                             "Telegram flood-wait retry_after=%.0fs capped to %.0fs",
                             retry_after,
                             wait,
                         )
-                    await sleep(wait)
                     continue
                 # Network errors (DNS failures, connection resets, etc.)
                 # need exponential backoff — retrying at the default 0.2s
@@ -267,6 +265,18 @@ class Bot(ABC):
     async def delete(self, *args: Any, **kwargs: Any) -> Any:
         pass
 
+    @abstractmethod
+    async def send_photos(self, *args: Any, **kwargs: Any) -> Any:
+        pass
+
+    @abstractmethod
+    async def send_voice(self, *args: Any, **kwargs: Any) -> Any:
+        pass
+
+    @abstractmethod
+    async def download(self, *args: Any, **kwargs: Any) -> Any:
+        pass
+
 
 class Manager(ABC):
     """Abstract base class for managers."""
@@ -323,6 +333,12 @@ class AgenticBot(ABC):
     ) -> dict[str, Callable[..., Awaitable[Any]]]:
         return {k: partial(v, self) for k, v in kwargs.items()}
 
+    @staticmethod
+    async def _start_manager(manager: Manager) -> None:
+        """Run a manager loop with its API calls queued behind chat traffic."""
+        set_api_priority(Priority.PANEL)
+        await manager.start()
+
     async def run(self, **kwargs: Callable[..., Awaitable[Any]]) -> None:
         try:
             self.agent = await Agent.init(self.dev, enable_graph=False)
@@ -330,12 +346,14 @@ class AgenticBot(ABC):
             self.log.info(f"{self.bot.__class__.__name__} is ready!")
             await gather(
                 self.bot.start(),
-                *(manager.start() for manager in self.managers.values()),
+                *(self._start_manager(manager) for manager in self.managers.values()),
             )
         except KeyboardInterrupt:
             self.log.info(f"{self.bot.__class__.__name__} killed by KeyboardInterrupt")
         except Exception:
             self.log.exception("Error running bot")
+        finally:
+            await self.bot.close()
 
 
 def handler(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
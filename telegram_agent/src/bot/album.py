@@ -0,0 +1,123 @@
+"""Event-driven aggregation of media groups (albums)."""
+
+from asyncio import Event, Task, create_task, gather, wait_for
+from collections.abc import Awaitable, Callable, Coroutine
+from contextlib import suppress
+from logging import getLogger
+from time import monotonic
+from typing import Any
+
+logger = getLogger(__name__)
+
+
+class _Album[T]:
+    """Members received so far for one media group."""
+
+    __slots__ = ("closer", "context", "full", "items", "last")
+
+    def __init__(self, context: Task[Any]) -> None:
+        self.context = context
+        self.items: list[tuple[int, Task[T]]] = []
+        self.last = monotonic()
+        self.full = Event()
+        self.closer: Task[None] | None = None
+
+
+class AlbumAggregator[T]:
+    """Collect the members of each album and hand them over once, complete.
+
+    Platforms deliver an album as separate messages sharing a group id. Each
+    member's fetch starts as soon as it arrives, so downloads run
+    concurrently. The album closes when no member arrived for a quiet
+    window, which adapts to the observed gap between members, or right away
+    when it is full. Members are then passed in their original order
+    (``order``, e.g. message ids), whatever order they arrived in. Failed
+    fetches are dropped, so a partial album is still delivered.
+
+    At most ``max_albums`` albums are kept open: beyond that, the oldest is
+    closed early, which bounds the memory held by pending members.
+    """
+
+    max_items: int = 10  # Telegram albums hold at most 10 media
+    smoothing: float = 0.3
+
+    def __init__(
+        self,
+        handle: Callable[[Any, list[T]], Awaitable[None]],
+        min_quiet: float = 0.3,
+        max_quiet: float = 1.5,
+        max_albums: int = 32,
+    ) -> None:
+        self._handle = handle
+        self.min_quiet = min_quiet
+        self.max_quiet = max_quiet
+        self.max_albums = max_albums
+        self._albums: dict[str, _Album[T]] = {}
+        self._gap = min_quiet / 2  # Moving average of gaps between members
+        self.counters = dict.fromkeys(("albums", "items", "failed", "flushed"), 0)
+
+    def quiet(self) -> float:
+        """Current quiet window closing an album (3x the typical gap)."""
+        return min(max(3 * self._gap, self.min_quiet), self.max_quiet)
+
+    def add(
+        self,
+        album_id: str,
+        order: int,
+        item: Coroutine[Any, Any, T],
+        start: Callable[[], Coroutine[Any, Any, Any]],
+    ) -> None:
+        """Register a member and start fetching it.
+
+        start is only called for the first member of an album (e.g. to send a
+        placeholder reply); its result is passed to the handler as context.
+        """
+        album = self._albums.get(album_id)
+        now = monotonic()
+        if album is None:
+            if len(self._albums) >= self.max_albums:
+                oldest = next(iter(self._albums))
+                self._albums.pop(oldest).full.set()
+                self.counters["flushed"] += 1
+            album = self._albums[album_id] = _Album(create_task(start()))
+            album.closer = create_task(self._close_when_quiet(album_id, album))
+        else:
+            self._gap += self.smoothing * (now - album.last - self._gap)
+        album.last = now
+        album.items.append((order, create_task(item)))
+        self.counters["items"] += 1
+        if len(album.items) >= self.max_items:
+            album.full.set()
+
+    async def _close_when_quiet(self, album_id: str, album: _Album[T]) -> None:
+        while not album.full.is_set():
+            wait = album.last + self.quiet() - monotonic()
+            if wait <= 0:
+                break
+            with suppress(TimeoutError):
+                await wait_for(album.full.wait(), wait)
+        if self._albums.get(album_id) is album:
+            del self._albums[album_id]
+        self.counters["albums"] += 1
+        album.items.sort(key=lambda member: member[0])
+        results = await gather(
+            *(task for _, task in album.items), return_exceptions=True
+        )
+        items: list[T] = []
+        for result in results:
+            if isinstance(result, BaseException):
+                self.counters["failed"] += 1
+                logger.warning("Album %s member failed: %s", album_id, result)
+            else:
+                items.append(result)
+        try:
+            await self._handle(await album.context, items)
+        except Exception:
+            logger.exception("Album %s handling failed", album_id)
+
+    async def drain(self) -> None:
+        """Close every open album now and wait until they are handled."""
+        closers = [album.closer for album in self._albums.values() if album.closer]
+        for album in self._albums.values():
+            album.full.set()
+        await gather(*closers, return_exceptions=True)
@@ -29,8 +29,12 @@ class AgenticTelegramBot(AgenticBot):
         self.bot = TelegramBot(telegram_id, **kwargs)
 
 
-async def run_telegram_bot(dev: bool = False) -> None:
-    """Run the Telegram bot with the configured managers and handlers."""
+async def run_telegram_bot(dev: bool = False, webhook: bool = False) -> None:
+    """Run the Telegram bot with the configured managers and handlers.
+
+    Updates come from long polling by default, or from the embedded webhook
+    server when webhook is set.
+    """
     telegram_id: str | None = getenv("TELEGRAM_BOT_ID")
     telegram_id_dev: str | None = getenv("TELEGRAM_BOT_ID_DEV")
     if dev:
@@ -52,5 +56,5 @@ async def run_telegram_bot(dev: bool = False) -> None:
         handlers["voice"] = telegram_voice
         handlers["image"] = telegram_image
 
-    with AgenticTelegramBot(telegram_id, dev, managers) as bot:
+    with AgenticTelegramBot(telegram_id, dev, managers, webhook=webhook) as bot:
         await bot.run(**handlers)
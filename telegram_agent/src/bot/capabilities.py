@@ -0,0 +1,173 @@
+"""Per-chat cache of which rich rendering paths succeed."""
+
+from enum import StrEnum
+from time import monotonic
+
+
+class RenderPath(StrEnum):
+    """Ways of delivering a final answer, from richest to most basic."""
+
+    RICH = "rich"  # sendRichMessage with embedded images
+    RICH_TEXT = "rich_text"  # sendRichMessage without images
+    PLAIN = "plain"  # Paginated classic text
+
+
+# Capabilities each rich path depends on
+_FEATURES = {RenderPath.RICH: ("rich", "images"), RenderPath.RICH_TEXT: ("rich",)}
+
+# Error descriptions that mean the chat lacks a capability. Anything else
+# (flood waits, 5xx, HTML parse errors, network) says nothing about the chat.
+NO_MEDIA = "RICH_MESSAGE_PHOTO_NO_MEDIA_FOUND"
+_UNSUPPORTED = ("method not found", "not supported", "not available")
+
+
+def missing_feature(error: str) -> str | None:
+    """Return the capability an API error proves missing, if any."""
+    if NO_MEDIA in error:
+        return "images"
+    lowered = error.lower()
+    if any(marker in lowered for marker in _UNSUPPORTED):
+        return "rich"
+    return None
+
+
+class CapabilityCache:
+    """Learn per chat which rendering path works and jump straight to it.
+
+    Two capabilities are tracked per chat: ``rich`` (the chat accepts
+    sendRichMessage) and ``images`` (embedded images can be fetched). A
+    failed path marks its capability unsupported and is skipped for the
+    following messages, saving the failed request and its retries. After
+    ``reprobe_after`` seconds the path is tried again once (a probe), so a
+    chat recovers when the platform or the content changes.
+
+    Only errors that prove a capability missing count (see
+    ``missing_feature``): "method not supported" for ``rich``, and
+    NO_MEDIA_FOUND for ``images`` once it has failed for ``image_misses``
+    different contents, since a single dead image URL is about the content.
+    """
+
+    max_chats: int = 1024
+    smoothing: float = 0.2
+    image_misses: int = 2
+
+    def __init__(self, reprobe_after: float = 3600.0) -> None:
+        self.reprobe_after = reprobe_after
+        # (chat_id, feature) -> (supported, checked_at)
+        self._known: dict[tuple[int, str], tuple[bool, float]] = {}
+        # chat_id -> hashes of contents whose images could not be fetched
+        self._misses: dict[int, set[int]] = {}
+        # Moving average of the time lost by a failed attempt, per path
+        self._failure_cost: dict[RenderPath, float] = {}
+        self.delivered_by: dict[RenderPath, int] = dict.fromkeys(RenderPath, 0)
+        self.fallbacks = 0
+        self.skipped = 0
+        self.probes = 0
+        self.saved = 0.0
+
+    def _state(self, chat_id: int, feature: str, now: float) -> bool | None:
+        """Return True/False when known and fresh, None when worth trying."""
+        state = self._known.get((chat_id, feature))
+        if state is None:
+            return None
+        supported, checked = state
+        if not supported and now - checked >= self.reprobe_after:
+            return None
+        return supported
+
+    def plan(self, chat_id: int, has_images: bool) -> list[tuple[RenderPath, bool]]:
+        """Return the paths to try in order, each with a "probe" flag.
+
+        A probe is a path known to fail whose re-check delay has elapsed; it
+        should be attempted once, without retries. The plain path is always
+        last and always planned.
+        """
+        now = monotonic()
+        paths = [RenderPath.RICH_TEXT]
+        if has_images:
+            paths.insert(0, RenderPath.RICH)
+        planned: list[tuple[RenderPath, bool]] = []
+        rich = self._state(chat_id, "rich", now)
+        for path in paths:
+            state = rich
+            if path is RenderPath.RICH and rich is not False:
+                state = self._state(chat_id, "images", now)
+            if state is False:
+                self.skipped += 1
+                self.saved += self._failure_cost.get(path, 0.0)
+                continue
+            probe = state is None and any(
+                not self._known.get((chat_id, feature), (True, now))[0]
+                for feature in _FEATURES[path]
+            )
+            self.probes += probe
+            planned.append((path, probe))
+        planned.append((RenderPath.PLAIN, False))
+        return planned
+
+    def record(
+        self,
+        chat_id: int,
+        path: RenderPath,
+        ok: bool,
+        elapsed: float,
+        error: str = "",
+        content: str = "",
+    ) -> None:
+        """Update the capabilities of chat_id after an attempt on path.
+
+        error is the failure description and content the message sent, used
+        to tell a chat that cannot fetch images from one broken image.
+        """
+        if path is RenderPath.PLAIN:
+            return
+        now = monotonic()
+        if ok:
+            self._known[chat_id, "rich"] = (True, now)
+            if path is RenderPath.RICH:
+                self._known[chat_id, "images"] = (True, now)
+                self._misses.pop(chat_id, None)
+            return
+        feature = missing_feature(error)
+        if feature == "images":
+            if path is not RenderPath.RICH:
+                return
+            misses = self._misses.setdefault(chat_id, set())
+            misses.add(hash(content))
+            if len(misses) < self.image_misses:
+                return
+            del self._misses[chat_id]
+            self._known[chat_id, "images"] = (False, now)
+        elif feature == "rich":
+            # Rich messages fail as a whole: images say nothing on their own
+            self._known[chat_id, "rich"] = (False, now)
+            self._known.pop((chat_id, "images"), None)
+        else:
+            return
+        cost = self._failure_cost.get(path)
+        self._failure_cost[path] = (
+            elapsed if cost is None else cost + self.smoothing * (elapsed - cost)
+        )
+        if len(self._misses) > self.max_chats:
+            del self._misses[next(iter(self._misses))]
+        if len(self._known) > self.max_chats * 2:
+            oldest = sorted(self._known, key=lambda k: self._known[k][1])
+            for key in oldest[: len(oldest) // 4]:
+                del self._known[key]
+
+    def delivered(self, path: RenderPath, fell_back: bool) -> None:
+        """Count a delivered message and whether a failed path preceded it."""
+        self.delivered_by[path] += 1
+        self.fallbacks += fell_back
+
+    def stats(self) -> dict[str, float]:
+        """Return delivery counts per path, fallback rate and time saved."""
+        sent = sum(self.delivered_by.values())
+        return {
+            **{p.value: n for p, n in self.delivered_by.items()},
+            "fallback_rate": round(self.fallbacks / sent, 3) if sent else 0.0,
+            "skipped": self.skipped,
+            "probes": self.probes,
+            "saved_s": round(self.saved, 1),
+            "chats": len({chat for chat, _ in self._known}),
+        }
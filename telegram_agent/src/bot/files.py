@@ -0,0 +1,190 @@
+"""Content-addressed caches of Telegram files (uploaded and downloaded)."""
+
+from contextlib import suppress
+from hashlib import sha256
+from logging import getLogger
+from os import getenv
+from pathlib import Path
+from time import time
+
+import aiofiles.os  # ty: explicit submodule import
+from aiosqlite import Connection, connect
+from dotenv import load_dotenv
+
+load_dotenv()
+FILE_CACHE_PATH = Path(getenv("DATA_DIR", "./data")) / "telegram_files.sqlite"
+
+logger = getLogger(__name__)
+
+
+def content_digest(data: bytes) -> str:
+    """Return the hex SHA-256 of data, used as cache key."""
+    return sha256(data).hexdigest()
+
+
+async def prune_folder(folder: Path, keep: int) -> None:
+    """Keep the `keep` most recently used files of folder (by mtime)."""
+    entries = await aiofiles.os.scandir(folder)
+    files = sorted(
+        (e for e in entries if e.is_file() and not e.name.endswith(".part")),
+        key=lambda e: e.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in files[keep:]:
+        with suppress(OSError):
+            await aiofiles.os.remove(entry.path)
+
+
+class _Store:
+    """Lazily opened SQLite table with hit counters."""
+
+    schema: str = ""
+    counter_names: tuple[str, ...] = ()
+
+    def __init__(self, path: Path | str = FILE_CACHE_PATH) -> None:
+        self.path = Path(path)
+        self._conn: Connection | None = None
+        self.counters = dict.fromkeys(self.counter_names, 0)
+
+    async def _db(self) -> Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = await connect(self.path)
+            await self._conn.executescript(self.schema)
+            await self._conn.commit()
+        return self._conn
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            logger.info("%s stats: %s", type(self).__name__, self.counters)
+            await self._conn.close()
+            self._conn = None
+
+
+class FileIdCache(_Store):
+    """Map uploaded content (by hash and media kind) to its Telegram file_id.
+
+    Once a file was uploaded, Telegram can re-send it by file_id without any
+    upload. Entries are persisted in SQLite so they survive restarts; an id
+    Telegram no longer accepts is dropped with :meth:`forget` and the content
+    uploaded again. The kind (photo, voice...) is part of the key since a
+    file_id only works with the send method it was obtained from.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS file_ids (
+        digest TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        file_id TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created REAL NOT NULL,
+        used REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (digest, kind)
+    )
+    """
+    counter_names = ("hits", "misses", "stale", "saved_bytes")
+
+    async def get(self, digest: str, kind: str) -> str | None:
+        """Return the cached file_id for the content, or None."""
+        db = await self._db()
+        async with db.execute(
+            "SELECT file_id, size FROM file_ids WHERE digest = ? AND kind = ?",
+            (digest, kind),
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            self.counters["misses"] += 1
+            return None
+        await db.execute(
+            "UPDATE file_ids SET used = ?, hits = hits + 1"
+            " WHERE digest = ? AND kind = ?",
+            (time(), digest, kind),
+        )
+        await db.commit()
+        self.counters["hits"] += 1
+        self.counters["saved_bytes"] += row[1]
+        return row[0]
+
+    async def put(self, digest: str, kind: str, file_id: str, size: int) -> None:
+        """Remember the file_id Telegram assigned to uploaded content."""
+        db = await self._db()
+        now = time()
+        await db.execute(
+            "INSERT INTO file_ids (digest, kind, file_id, size, created, used)"
+            " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (digest, kind) DO UPDATE"
+            " SET file_id = excluded.file_id, used = excluded.used",
+            (digest, kind, file_id, size, now, now),
+        )
+        await db.commit()
+
+    async def forget(self, digest: str, kind: str) -> None:
+        """Drop a file_id that Telegram rejected."""
+        self.counters["stale"] += 1
+        db = await self._db()
+        await db.execute(
+            "DELETE FROM file_ids WHERE digest = ? AND kind = ?", (digest, kind)
+        )
+        await db.commit()
+
+
+class DownloadIndex(_Store):
+    """Map a received file_unique_id (and content hash) to its local copy.
+
+    The same photo forwarded twice keeps its file_unique_id, so the second
+    time it is neither downloaded nor stored again, and anything derived
+    from the first copy (such as its description sidecar) is reused. Files
+    with another id but identical content are deduplicated by hash.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS downloads (
+        unique_id TEXT PRIMARY KEY,
+        path TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS downloads_digest ON downloads (digest);
+    """
+    counter_names = ("hits", "misses", "duplicates", "coalesced", "saved_bytes")
+
+    async def get(self, unique_id: str) -> Path | None:
+        """Return the local copy of a received file if it still exists."""
+        db = await self._db()
+        async with db.execute(
+            "SELECT path, size FROM downloads WHERE unique_id = ?", (unique_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is not None and await aiofiles.os.path.isfile(row[0]):
+            self.counters["hits"] += 1
+            self.counters["saved_bytes"] += row[1]
+            return Path(row[0])
+        if row is not None:  # Deleted from disk since
+            await db.execute("DELETE FROM downloads WHERE unique_id = ?", (unique_id,))
+            await db.commit()
+        self.counters["misses"] += 1
+        return None
+
+    async def find(self, digest: str) -> Path | None:
+        """Return an existing local copy with the given content hash."""
+        db = await self._db()
+        async with db.execute(
+            "SELECT path FROM downloads WHERE digest = ?", (digest,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        for (path,) in rows:
+            if await aiofiles.os.path.isfile(path):
+                self.counters["duplicates"] += 1
+                return Path(path)
+        return None
+
+    async def put(self, unique_id: str, path: Path, digest: str, size: int) -> None:
+        """Index a downloaded file."""
+        db = await self._db()
+        await db.execute(
+            "INSERT OR REPLACE INTO downloads (unique_id, path, digest, size, created)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (unique_id, str(path), digest, size, time()),
+        )
+        await db.commit()
@@ -1,41 +1,57 @@
 """Telegram bot handlers."""
 
-from asyncio import Event, create_subprocess_exec, gather, sleep
+from asyncio import Event, gather
 from datetime import datetime
-from io import BytesIO
+from functools import partial
 from os import getenv
 from pathlib import Path
-from subprocess import DEVNULL, PIPE
 from traceback import print_exc
 from typing import Any
 
 import aiofiles.os  # ty: explicit submodule import
 from dotenv import load_dotenv
-from langchain.messages import HumanMessage
-from telebot.types import InputFile, InputMediaPhoto, Message
+from telebot.types import Message, PhotoSize
 
+from ...core.catalog import catalog
+from ...core.describe import describer
+from ...core.imageprep import preparer
 from ...core.llm import LLM, LLM_CHOICE, LLM_UTILS
 from ...core.progress import reset_progress_sink, set_progress_sink
-from ...utils import extract_response
+from ...core.tts import synthesize_voice
 from ..abstract import AgenticBot, handler
+from ..album import AlbumAggregator
 from ..utils import str_size, unpack_user
 
 load_dotenv()
 TELEGRAM_CHAT_DEV = getenv("TELEGRAM_CHAT_DEV")
 _RECEIVED_DIR = Path(getenv("DATA_DIR", "./data")) / "image_received"
 _RECEIVED_DIR.mkdir(parents=True, exist_ok=True)
+_VOICE_DIR = Path(getenv("DATA_DIR", "./data")) / "voice_received"
+VOICE_RECEIVED_SIZE = int(getenv("VOICE_RECEIVED_SIZE", "64"))
 
 
-async def _save_received_image(img_bytes: bytes) -> str:
-    """Persist a received image to disk and return its path."""
-    ts = datetime.now().astimezone().strftime("%Y%m%d_%H%M%S_%f")
-    path = _RECEIVED_DIR / f"img_{ts}.jpg"
-    async with aiofiles.open(path, "wb") as f:
-        await f.write(img_bytes)
+def _timestamp() -> str:
+    return datetime.now().astimezone().strftime("%Y%m%d_%H%M%S_%f")
+
+
+async def _save_received_image(instance: AgenticBot, photo: PhotoSize) -> str:
+    """Download a received photo to disk and return its path.
+
+    A photo received before (e.g. forwarded again) is not downloaded twice:
+    the path of the first copy is returned, along with its description.
+    """
+    path = await instance.bot.download(
+        photo.file_id, photo.file_unique_id, _RECEIVED_DIR, f"img_{_timestamp()}.jpg"
+    )
+    await catalog.add(path, "received", photo.file_size)
     return str(path)
 
 
-async def _read_image(path: str) -> bytes:
+def _desc_path(img_path: str) -> Path:
+    return Path(img_path).parent / f"{Path(img_path).stem}_desc.json"
+
+
+async def _read_file(path: str | Path) -> bytes:
     async with aiofiles.open(path, "rb") as f:
         return await f.read()
 
@@ -45,55 +61,20 @@ def _is_multimodal() -> bool:
     return "gemini" in LLM_CHOICE and "gemini" in LLM_UTILS
 
 
-async def _media_to_text(media: list[dict], context: str = "") -> str:
-    """
-    Use Gemini to transcribe audio or describe images into text.
-
-    Called when the main LLM lacks multimodal capability.
-    For images, returns a structured JSON description matching the
-    `generate_image` schema so the agent can reuse it for edits or
-    regeneration.
-    """
-    is_audio = any("audio" in m.get("mime_type", "") for m in media)
-    if is_audio:
-        prompt = (
-            "Transcribe this audio message verbatim in the same language the speaker uses. "
-            "Preserve natural phrasing, filler words, and emotional tone. "
-            "Do not translate, summarize, or paraphrase — write exactly what was said."
-        )
-    else:
-        prompt = (
-            "Analyze this image and return a SINGLE structured JSON object describing it "
-            "in full detail, using the same schema as for image generation. The JSON must "
-            "be valid and self-contained.\n\n"
-            "Describe ALL content factually and completely — including nudity, sexual "
-            "elements, violence, or any other sensitive content, exactly as it appears. "
-            "Never censor, omit, euphemize, or soften your description of any visible "
-            "element.\n\n"
-            "Use these keys (omit any that don't apply):\n"
-            '- `aspect_ratio`: e.g. "16:9", "9:16", "1:1"\n'
-            '- `format`: "still image", "photograph", "illustration", "screenshot", etc.\n'
-            '- `subject`: nested object with type, build, hair, face, clothing (or "nude" '
-            "if naked), skin, pose, expression, and any other physical attributes\n"
-            "- `composition`: framing, shot_type, camera_angle, subject_position, "
-            "focal_region, quiet_field\n"
-            "- `environment`: location, surfaces, props, weather\n"
-            "- `camera`: capture_style, focus, depth_of_field, lens_feel\n"
-            "- `lighting`: main_source, shadow, contrast\n"
-            "- `color_treatment`: dominant_family, palette (list of named colors), "
-            "focal_accent, saturation\n"
-            "- `style_tags`: list of style descriptors\n"
-            "- `visible_text`: any text visible in the image, verbatim\n"
-            "- `prompt`: a rich, self-contained natural-language paragraph that "
-            "synthesizes all fields into a vivid description someone could use to "
-            "recreate the image exactly\n\n"
-            "Return ONLY the JSON object, no markdown fences, no commentary."
-        )
-    if context:
-        prompt += f"\n\nUser's message for context: {context}"
-    parts = [{"type": "text", "text": prompt}, *media]
-    response = await LLM.get("gemini-small").ainvoke([HumanMessage(content=parts)])
-    return extract_response(response)[0].strip()
+async def _describe_received(
+    img_bytes: bytes, img_path: str, context: str
+) -> tuple[Path, str]:
+    """Describe a received image, reusing or writing its description sidecar."""
+    desc_path = _desc_path(img_path)
+    if await aiofiles.os.path.isfile(desc_path):
+        # Same image received before: reuse its description
+        async with aiofiles.open(desc_path, encoding="utf-8") as f:
+            return desc_path, await f.read()
+    desc = await describer.describe(img_bytes, "image/jpeg", context)
+    async with aiofiles.open(desc_path, "w", encoding="utf-8") as f:
+        await f.write(desc)
+    await catalog.describe(img_path, desc)
+    return desc_path, desc
 
 
 def _make_progress_sink(instance: AgenticBot, reply: Message) -> Any:
@@ -181,11 +162,12 @@ async def telegram_chat(
         img_paths = [p for _, p in pending]
         if _is_multimodal():
             existing = getattr(msg, "media", [])
+            prepared = await gather(*(preparer.prepare(img) for img, _ in pending))
             msg.media = [  # ty: ignore[unresolved-attribute]
                 *existing,
                 *[
-                    {"type": "media", "data": img, "mime_type": "image/jpeg"}
-                    for img, _ in pending
+                    {"type": "media", "data": data, "mime_type": mime}
+                    for data, mime in prepared
                 ],
             ]
             paths_str = "\n".join(f"  - {p}" for p in img_paths)
@@ -193,22 +175,18 @@ async def telegram_chat(
                 f"{msg.text or ''}\n\n[Received image files:]\n{paths_str}".strip()
             )
         else:
-            # Describe each image individually and persist descriptions to disk
-            # so the agent can reference them later even after context loss.
-            desc_parts = []
-            for img_bytes, img_path in pending:
-                media_dicts = [
-                    {"type": "media", "data": img_bytes, "mime_type": "image/jpeg"}
-                ]
-                desc = await _media_to_text(media_dicts, msg.text or "")
-                desc_path = str(
-                    Path(img_path).parent / f"{Path(img_path).stem}_desc.json"
-                )
-                async with aiofiles.open(desc_path, "w", encoding="utf-8") as f:
-                    await f.write(desc)
-                desc_parts.append(
-                    f"  - {img_path}\n    Description: {desc_path}\n    Context: {desc}"
+            # Describe all images concurrently and persist descriptions to
+            # disk so the agent can reference them later even after context
+            # loss.
+            described = await gather(
+                *(_describe_received(b, p, msg.text or "") for b, p in pending)
+            )
+            desc_parts = [
+                f"  - {img_path}\n    Description: {desc_path}\n    Context: {desc}"
+                for (_, img_path), (desc_path, desc) in zip(
+                    pending, described, strict=True
                 )
+            ]
             msg.text = (
                 f"{msg.text or ''}\n\n[Received images:]\n" + "\n".join(desc_parts)
             ).strip()
@@ -252,37 +230,23 @@ async def telegram_chat(
                         reply,
                         f"{agent} -> Tool error = {extra.get('tool')}",
                     )
-            if not done:
-                await sleep(0.1)  # No need to spam
-            elif extra.get("images"):
+            if done and extra.get("images"):
                 paths = [p for p in extra["images"] if await aiofiles.os.path.exists(p)]
                 if paths:
                     await instance.bot.core.send_chat_action(
                         msg.chat.id, "upload_photo"
                     )
-                    if len(paths) == 1:
-                        async with aiofiles.open(paths[0], "rb") as f:
-                            img_bytes = await f.read()
-                        await instance.bot.core.send_photo(
-                            msg.chat.id,
-                            img_bytes,
-                            show_caption_above_media=True,
-                        )
-                    else:
-                        for i in range(0, len(paths), 10):
-                            batch = paths[i : i + 10]
-                            imgs = await gather(*(_read_image(p) for p in batch))
-                            media = [
-                                InputMediaPhoto(InputFile(BytesIO(b))) for b in imgs
-                            ]
-                            await instance.bot.core.send_media_group(msg.chat.id, media)
+                    images = await gather(*(_read_file(p) for p in paths))
+                    await instance.bot.send_photos(msg.chat.id, list(images))
             # TTS: send audio of the final response if enabled
             if done and msg.from_user and instance.tts_enabled.get(msg.from_user.id):
                 instance.log.info(f"[{msg.chat.id}] Generating TTS voice message...")
                 await instance.bot.core.send_chat_action(msg.chat.id, "upload_voice")
                 recording = await instance.bot.send(msg, "🎙️ I'm recording...")
                 adapted = await LLM.tts_adapt(step)
-                audio_bytes = await LLM.tts(adapted)
+                # Sentence chunks are synthesized in parallel and encoded
+                # as they complete; repeated answers come from the cache.
+                audio_bytes = await synthesize_voice(adapted)
                 if not audio_bytes:
                     instance.log.warning(
                         f"[{msg.chat.id}] TTS generation returned no audio"
@@ -291,25 +255,7 @@ async def telegram_chat(
                         msg, "🎙️ TTS failed — check logs for details."
                     )
                 if audio_bytes:
-                    # Telegram voice messages require OGG/OPUS
-                    proc = await create_subprocess_exec(
-                        "ffmpeg",
-                        "-i",
-                        "pipe:0",
-                        "-c:a",
-                        "libopus",
-                        "-f",
-                        "ogg",
-                        "pipe:1",
-                        stdin=PIPE,
-                        stdout=PIPE,
-                        stderr=DEVNULL,
-                    )
-                    ogg, _ = await proc.communicate(audio_bytes)
-                    voice = ogg if proc.returncode == 0 and ogg else audio_bytes
-                    await instance.bot.core.send_voice(
-                        msg.chat.id, InputFile(BytesIO(voice), file_name="voice.ogg")
-                    )
+                    await instance.bot.send_voice(msg.chat.id, audio_bytes)
                     instance.log.info(f"[{msg.chat.id}] TTS voice message sent")
                 await instance.bot.delete(recording)
     except Exception as e:
@@ -334,7 +280,13 @@ async def telegram_file(instance: AgenticBot, msg: Message) -> None:
             timer = instance.log.received(msg)
             await instance.managers["document"].notify(
                 msg.chat.id,
-                {"filename": file_name, "size": file_size, "path": file_path},
+                {
+                    "filename": file_name,
+                    "size": file_size,
+                    "path": file_path,
+                    "file_id": msg.document.file_id,
+                    "unique_id": msg.document.file_unique_id,
+                },
             )
             instance.log.sent(msg, timer)
     except Exception as e:
@@ -369,14 +321,20 @@ async def telegram_voice(instance: AgenticBot, msg: Message) -> None:
         # Send "I'm listening..." immediately, before download/transcription
         init = instance.bot.reply if msg.chat.type != "private" else instance.bot.send
         reply = await init(msg, "🔊 I'm listening...")
-        file_info = await instance.bot.core.get_file(voice.file_id)
-        audio = await instance.bot.core.download_file(file_info.file_path)
+        voice_path = await instance.bot.download(
+            voice.file_id,
+            voice.file_unique_id,
+            _VOICE_DIR,
+            f"voice_{_timestamp()}.ogg",
+            keep=VOICE_RECEIVED_SIZE,
+        )
+        audio = await _read_file(voice_path)
         media = [{"type": "media", "data": audio, "mime_type": "audio/ogg"}]
         if _is_multimodal():
             msg.media = media  # ty: ignore[unresolved-attribute]
             msg.text = "🎤 [voice message]"
         else:
-            transcription = await _media_to_text(media)
+            transcription = await describer.describe(audio, "audio/ogg")
             msg.text = f"🎤 [voice message]: {transcription}"
         # Replace "I'm listening..." with "I'm thinking..." and set up edit cache
         await instance.bot.edit(reply, instance.bot.waiting, replace=True)
@@ -395,8 +353,89 @@ async def telegram_voice(instance: AgenticBot, msg: Message) -> None:
         instance.cancel_events.pop(msg.chat.id, None)
 
 
-# Media group accumulation: {media_group_id: {"images": [], "msg": Message}}
-_media_groups: dict[str, dict] = {}
+type ReceivedPhoto = tuple[Message, bytes, str]
+
+
+async def _receive_photo(instance: AgenticBot, msg: Message) -> ReceivedPhoto:
+    """Download the highest resolution of a photo message."""
+    img_path = await _save_received_image(instance, msg.photo[-1])
+    return msg, await _read_file(img_path), img_path
+
+
+async def _init_reply(instance: AgenticBot, msg: Message, text: str) -> Message:
+    init = instance.bot.reply if msg.chat.type != "private" else instance.bot.send
+    return await init(msg, text)
+
+
+async def _process_photos(
+    instance: AgenticBot, reply: Message, photos: list[ReceivedPhoto]
+) -> None:
+    """Hand received photos to the agent, or keep them until an instruction."""
+    if not photos:
+        await instance.bot.edit(
+            reply, "❌ Could not download the images.", replace=True
+        )
+        return
+    # The caption of an album is carried by one member, not always the first
+    album_msg = next((m for m, _, _ in photos if m.caption), photos[0][0])
+    images = [(img_bytes, img_path) for _, img_bytes, img_path in photos]
+    caption = (album_msg.caption or "").strip()
+    if caption:
+        # Caption present: process immediately through agent.
+        # Check rate limiting BEFORE storing pending media so we don't
+        # leak orphaned images into pending_media if telegram_chat rejects.
+        if album_msg.chat.id in instance.cancel_events:
+            await instance.bot.edit(
+                reply,
+                "⏳ I'm still working on your previous message. Send /cancel to abort.",
+                replace=True,
+            )
+            return
+        instance.pending_media.setdefault(album_msg.chat.id, []).extend(images)
+        album_msg.text = caption
+        # Replace "I'm analyzing..." with "I'm thinking..." and set up edit cache
+        await instance.bot.edit(reply, instance.bot.waiting, replace=True)
+        instance.bot.edit_cache[reply.id] = {  # ty: ignore[unresolved-attribute]
+            "current": 0,
+            "content": [instance.bot.waiting],
+        }
+        # telegram_chat will claim the slot; pass overwrite so it skips
+        # the init() call and reuses our reply.
+        await telegram_chat(instance, album_msg, overwrite=reply)
+    else:
+        # No caption: store as pending, wait for next text/voice
+        instance.pending_media.setdefault(album_msg.chat.id, []).extend(images)
+        timer = instance.log.received(album_msg)
+        await instance.bot.edit(
+            reply,
+            "📷 Got it! Send a text or voice message with your instruction.",
+            replace=True,
+        )
+        instance.log.sent(album_msg, timer)
+
+
+async def _process_album(
+    context: tuple[AgenticBot, Message], photos: list[ReceivedPhoto]
+) -> None:
+    instance, reply = context
+    try:
+        await _process_photos(instance, reply, photos)
+    except Exception as e:
+        print_exc()
+        await telegram_report_issue(
+            instance, photos[0][0] if photos else reply, reply, e
+        )
+
+
+async def _album_context(
+    instance: AgenticBot, msg: Message
+) -> tuple[AgenticBot, Message]:
+    return instance, await _init_reply(instance, msg, "🔍 I'm analyzing...")
+
+
+# Albums arrive as one message per photo: members are downloaded as they come
+# and the whole album is processed once, when no more members arrive.
+_albums: AlbumAggregator[ReceivedPhoto] = AlbumAggregator(_process_album)
 
 
 @handler
@@ -413,85 +452,17 @@ async def telegram_image(instance: AgenticBot, msg: Message) -> None:
                 "⏳ I'm still working on your previous message. Send /cancel to abort.",
             )
             return
-        is_album = bool(msg.media_group_id)
-        if not is_album:
-            # Send "I'm analyzing..." immediately, before download
-            init = (
-                instance.bot.reply if msg.chat.type != "private" else instance.bot.send
+        if msg.media_group_id:
+            _albums.add(
+                msg.media_group_id,
+                msg.id,
+                _receive_photo(instance, msg),
+                partial(_album_context, instance, msg),
             )
-            reply = await init(msg, "🔍 I'm analyzing...")
-        # Download highest resolution
-        photo = msg.photo[-1]
-        file_info = await instance.bot.core.get_file(photo.file_id)
-        img_bytes = await instance.bot.core.download_file(file_info.file_path)
-        img_path = await _save_received_image(img_bytes)
-
-        if is_album:
-            # Album: accumulate images, debounce processing
-            group_id = msg.media_group_id
-            if group_id not in _media_groups:
-                _media_groups[group_id] = {"images": [], "msg": msg, "reply": None}
-            group = _media_groups[group_id]
-            group["images"].append((img_bytes, img_path))
-            my_count = len(group["images"])
-            # First callback of the group sends "I'm analyzing..." once,
-            # before the remaining images are debounced.
-            if group["reply"] is None:
-                init = (
-                    instance.bot.reply
-                    if msg.chat.type != "private"
-                    else instance.bot.send
-                )
-                group["reply"] = await init(msg, "🔍 I'm analyzing...")
-            # Wait briefly for more images in this group
-            await sleep(1.0)
-            # Only the last callback to arrive processes the group
-            current = _media_groups.get(group_id)
-            if not current or len(current["images"]) != my_count:
-                return  # A newer callback arrived, let it handle processing
-            data = _media_groups.pop(group_id)
-            images = data["images"]
-            album_msg = data["msg"]
-            reply = data["reply"]
-        else:
-            images = [(img_bytes, img_path)]
-            album_msg = msg
-
-        caption = (album_msg.caption or "").strip()
-        if caption:
-            # Caption present: process immediately through agent.
-            # Check rate limiting BEFORE storing pending media so we don't
-            # leak orphaned images into pending_media if telegram_chat rejects.
-            if album_msg.chat.id in instance.cancel_events:
-                await instance.bot.edit(
-                    reply,
-                    "⏳ I'm still working on your previous message. Send /cancel to abort.",
-                    replace=True,
-                )
-                return
-            instance.pending_media.setdefault(album_msg.chat.id, []).extend(images)
-            album_msg.text = caption
-            # Replace "I'm analyzing..." with "I'm thinking..." and set up edit cache
-            await instance.bot.edit(reply, instance.bot.waiting, replace=True)
-            instance.bot.edit_cache[reply.id] = {  # ty: ignore[unresolved-attribute]
-                "current": 0,
-                "content": [instance.bot.waiting],
-            }
-            # telegram_chat will claim the slot; pass overwrite so it skips
-            # the init() call and reuses our reply.
-            await telegram_chat(instance, album_msg, overwrite=reply)
-        else:
-            # No caption: store as pending, wait for next text/voice
-            instance.pending_media.setdefault(album_msg.chat.id, []).extend(images)
-            timer = instance.log.received(album_msg)
-            await instance.bot.edit(
-                reply,
-                "📷 Got it! Send a text or voice message with your instruction.",
-                replace=True,
-            )
-            instance.log.sent(album_msg, timer)
+            return
+        # Send "I'm analyzing..." immediately, before download
+        reply = await _init_reply(instance, msg, "🔍 I'm analyzing...")
+        await _process_photos(instance, reply, [await _receive_photo(instance, msg)])
     except Exception as e:
-        if msg.media_group_id and msg.media_group_id in _media_groups:
-            _media_groups.pop(msg.media_group_id, None)
         print_exc()
         await telegram_report_issue(instance, msg, reply or msg, e)
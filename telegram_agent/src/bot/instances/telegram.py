@@ -1,16 +1,41 @@
 """Telegram bot instance implementation."""
 
+from asyncio import Task, create_task, shield, to_thread
 from collections.abc import Awaitable, Callable
 from contextlib import suppress
+from functools import partial
+from hashlib import sha256
+from io import BytesIO
 from logging import getLogger
+from os import getenv
+from pathlib import Path
+from time import monotonic
 from typing import Any, ClassVar
 
+import aiofiles.os  # ty: explicit submodule import
 import aiohttp
+from dotenv import load_dotenv
+from telebot import asyncio_helper
 from telebot.async_telebot import AsyncTeleBot
-from telebot.types import BotCommand, CallbackQuery, LinkPreviewOptions, Message
+from telebot.asyncio_helper import ApiTelegramException
+from telebot.types import (
+    BotCommand,
+    CallbackQuery,
+    InputFile,
+    InputMediaPhoto,
+    LinkPreviewOptions,
+    Message,
+    Update,
+)
 from telebot.util import smart_split
 
+from ...core.imageprep import preparer
+from ...core.transcode import transcoder
 from ..abstract import Bot
+from ..capabilities import CapabilityCache, RenderPath
+from ..files import DownloadIndex, FileIdCache, content_digest, prune_folder
+from ..ratelimit import Priority, RateLimiter
+from ..scheduler import EditScheduler
 from ..utils import (
     fixed_telegram,
     logify_telegram,
@@ -18,6 +43,13 @@ from ..utils import (
     strip_html_tags,
     strip_rich_images,
 )
+from ..webhook import WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_URL, WebhookServer
+
+load_dotenv()
+# Bot API base URL, overridable to run against a local or fake Bot API server
+TELEGRAM_API_URL = getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+asyncio_helper.API_URL = f"{TELEGRAM_API_URL}/bot{{0}}/{{1}}"
+asyncio_helper.FILE_URL = f"{TELEGRAM_API_URL}/file/bot{{0}}/{{1}}"
 
 logger = getLogger(__name__)
 
@@ -70,6 +102,11 @@ class TelegramBot(Bot):
     logify: Callable[..., str] = logify_telegram
     max_msg_length: int = 1000
     extra_msg_length: int = 500
+    edit_interval: float = 1.0
+    http_limit: int = 100
+    http_keepalive: float = 60.0
+    reprobe_after: float = 3600.0
+    download_chunk: int = 64 * 1024
     pagination_action: ClassVar[list[str]] = ["first", "prev", "next", "last"]
 
     def _dynamic_length(self, text: str) -> int:
@@ -88,25 +125,92 @@ class TelegramBot(Bot):
         waiting: str | None = None,
         retries: int | None = None,
         max_msg_length: int | None = None,
+        edit_interval: float | None = None,
+        webhook: bool = False,
     ):
         """Initialize the Telegram bot. Must call initialize() and start() after."""
         super().__init__(delay, group_msg_trigger, waiting, retries)
+        self.webhook = webhook
         if max_msg_length:
             self.max_msg_length = max_msg_length
+        if edit_interval:
+            self.edit_interval = edit_interval
         self.core = AsyncTeleBot(token=telegram_id, parse_mode="HTML")
         self.edit_cache: dict[int, Any] = {}
+        # Telegram limits: ~30 calls/s per bot, ~1 msg/s per private chat
+        # and ~20 msgs/min per group (negative chat ids).
+        self.limiter = RateLimiter(
+            global_rate=30,
+            private_rate=1,
+            private_burst=3,
+            group_rate=20 / 60,
+            group_burst=3,
+        )
+        # Live progress edits are coalesced per message: only the latest
+        # render is sent, at most once per edit_interval in each chat.
+        self.edits = EditScheduler(
+            partial(self._edit_now, priority=Priority.PROGRESS), self.edit_interval
+        )
+        self._session: aiohttp.ClientSession | None = None
+        self.http_stats: dict[str, int] = {"requests": 0, "created": 0, "reused": 0}
+        self.render_paths = CapabilityCache(self.reprobe_after)
+        self.files = FileIdCache()
+        self.downloads = DownloadIndex()
+        self._downloading: dict[str, Task[Path]] = {}
+
+    async def _http(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive HTTP session, creating it on first use.
+
+        The session is also installed in telebot's session manager, so Bot
+        API calls and rich-message requests share one connection pool.
+        """
+        if self._session is None or self._session.closed:
+            trace = aiohttp.TraceConfig()
+            trace.on_request_start.append(self._count("requests"))
+            trace.on_connection_create_end.append(self._count("created"))
+            trace.on_connection_reuseconn.append(self._count("reused"))
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.http_limit, keepalive_timeout=self.http_keepalive
+                ),
+                trace_configs=[trace],
+            )
+            asyncio_helper.session_manager.session = self._session
+        return self._session
+
+    def _count(self, key: str) -> Callable[..., Awaitable[None]]:
+        async def hook(*_: Any) -> None:
+            self.http_stats[key] += 1
+
+        return hook
+
+    async def close(self) -> None:
+        """Close the shared HTTP session."""
+        logger.info("Rendering path stats: %s", self.render_paths.stats())
+        logger.info("Transcoder stats: %s", transcoder.stats())
+        logger.info("Image preparation stats: %s", preparer.counters)
+        await self.files.close()
+        await self.downloads.close()
+        if self._session is not None and not self._session.closed:
+            logger.info("HTTP pool stats: %s", self.http_stats)
+            await self._session.close()
+        if asyncio_helper.session_manager.session is self._session:
+            asyncio_helper.session_manager.session = None
+        self._session = None
 
     async def _rich_request(self, method: str, params: dict) -> dict[str, Any]:
-        url = f"https://api.telegram.org/bot{self.core.token}/{method}"
+        url = f"{TELEGRAM_API_URL}/bot{self.core.token}/{method}"
+        session = await self._http()
         timeout = aiohttp.ClientTimeout(total=30)
-        async with (
-            aiohttp.ClientSession(timeout=timeout) as session,
-            session.post(url, json=params) as resp,
-        ):
-            resp.raise_for_status()
-            result: dict[str, Any] = await resp.json()
+        async with session.post(url, json=params, timeout=timeout) as resp:
+            try:
+                result: dict[str, Any] = await resp.json(content_type=None)
+            except ValueError:
+                resp.raise_for_status()
+                raise
             if not result.get("ok"):
-                raise RuntimeError(f"Telegram API error: {result}")
+                # Keep the description (and retry_after) for the callers
+                raise asyncio_helper.ApiTelegramException(method, resp, result)
             return result["result"]
 
     async def _send_rich(self, chat_id: int, content_html: str) -> Message:
@@ -123,26 +227,54 @@ class TelegramBot(Bot):
         exponential backoff by _exec before falling through to the next
         content variant — a transient network blip should not discard the
         rich message.
+
+        Variants the chat cannot use are remembered (see CapabilityCache),
+        so later answers skip straight to the path that works; known-failing
+        paths are re-probed once, without retries, after a while. Flood
+        waits, server and parse errors are not remembered.
         """
         stripped = strip_rich_images(content_html)
-        attempts = [content_html] + ([stripped] if stripped != content_html else [])
-        for html in attempts:
+        fell_back = False
+        for path, probe in self.render_paths.plan(chat_id, stripped != content_html):
+            if path is RenderPath.PLAIN:
+                break
+            html = content_html if path is RenderPath.RICH else stripped
+            started = monotonic()
             try:
                 result = await self._exec(
                     self._rich_request,
                     "sendRichMessage",
                     {"chat_id": chat_id, "rich_message": {"html": html}},
+                    retries=0 if probe else None,
+                    chat_id=chat_id,
+                    priority=Priority.ANSWER,
                 )
-                return Message.de_json(result)
             except Exception as exc:
-                logger.warning("sendRichMessage attempt failed: %s", exc)
+                logger.warning("sendRichMessage (%s) attempt failed: %s", path, exc)
+                self.render_paths.record(
+                    chat_id,
+                    path,
+                    False,
+                    monotonic() - started,
+                    error=str(exc),
+                    content=html,
+                )
+                fell_back = True
                 continue
+            self.render_paths.record(chat_id, path, True, monotonic() - started)
+            self.render_paths.delivered(path, fell_back)
+            return Message.de_json(result)
+        self.render_paths.delivered(RenderPath.PLAIN, fell_back)
         return await self.paginated(
-            self.core.send_message, chat_id, strip_html_tags(content_html)
+            self.core.send_message,
+            chat_id,
+            strip_html_tags(content_html),
+            priority=Priority.ANSWER,
         )
 
     async def initialize(self, **kwargs: Callable[..., Awaitable[Any]]) -> None:
         """Set up message handlers for the bot."""
+        await self._http()
         await self.core.set_my_commands(
             [
                 BotCommand("start", "Start the bot"),
@@ -216,8 +348,34 @@ class TelegramBot(Bot):
                 await handle_image(message)
 
     async def start(self) -> None:
-        """Start the bot's polling loop."""
-        await self.core.infinity_polling(skip_pending=True, timeout=300)
+        """Start receiving updates, by webhook server or long polling."""
+        if self.webhook:
+            await self._serve_webhook()
+        else:
+            await self.core.infinity_polling(skip_pending=True, timeout=300)
+
+    async def _serve_webhook(self) -> None:
+        """Register the webhook (if a public URL is set) and serve updates.
+
+        Without TELEGRAM_WEBHOOK_URL the registration is left to whoever
+        fronts the replicas (e.g. a load balancer deployment step).
+        """
+        server = WebhookServer(self._process_update)
+        if WEBHOOK_URL:
+            await self._exec(
+                self.core.set_webhook,
+                url=WEBHOOK_URL + WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET or None,
+                max_connections=min(server.max_active, 100),
+                drop_pending_updates=True,
+            )
+        await server.serve()
+
+    async def _process_update(self, data: dict[str, Any]) -> None:
+        """Dispatch one raw webhook update to the registered handlers."""
+        update = Update.de_json(data)
+        if update is not None:
+            await self.core.process_new_updates([update])
 
     async def send(
         self,
@@ -236,6 +394,7 @@ class TelegramBot(Bot):
             self.core.send_message,
             ref,
             self.fixed(text or self.waiting),
+            chat_id=ref,
             **msg_params,
         )
         if not text:
@@ -258,6 +417,7 @@ class TelegramBot(Bot):
             self.core.reply_to,
             to_message,
             self.fixed(text or self.waiting),
+            chat_id=to_message.chat.id,
             **msg_params,
         )
         if not text:
@@ -319,39 +479,65 @@ class TelegramBot(Bot):
         msg: Message | bool = False
         if edited != orig:
             if final:
+                sent, dropped = await self.edits.close(message)
+                if sent or dropped:
+                    logger.info(
+                        "Live edits for msg %s: %d sent, %d dropped",
+                        message.id,
+                        sent,
+                        dropped,
+                    )
                 content_html = self.fixed(edited, classic=False)
                 await self.delete(message)
                 msg = await self._send_rich(message.chat.id, content_html)
+            elif replace:
+                await self.edits.close(message)
+                msg = await self._edit_now(message, edited)
             else:
-                classic_html = self.fixed(edited)
-                try:
-                    if len(classic_html) > self._dynamic_length(classic_html):
-                        msg = await self.paginated(
-                            self.core.edit_message_text,
-                            (message.chat.id, message.id),
-                            classic_html,
-                            cache.get("current"),
-                        )
-                    else:
-                        msg = await self._exec(
-                            self.core.edit_message_text,
-                            classic_html,
-                            message.chat.id,
-                            message.id,
-                            **msg_params,
-                        )
-                except Exception as exc:
-                    logger.warning("Edit failed for msg %s: %s", message.id, exc)
+                # Progress updates never wait on Telegram: the scheduler
+                # merges them and sends the latest state in the background.
+                self.edits.submit(message, edited)
+                msg = True
             if replace or final:
                 self.edit_cache.pop(message.id, None)
         return msg
 
+    async def _edit_now(
+        self, message: Message, edited: str, priority: Priority | None = None
+    ) -> Message | bool:
+        """Render and apply an edit immediately, paginating long content."""
+        msg: Message | bool = False
+        classic_html = self.fixed(edited)
+        try:
+            if len(classic_html) > self._dynamic_length(classic_html):
+                msg = await self.paginated(
+                    self.core.edit_message_text,
+                    (message.chat.id, message.id),
+                    classic_html,
+                    self.edit_cache.get(message.id, {}).get("current", 0),
+                    priority=priority,
+                )
+            else:
+                msg = await self._exec(
+                    self.core.edit_message_text,
+                    classic_html,
+                    message.chat.id,
+                    message.id,
+                    chat_id=message.chat.id,
+                    priority=priority,
+                    **msg_params,
+                )
+        except Exception as exc:
+            logger.warning("Edit failed for msg %s: %s", message.id, exc)
+        return msg
+
     async def paginated(
         self,
         method: Callable[..., Awaitable[Any]],
         ref: Message | int | str | tuple[int, int],
         text: str,
         page: int = 0,
+        priority: Priority | None = None,
     ) -> Any:
         """Send or edit a paginated message."""
         max_length = self._dynamic_length(text)
@@ -364,6 +550,8 @@ class TelegramBot(Bot):
                 ref[0],
                 ref[1],
                 reply_markup=reply_markup(page, len(pages)),
+                chat_id=ref[0],
+                priority=priority,
                 **msg_params,
             )
         else:  # Send/Reply
@@ -372,6 +560,8 @@ class TelegramBot(Bot):
                 ref,
                 pages[page],
                 reply_markup=reply_markup(page, len(pages)),
+                chat_id=ref.chat.id if isinstance(ref, Message) else int(ref),
+                priority=priority,
                 **msg_params,
             )
         cache = self.edit_cache.get(msg.id)
@@ -403,6 +593,7 @@ class TelegramBot(Bot):
                     message.chat.id,
                     message.id,
                     reply_markup=reply_markup(new_index, len(cache["pages"])),
+                    chat_id=message.chat.id,
                     **msg_params,
                 )
 
@@ -415,6 +606,7 @@ class TelegramBot(Bot):
                 message.chat.id,
                 message.id,
                 disable_notification=True,
+                chat_id=message.chat.id,
             )
         return success
 
@@ -423,7 +615,10 @@ class TelegramBot(Bot):
         success: bool = False
         with suppress(Exception):
             success = await self._exec(
-                self.core.unpin_chat_message, message.chat.id, message.id
+                self.core.unpin_chat_message,
+                message.chat.id,
+                message.id,
+                chat_id=message.chat.id,
             )
         return success
 
@@ -432,6 +627,158 @@ class TelegramBot(Bot):
         success: bool = False
         with suppress(Exception):
             success = await self._exec(
-                self.core.delete_message, message.chat.id, message.id
+                self.core.delete_message,
+                message.chat.id,
+                message.id,
+                chat_id=message.chat.id,
             )
         return success
+
+    async def send_photos(self, chat_id: int, images: list[bytes]) -> None:
+        """Send images (albums of up to 10), re-using already uploaded ones."""
+        for i in range(0, len(images), 10):
+            batch = images[i : i + 10]
+            digests = [content_digest(img) for img in batch]
+            file_ids = [await self.files.get(d, "photo") for d in digests]
+            try:
+                sent = await self._send_photo_batch(chat_id, batch, file_ids)
+            except ApiTelegramException as exc:
+                if exc.error_code != 400 or not any(file_ids):
+                    raise
+                logger.warning("Cached photo ids rejected, uploading: %s", exc)
+                for digest, file_id in zip(digests, file_ids, strict=True):
+                    if file_id:
+                        await self.files.forget(digest, "photo")
+                file_ids = [None] * len(batch)
+                sent = await self._send_photo_batch(chat_id, batch, file_ids)
+            for digest, img, file_id, msg in zip(
+                digests, batch, file_ids, sent, strict=True
+            ):
+                if file_id is None and msg.photo:
+                    await self.files.put(
+                        digest, "photo", msg.photo[-1].file_id, len(img)
+                    )
+
+    async def _send_photo_batch(
+        self, chat_id: int, batch: list[bytes], file_ids: list[str | None]
+    ) -> list[Message]:
+        # Cached ids fail fast: a rejected id is re-uploaded by the caller
+        retries = 0 if any(file_ids) else None
+        if len(batch) == 1:
+            msg = await self._exec(
+                self.core.send_photo,
+                chat_id,
+                file_ids[0] or batch[0],
+                show_caption_above_media=True,
+                retries=retries,
+                chat_id=chat_id,
+            )
+            return [msg]
+
+        async def send_album() -> list[Message]:
+            # Fresh file objects on each attempt: a retry must re-read them
+            media = [
+                InputMediaPhoto(file_id or InputFile(BytesIO(img)))
+                for img, file_id in zip(batch, file_ids, strict=True)
+            ]
+            return await self.core.send_media_group(chat_id, media)
+
+        return await self._exec(send_album, retries=retries, chat_id=chat_id)
+
+    async def send_voice(self, chat_id: int, audio: bytes) -> Message:
+        """Send OGG/OPUS audio as a voice message, re-using it if uploaded."""
+        digest = content_digest(audio)
+        if file_id := await self.files.get(digest, "voice"):
+            try:
+                return await self._exec(
+                    self.core.send_voice, chat_id, file_id, retries=0, chat_id=chat_id
+                )
+            except ApiTelegramException as exc:
+                if exc.error_code != 400:
+                    raise
+                logger.warning("Cached voice id rejected, uploading: %s", exc)
+                await self.files.forget(digest, "voice")
+
+        async def upload() -> Message:
+            file = InputFile(BytesIO(audio), file_name="voice.ogg")
+            return await self.core.send_voice(chat_id, file)
+
+        msg: Message = await self._exec(upload, chat_id=chat_id)
+        if msg.voice:
+            await self.files.put(digest, "voice", msg.voice.file_id, len(audio))
+        return msg
+
+    async def download(
+        self,
+        file_id: str,
+        unique_id: str,
+        folder: Path,
+        name: str,
+        file_path: str | None = None,
+        keep: int | None = None,
+    ) -> Path:
+        """Download a file into folder/name, once per file_unique_id.
+
+        The body is streamed to disk in chunks while being hashed, so large
+        files never sit in memory. A file received before (same unique id,
+        or same content) is not stored twice: its existing path is returned.
+        file_path (from a previous get_file) saves the lookup call. With
+        keep, folder only holds the keep most recently used files.
+        Concurrent downloads of the same unique id share one transfer.
+        """
+        if path := await self.downloads.get(unique_id):
+            if keep is not None:
+                await to_thread(path.touch)  # Most recently used
+            return path
+        task = self._downloading.get(unique_id)
+        if task is not None:
+            self.downloads.counters["coalesced"] += 1
+        else:
+            task = create_task(
+                self._download(file_id, unique_id, folder, name, file_path, keep)
+            )
+            self._downloading[unique_id] = task
+            task.add_done_callback(lambda _: self._downloading.pop(unique_id, None))
+        # Shielded: a cancelled caller must not cancel the shared transfer
+        return await shield(task)
+
+    async def _download(
+        self,
+        file_id: str,
+        unique_id: str,
+        folder: Path,
+        name: str,
+        file_path: str | None,
+        keep: int | None,
+    ) -> Path:
+        if file_path is None:
+            file_path = (await self.core.get_file(file_id)).file_path
+        url = f"{TELEGRAM_API_URL}/file/bot{self.core.token}/{file_path}"
+        await aiofiles.os.makedirs(folder, exist_ok=True)
+        part = folder / f".{unique_id}.part"
+        digest, size = sha256(), 0
+        session = await self._http()
+        try:
+            async with (
+                session.get(url, timeout=aiohttp.ClientTimeout(total=300)) as resp,
+                aiofiles.open(part, "wb") as f,
+            ):
+                resp.raise_for_status()
+                async for chunk in resp.content.iter_chunked(self.download_chunk):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    await f.write(chunk)
+            content_hash = digest.hexdigest()
+            if path := await self.downloads.find(content_hash):
+                await aiofiles.os.remove(part)
+            else:
+                path = folder / name
+                await aiofiles.os.replace(part, path)
+        except BaseException:
+            with suppress(OSError):
+                await aiofiles.os.remove(part)
+            raise
+        await self.downloads.put(unique_id, path, content_hash, size)
+        if keep is not None:
+            await prune_folder(folder, keep)
+        return path
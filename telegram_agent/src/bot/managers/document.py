@@ -1,8 +1,9 @@
 """Document management for RAG integration."""
 
-from asyncio import sleep
+from asyncio import sleep, to_thread
 from datetime import UTC, datetime, timedelta
 from os import getenv
+from pathlib import Path
 from typing import Any
 
 from dotenv import load_dotenv
@@ -15,6 +16,8 @@ from ..utils import progress_bar, sanitize_filename
 load_dotenv()
 RAG_URL = getenv("RAG_URL")
 DOCS_UI_URL = getenv("DOCS_UI_URL", "").strip("/")
+DOCUMENT_DIR = Path(getenv("DATA_DIR", "./data")) / "document_received"
+DOCUMENT_RECEIVED_SIZE = int(getenv("DOCUMENT_RECEIVED_SIZE", "32"))
 SEPARATOR = "___________________________________"
 
 
@@ -68,7 +71,9 @@ class DocumentManager(Manager):
     async def notify(self, chat_id: int, data: dict[str, str]) -> None:
         """Handle a new document upload notification."""
         source = data["filename"]
-        res = await self.upload_document(source, data["path"])
+        res = await self.upload_document(
+            source, data["path"], data["file_id"], data["unique_id"]
+        )
         source = sanitize_filename(source) or source
         documents: list[str] = res.get("files")
         if not documents:
@@ -114,17 +119,28 @@ class DocumentManager(Manager):
             + f"\nTelegram API only allows files up to 20MB.\nTo upload multiple or larger files: [{DOCS_UI_URL.split('/')[-1]}/upload/dev]({DOCS_UI_URL}/upload/dev)",
         )
 
-    async def upload_document(self, file_name: str, file_path: str) -> Any:
-        """Upload a document to the RAG service."""
+    async def upload_document(
+        self, file_name: str, file_path: str, file_id: str, unique_id: str
+    ) -> Any:
+        """Download a document to disk and stream it to the RAG service."""
         try:
-            file = await self.instance.bot.core.download_file(file_path)
+            path = await self.instance.bot.download(
+                file_id,
+                unique_id,
+                DOCUMENT_DIR,
+                f"{unique_id}_{sanitize_filename(file_name) or 'document'}",
+                file_path=file_path,
+                keep=DOCUMENT_RECEIVED_SIZE,
+            )
             try:
-                async with AsyncClient() as http:
-                    res = await http.post(
-                        f"{RAG_URL}/upload",
-                        files={"file": (file_name, file)},
-                    )
-                    return res.json()
+                file = await to_thread(path.open, "rb")
+                with file:
+                    async with AsyncClient() as http:
+                        res = await http.post(
+                            f"{RAG_URL}/upload",
+                            files={"file": (file_name, file)},
+                        )
+                        return res.json()
             except Exception:
                 self.instance.log.exception("Uploading document failed")
         except Exception:
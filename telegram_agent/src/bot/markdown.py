@@ -0,0 +1,301 @@
+"""Single-pass Markdown to Telegram HTML compiler.
+
+The text is tokenized once into segments (fenced code, raw ``<pre>`` blocks
+and markdown paragraphs), each paragraph into blocks (headings, rules,
+tables, lists, quotes, lines), and each line into inline spans. Every node
+emits its classic (send_message/edit_message_text) and rich
+(sendRichMessage) HTML at the same time, so both variants cost one pass.
+
+Paragraphs and ``<pre>`` blocks are memoized: live progress messages are
+re-rendered on every update, but only the segments that changed since the
+previous render are compiled again.
+"""
+
+import re
+from functools import lru_cache
+
+# Characters to escape in text; existing entities are kept as-is.
+_AMP = re.compile(r"&(?!amp;|lt;|gt;|quot;|apos;|#\d+;)")
+_ESCAPE = re.compile(r"&(?!amp;|lt;|gt;|quot;|apos;|#\d+;)|[<>]")
+_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+
+_SEGMENT = re.compile(
+    r"```(?P<lang>\w+)?\n?(?P<code>.*?)```|(?P<pre><pre\b[^>]*>.*?</pre>)", re.DOTALL
+)
+_PARAGRAPH_BREAK = re.compile(r"(\n\s*\n)")
+
+_INLINE = re.compile(
+    r"`(?P<code>[^`]+)`"
+    r'|!\[(?P<alt>[^\]]*)\]\((?P<src>[^)\s]+)(?:\s+"(?P<title>[^"]*)")?\)'
+    r"|\[(?P<text>[^\]]+)\]\((?P<href>[^)]+)\)"
+    r"|\|\|(?P<spoiler>.+?)\|\|"
+    r"|\*\*(?P<b>.+?)\*\*"
+    r"|(?<!\*)\*(?!\*)(?P<i>.+?)(?<!\*)\*(?!\*)"
+    r"|__(?P<u>.+?)__"
+    r"|~~(?P<s>.+?)~~"
+    r"|==(?P<mark>.+?)=="
+    r"|(?P<tag></?(?P<tag_name>[a-zA-Z][\w-]*)[^>]*>)"
+)
+_WRAPS = {"spoiler": "tg-spoiler", "b": "b", "i": "i", "u": "u", "s": "s"}
+
+_HR = re.compile(r"(-{3,}|\*{3,}|_{3,})\s*$")
+_HEADING = re.compile(r"(#{1,6})\s+(.+)$")
+_TABLE_ROW = re.compile(r"\|(?!\|).+\|\s*$")  # Not a "||spoiler||" line
+_ULIST_ITEM = re.compile(r"[\-\*\+]\s")
+_TASK_ITEM = re.compile(r"[\-\*\+]\s+\[([ xX])\]\s+(.*)")
+_OLIST_ITEM = re.compile(r"(\d+)\.\s+")
+_QUOTE = re.compile(r">\s?(.*)$")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+# Raw rich-only tags found in the input, mapped to their classic equivalent
+# ("" drops the tag).
+_CLASSIC_TAGS = {
+    "img": "",
+    "input": "",
+    "figure": "",
+    "figcaption": "",
+    "ul": "",
+    "ol": "",
+    "table": "",
+    "tr": "",
+    "th": "",
+    "td": "",
+    "mark": "u",
+    **{f"h{n}": "b" for n in range(1, 7)},
+}
+
+type Rendered = tuple[str, str]  # (classic, rich)
+
+
+def _escape(text: str) -> str:
+    """Escape &, < and > while keeping existing entities."""
+    return _ESCAPE.sub(lambda m: _ESCAPES[m.group(0)], text)
+
+
+def _fix_amp(text: str) -> str:
+    """Escape stray ampersands only (for already-escaped HTML)."""
+    return _AMP.sub("&amp;", text) if "&" in text else text
+
+
+def _raw_tag(tag: str, name: str) -> Rendered:
+    """Pass a raw HTML tag through, downgrading rich-only tags for classic."""
+    name = name.lower()
+    if name not in _CLASSIC_TAGS and name != "hr" and name != "li":
+        return tag, tag
+    if name == "hr":
+        return "\n———\n", tag
+    closing = tag.startswith("</")
+    if name == "li":
+        return ("\n" if closing else "• "), tag
+    repl = _CLASSIC_TAGS[name]
+    return (f"<{'/' if closing else ''}{repl}>" if repl else ""), tag
+
+
+def _inline(text: str) -> Rendered:
+    """Compile inline markdown spans of a single line."""
+    classic: list[str] = []
+    rich: list[str] = []
+    pos = 0
+    for m in _INLINE.finditer(text):
+        if m.start() > pos:
+            plain = _escape(text[pos : m.start()])
+            classic.append(plain)
+            rich.append(plain)
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == "code":
+            html = f"<code>{_escape(m.group('code'))}</code>"
+            classic.append(html)
+            rich.append(html)
+        elif kind in {"src", "title"}:  # Image
+            src, title = m.group("src"), m.group("title")
+            if not src.startswith(("http://", "https://")):
+                continue
+            src = _escape(src).replace('"', "&quot;")
+            if title:
+                caption = _escape(title)
+                classic.append(caption)
+                rich.append(
+                    f'<figure><img src="{src}"/><figcaption>{caption}</figcaption></figure>'
+                )
+            else:
+                rich.append(f'<img src="{src}"/>')
+        elif kind == "href":
+            href = _escape(m.group("href")).replace('"', "&quot;")
+            inner_classic, inner_rich = _inline(m.group("text"))
+            classic.append(f'<a href="{href}">{inner_classic}</a>')
+            rich.append(f'<a href="{href}">{inner_rich}</a>')
+        elif kind == "mark":
+            inner_classic, inner_rich = _inline(m.group("mark"))
+            classic.append(f"<u>{inner_classic}</u>")
+            rich.append(f"<mark>{inner_rich}</mark>")
+        elif kind == "tag":
+            raw_classic, raw_rich = _raw_tag(m.group("tag"), m.group("tag_name"))
+            classic.append(raw_classic)
+            rich.append(raw_rich)
+        elif kind in _WRAPS:
+            tag = _WRAPS[kind]
+            inner_classic, inner_rich = _inline(m.group(kind))
+            classic.append(f"<{tag}>{inner_classic}</{tag}>")
+            rich.append(f"<{tag}>{inner_rich}</{tag}>")
+    if pos < len(text):
+        plain = _escape(text[pos:])
+        classic.append(plain)
+        rich.append(plain)
+    return "".join(classic), "".join(rich)
+
+
+def _table(rows: list[str]) -> Rendered:
+    classic: list[str] = []
+    rich: list[str] = []
+    for row in rows:
+        cells = row.strip().strip("|").split("|")
+        if all(set(c.strip()) <= set(" -:|") for c in cells):
+            continue  # Alignment row
+        tag = "th" if not rich else "td"
+        compiled = [_inline(c.strip()) for c in cells]
+        classic.append(" | ".join(c for c, _ in compiled))
+        rich.append(
+            "<tr>" + "".join(f"<{tag}>{r}</{tag}>" for _, r in compiled) + "</tr>"
+        )
+    if not rich:
+        return "", ""
+    return "\n".join(classic), "<table>\n" + "\n".join(rich) + "\n</table>"
+
+
+def _ulist(items: list[str]) -> Rendered:
+    classic: list[str] = []
+    rich: list[str] = []
+    for item in items:
+        if task := _TASK_ITEM.match(item):
+            checked = " checked" if task.group(1).lower() == "x" else ""
+            item_classic, item_rich = _inline(task.group(2))
+            item_rich = f'<input type="checkbox"{checked}/>{item_rich}'
+        else:
+            item_classic, item_rich = _inline(item[2:].lstrip())
+        classic.append(f"• {item_classic.strip()}")
+        rich.append(f"<li>{item_rich}</li>")
+    return "\n".join(classic), "<ul>" + "".join(rich) + "</ul>"
+
+
+def _olist(items: list[str]) -> Rendered:
+    classic: list[str] = []
+    rich: list[str] = []
+    for n, item in enumerate(items, 1):
+        item_classic, item_rich = _inline(_OLIST_ITEM.sub("", item, count=1).strip())
+        classic.append(f"{n}. {item_classic.strip()}")
+        rich.append(f"<li>{item_rich}</li>")
+    return "\n".join(classic), "<ol>" + "".join(rich) + "</ol>"
+
+
+@lru_cache(maxsize=1024)
+def _paragraph(text: str) -> Rendered:
+    """Compile a markdown paragraph (no blank lines) into (classic, rich)."""
+    lines = text.split("\n")
+    classic: list[str] = []
+    rich: list[str] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        group: list[str] = []
+        block: Rendered
+        if _TABLE_ROW.match(line):
+            while i < len(lines) and _TABLE_ROW.match(lines[i]):
+                group.append(lines[i])
+                i += 1
+            block = _table(group)
+        elif _HR.match(line):
+            block = "\n———\n", "<hr>"
+            i += 1
+        elif _ULIST_ITEM.match(line):
+            while i < len(lines) and _ULIST_ITEM.match(lines[i]):
+                group.append(lines[i])
+                i += 1
+            block = _ulist(group)
+        elif _OLIST_ITEM.match(line):
+            while i < len(lines) and _OLIST_ITEM.match(lines[i]):
+                group.append(lines[i])
+                i += 1
+            block = _olist(group)
+        elif heading := _HEADING.match(line):
+            level = len(heading.group(1))
+            inner_classic, inner_rich = _inline(heading.group(2).strip())
+            block = f"<b>{inner_classic}</b>", f"<h{level}>{inner_rich}</h{level}>"
+            i += 1
+        elif quote := _QUOTE.match(line):
+            inner_classic, inner_rich = _inline(quote.group(1))
+            block = (
+                f"<blockquote>{inner_classic}</blockquote>",
+                f"<blockquote>{inner_rich}</blockquote>",
+            )
+            i += 1
+        else:
+            block = _inline(line)
+            i += 1
+        classic.append(block[0])
+        rich.append(block[1])
+    return "\n".join(classic), "\n".join(rich)
+
+
+@lru_cache(maxsize=256)
+def _code_block(lang: str | None, code: str) -> str:
+    code = _escape(code.strip())
+    if lang:
+        return f'<pre><code class="language-{lang}">\n{code}\n</code></pre>'
+    return f"<pre>\n{code}\n</pre>"
+
+
+@lru_cache(maxsize=256)
+def _pre_block(html: str) -> str:
+    """Keep an already-rendered <pre> block (e.g. tool logs) verbatim."""
+    return _fix_amp(html)
+
+
+def _markdown(text: str) -> Rendered:
+    classic: list[str] = []
+    rich: list[str] = []
+    for part in _PARAGRAPH_BREAK.split(text):
+        if not part.strip():
+            classic.append(part)
+            rich.append(part)
+            continue
+        part_classic, part_rich = _paragraph(part)
+        classic.append(part_classic)
+        rich.append(part_rich)
+    return "".join(classic), "".join(rich)
+
+
+def _collapse(html: str) -> str:
+    """Strip and collapse runs of blank lines to a single one."""
+    html = html.strip()
+    return _BLANK_LINES.sub("\n\n", html) if "\n\n\n" in html else html
+
+
+@lru_cache(maxsize=64)
+def compile_telegram(text: str) -> Rendered:
+    """Compile markdown (possibly mixed with rendered HTML) in one pass.
+
+    Returns the (classic, rich) HTML pair: classic only uses tags accepted by
+    send_message/edit_message_text, rich keeps lists, tables, headings,
+    images and marks for sendRichMessage.
+    """
+    classic: list[str] = []
+    rich: list[str] = []
+    pos = 0
+    for m in _SEGMENT.finditer(text):
+        if m.start() > pos:
+            part_classic, part_rich = _markdown(text[pos : m.start()])
+            classic.append(part_classic)
+            rich.append(part_rich)
+        pos = m.end()
+        if m.group("pre") is not None:
+            html = _pre_block(m.group("pre"))
+        else:
+            html = _code_block(m.group("lang"), m.group("code"))
+        classic.append(html)
+        rich.append(html)
+    if pos < len(text):
+        part_classic, part_rich = _markdown(text[pos:])
+        classic.append(part_classic)
+        rich.append(part_rich)
+    return _collapse("".join(classic)), _collapse("".join(rich))
@@ -0,0 +1,201 @@
+"""Hierarchical token-bucket rate limiter for bot API calls."""
+
+from asyncio import Condition, wait_for
+from contextlib import suppress
+from contextvars import ContextVar, Token
+from enum import IntEnum
+from itertools import count
+from time import monotonic
+
+
+class Priority(IntEnum):
+    """Priority classes for API calls (lower value is served first)."""
+
+    ANSWER = 0  # Final answers and direct replies to the user
+    PROGRESS = 1  # Live progress edits
+    PANEL = 2  # Background manager panels (downloads, documents)
+
+
+_priority: ContextVar[Priority] = ContextVar("api_priority", default=Priority.ANSWER)
+
+
+def set_api_priority(priority: Priority) -> Token[Priority]:
+    """Set the default API priority for the current task context."""
+    return _priority.set(priority)
+
+
+def reset_api_priority(token: Token[Priority]) -> None:
+    """Restore the API priority bound before the given token."""
+    _priority.reset(token)
+
+
+def current_api_priority() -> Priority:
+    """Return the API priority bound in the current task context."""
+    return _priority.get()
+
+
+class TokenBucket:
+    """Token bucket with adaptive slowdown after flood-wait responses.
+
+    A 429 blocks the bucket for ``retry_after`` seconds and halves its refill
+    rate; every granted call then recovers the rate a little, so a chat that
+    got flood-limited is paced more gently for a while instead of hitting the
+    limit again right away.
+    """
+
+    __slots__ = ("blocked_until", "burst", "rate", "scale", "tokens", "updated")
+
+    min_scale: float = 0.125
+    recovery: float = 1.05
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = monotonic()
+        self.scale = 1.0
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate * self.scale
+            )
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 if available now)."""
+        self._refill(now)
+        wait = max(self.blocked_until - now, 0.0)
+        if self.tokens < 1.0:
+            wait = max(wait, (1.0 - self.tokens) / (self.rate * self.scale))
+        return wait
+
+    def take(self, now: float) -> None:
+        """Consume one token."""
+        self._refill(now)
+        self.tokens -= 1.0
+        self.scale = min(1.0, self.scale * self.recovery)
+
+    def penalize(self, now: float, retry_after: float) -> None:
+        """Block for retry_after seconds and slow the refill rate down."""
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+        self.tokens = min(self.tokens, 0.0)
+        self.updated = max(self.updated, now)
+        self.scale = max(self.min_scale, self.scale / 2)
+
+    def idle(self, now: float) -> bool:
+        """Whether the bucket is full and unblocked (safe to forget)."""
+        self._refill(now)
+        return (
+            self.tokens >= self.burst
+            and self.scale >= 1.0
+            and now >= self.blocked_until
+        )
+
+
+class RateLimiter:
+    """Global plus per-chat token buckets with priority-ordered grants.
+
+    Each call takes one token from the global bucket and one from its chat's
+    bucket (private chats and groups have separate limits, groups being
+    identified by negative chat ids). When several calls are ready at once,
+    the one with the best :class:`Priority` wins, so final answers overtake
+    queued progress edits and background panels. Waiting yields to the event
+    loop, and chats never block each other beyond the shared global budget.
+    """
+
+    max_idle_buckets: int = 512
+
+    def __init__(
+        self,
+        global_rate: float,
+        global_burst: float | None = None,
+        private_rate: float | None = None,
+        private_burst: float = 1.0,
+        group_rate: float | None = None,
+        group_burst: float = 1.0,
+    ) -> None:
+        self.global_bucket = TokenBucket(global_rate, global_burst or global_rate)
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self._chats: dict[int, TokenBucket] = {}
+        self._cond = Condition()
+        self._waiters: list[tuple[int, int, int | None]] = []
+        self._seq = count()
+        self.granted: dict[Priority, int] = dict.fromkeys(Priority, 0)
+        self.flood_waits = 0
+
+    def _chat_bucket(self, chat_id: int | None) -> TokenBucket | None:
+        if chat_id is None:
+            return None
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            rate, burst = (
+                (self.group_rate, self.group_burst)
+                if chat_id < 0
+                else (self.private_rate, self.private_burst)
+            )
+            if not rate:
+                return None
+            if len(self._chats) >= self.max_idle_buckets:
+                now = monotonic()
+                for key in [k for k, b in self._chats.items() if b.idle(now)]:
+                    del self._chats[key]
+            bucket = self._chats[chat_id] = TokenBucket(rate, burst)
+        return bucket
+
+    def _wait_time(self, chat_id: int | None, now: float) -> float:
+        wait = self.global_bucket.wait_time(now)
+        if bucket := self._chat_bucket(chat_id):
+            wait = max(wait, bucket.wait_time(now))
+        return wait
+
+    async def acquire(
+        self, chat_id: int | None = None, priority: Priority | None = None
+    ) -> None:
+        """Wait until a call for chat_id may be sent, then consume its tokens."""
+        prio = current_api_priority() if priority is None else priority
+        entry = (int(prio), next(self._seq), chat_id)
+        async with self._cond:
+            self._waiters.append(entry)
+            try:
+                while True:
+                    now = monotonic()
+                    wait = self._wait_time(chat_id, now)
+                    outranked = any(
+                        other[:2] < entry[:2] and self._wait_time(other[2], now) <= 0
+                        for other in self._waiters
+                    )
+                    if wait <= 0 and not outranked:
+                        self.global_bucket.take(now)
+                        if bucket := self._chat_bucket(chat_id):
+                            bucket.take(now)
+                        self.granted[prio] += 1
+                        return
+                    # Outranked callers sleep until a grant frees the slot
+                    with suppress(TimeoutError):
+                        await wait_for(
+                            self._cond.wait(),
+                            wait if wait > 0 and not outranked else None,
+                        )
+            finally:
+                self._waiters.remove(entry)
+                self._cond.notify_all()
+
+    def penalize(self, chat_id: int | None, retry_after: float) -> None:
+        """Apply a flood-wait to the chat bucket (or the global one if unknown)."""
+        self.flood_waits += 1
+        now = monotonic()
+        bucket = self._chat_bucket(chat_id) or self.global_bucket
+        bucket.penalize(now, retry_after)
+
+    def stats(self) -> dict[str, int]:
+        """Return grant counts per priority class and flood-wait count."""
+        return {
+            **{p.name.lower(): n for p, n in self.granted.items()},
+            "flood_waits": self.flood_waits,
+            "chats": len(self._chats),
+        }
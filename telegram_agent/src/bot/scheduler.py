@@ -0,0 +1,106 @@
+"""Latest-wins edit scheduler for live bot messages."""
+
+from asyncio import Task, create_task, sleep, wait
+from collections.abc import Awaitable, Callable
+from logging import getLogger
+from time import monotonic
+from typing import Any
+
+logger = getLogger(__name__)
+
+EditSender = Callable[[Any, str], Awaitable[Any]]
+
+
+class _Slot:
+    """Edit state of one live message."""
+
+    __slots__ = ("dropped", "message", "pending", "sending", "sent", "task")
+
+    def __init__(self, message: Any) -> None:
+        self.message = message
+        self.pending: str | None = None
+        self.task: Task[None] | None = None
+        self.sending = False
+        self.sent = 0
+        self.dropped = 0
+
+
+class EditScheduler:
+    """Coalesce live edits per message and only send the latest render.
+
+    Producers call :meth:`submit` without waiting on the API: the newest text
+    overwrites any render still pending for that message, and a single worker
+    task per message sends it once the chat's minimum interval has elapsed.
+    Superseded renders are counted as dropped instead of being sent, so a slow
+    API never back-pressures the agent stream.
+    """
+
+    def __init__(self, send: EditSender, interval: float = 1.0) -> None:
+        self._send = send
+        self.interval = interval
+        self._slots: dict[tuple[int, int], _Slot] = {}
+        self._last_sent: dict[int, float] = {}
+        self.sent = 0
+        self.dropped = 0
+
+    @staticmethod
+    def _key(message: Any) -> tuple[int, int]:
+        return message.chat.id, message.id
+
+    def submit(self, message: Any, text: str) -> None:
+        """Queue text as the next render of message, replacing any pending one."""
+        key = self._key(message)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _Slot(message)
+        if slot.pending is not None:
+            slot.dropped += 1
+            self.dropped += 1
+        slot.pending = text
+        if slot.task is None or slot.task.done():
+            slot.task = create_task(self._run(key[0], slot))
+
+    async def _run(self, chat_id: int, slot: _Slot) -> None:
+        while slot.pending is not None:
+            delay = self._last_sent.get(chat_id, 0.0) + self.interval - monotonic()
+            if delay > 0:
+                await sleep(delay)
+            text, slot.pending = slot.pending, None
+            if text is None:  # Closed while waiting
+                return
+            self._last_sent[chat_id] = monotonic()
+            slot.sending = True
+            try:
+                await self._send(slot.message, text)
+                slot.sent += 1
+                self.sent += 1
+            except Exception as exc:
+                logger.warning(
+                    "Scheduled edit failed for msg %s: %s", slot.message.id, exc
+                )
+            finally:
+                slot.sending = False
+
+    async def close(self, message: Any) -> tuple[int, int]:
+        """Drop the pending render, wait for an in-flight edit and forget message.
+
+        Returns the (sent, dropped) edit counts recorded for this message.
+        """
+        slot = self._slots.pop(self._key(message), None)
+        if slot is None:
+            return 0, 0
+        if slot.pending is not None:
+            slot.pending = None
+            slot.dropped += 1
+            self.dropped += 1
+        if slot.task is not None and not slot.task.done():
+            if not slot.sending:
+                slot.task.cancel()
+            # Unlike awaiting the task, a cancelled caller still gets its
+            # CancelledError (the task itself never raises anything else)
+            await wait([slot.task])
+        return slot.sent, slot.dropped
+
+    def stats(self) -> dict[str, int]:
+        """Return global counters of sent and dropped edits."""
+        return {"sent": self.sent, "dropped": self.dropped, "live": len(self._slots)}
@@ -0,0 +1,155 @@
+"""Embedded aiohttp webhook server feeding updates to bot handlers."""
+
+from asyncio import Event, Queue, QueueFull, Semaphore, Task, create_task, gather
+from collections.abc import Awaitable, Callable
+from hmac import compare_digest
+from logging import getLogger
+from os import getenv
+from typing import Any
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+load_dotenv()
+WEBHOOK_URL = getenv("TELEGRAM_WEBHOOK_URL", "").rstrip("/")
+WEBHOOK_HOST = getenv("TELEGRAM_WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(getenv("TELEGRAM_WEBHOOK_PORT", "8080"))
+WEBHOOK_PATH = "/" + getenv("TELEGRAM_WEBHOOK_PATH", "telegram").strip("/")
+WEBHOOK_SECRET = getenv("TELEGRAM_WEBHOOK_SECRET", "")
+WEBHOOK_MAX_ACTIVE = int(getenv("TELEGRAM_WEBHOOK_MAX_ACTIVE", "64"))
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+logger = getLogger(__name__)
+
+# Commands answered at once, never queued behind running agent turns
+CONTROL_COMMANDS = frozenset({"/cancel", "/start", "/help", "/tts"})
+
+UpdateProcessor = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+def is_control(update: dict[str, Any]) -> bool:
+    """Whether an update is a control command (e.g. /cancel or /cancel@bot)."""
+    text = (update.get("message") or {}).get("text") or ""
+    return text.split("@", 1)[0].strip() in CONTROL_COMMANDS
+
+
+class WebhookServer:
+    """HTTP endpoint that acknowledges updates at once and processes them later.
+
+    Each POST is validated against the secret token (403 otherwise), queued,
+    and answered with 200 before any handler runs, so the platform never
+    waits on the agent. A dispatcher starts one task per queued update, with at most
+    ``max_active`` running at once (a handler may run a whole agent turn).
+    Control commands such as /cancel skip the queue and that limit, so they
+    reach a busy chat at once. When the queue is full the server answers
+    503 so the update is redelivered later instead of lost.
+    ``GET /healthz`` is exposed for load balancers.
+    """
+
+    max_queue: int = 1000
+
+    def __init__(
+        self,
+        process: UpdateProcessor,
+        host: str = WEBHOOK_HOST,
+        port: int = WEBHOOK_PORT,
+        path: str = WEBHOOK_PATH,
+        secret: str = WEBHOOK_SECRET,
+        max_active: int = WEBHOOK_MAX_ACTIVE,
+        control: Callable[[dict[str, Any]], bool] = is_control,
+    ) -> None:
+        self._process = process
+        self._control = control
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret = secret
+        self.max_active = max(max_active, 1)
+        self._slots = Semaphore(self.max_active)
+        self._tasks: set[Task[None]] = set()
+        self._queue: Queue[dict[str, Any]] = Queue(self.max_queue)
+        self.counters = dict.fromkeys(
+            ("received", "processed", "failed", "rejected", "unauthorized"), 0
+        )
+
+    def app(self) -> web.Application:
+        """Build the aiohttp application (also usable with aiohttp test clients)."""
+        app = web.Application()
+        app.router.add_post(self.path, self._handle_update)
+        app.router.add_get("/healthz", self._handle_health)
+        return app
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        if self.secret and not compare_digest(
+            request.headers.get(SECRET_HEADER, ""), self.secret
+        ):
+            self.counters["unauthorized"] += 1
+            return web.Response(status=403)
+        try:
+            update = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+        if not isinstance(update, dict):
+            return web.Response(status=400)
+        if self._control(update):
+            self.counters["received"] += 1
+            self._start(update)
+            return web.Response()
+        try:
+            self._queue.put_nowait(update)
+        except QueueFull:
+            self.counters["rejected"] += 1
+            return web.Response(status=503)
+        self.counters["received"] += 1
+        return web.Response()
+
+    async def _handle_health(self, _: web.Request) -> web.Response:
+        return web.json_response(
+            {**self.counters, "queued": self._queue.qsize(), "active": len(self._tasks)}
+        )
+
+    async def _run(self, update: dict[str, Any]) -> None:
+        try:
+            await self._process(update)
+            self.counters["processed"] += 1
+        except Exception:
+            self.counters["failed"] += 1
+            logger.exception("Webhook update %s failed", update.get("update_id"))
+
+    def _start(self, update: dict[str, Any], slot: Semaphore | None = None) -> None:
+        """Process an update in its own task, releasing slot when done."""
+        task = create_task(self._run(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if slot is not None:
+            task.add_done_callback(lambda _: slot.release())
+
+    async def _dispatch(self) -> None:
+        while True:
+            await self._slots.acquire()
+            update = await self._queue.get()
+            self._queue.task_done()
+            self._start(update, self._slots)
+
+    async def serve(self, stop: Event | None = None) -> None:
+        """Listen until stop is set (forever by default), then shut down."""
+        runner = web.AppRunner(self.app())
+        await runner.setup()
+        site = web.TCPSite(runner, self.host, self.port)
+        await site.start()
+        dispatcher = create_task(self._dispatch())
+        logger.info(
+            "Webhook listening on %s:%s%s (up to %d updates at once)",
+            self.host,
+            self.port,
+            self.path,
+            self.max_active,
+        )
+        try:
+            await (stop or Event()).wait()
+        finally:
+            await runner.cleanup()
+            tasks = [dispatcher, *self._tasks]
+            for task in tasks:
+                task.cancel()
+            await gather(*tasks, return_exceptions=True)
@@ -0,0 +1,275 @@
+"""SQLite catalog of images on disk, with full-text search over descriptions."""
+
+import sqlite3
+from asyncio import to_thread
+from logging import getLogger
+from os import getenv, scandir
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing import Any
+
+from dotenv import load_dotenv
+
+load_dotenv()
+_DATA_DIR = Path(getenv("DATA_DIR", "./data"))
+CATALOG_PATH = _DATA_DIR / "images.sqlite"
+IMAGE_DIRS = {
+    "received": _DATA_DIR / "image_received",
+    "generated": _DATA_DIR / "image_generation",
+}
+IMAGE_EXTS = (".jpg", ".png", ".jpeg")
+
+logger = getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    created REAL NOT NULL,
+    size INTEGER NOT NULL,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS images_created ON images (created DESC, path DESC);
+CREATE INDEX IF NOT EXISTS images_source ON images (source, created DESC);
+CREATE VIRTUAL TABLE IF NOT EXISTS images_fts USING fts5 (
+    path UNINDEXED, description
+);
+"""
+
+
+def desc_path_for(img_path: Path) -> Path:
+    """Return the JSON description sidecar path of an image."""
+    return img_path.parent / f"{img_path.stem}_desc.json"
+
+
+def source_of(path: Path) -> str:
+    """Source of an image: received, generated or edited."""
+    if path.parent == IMAGE_DIRS["received"]:
+        return "received"
+    return "edited" if path.name.startswith("edit_") else "generated"
+
+
+def _match_query(text: str) -> str:
+    """Quote each term, so any user text is a valid FTS5 query (all terms)."""
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in text.split())
+
+
+def _filters(
+    source: str | None = None,
+    since: float | None = None,
+    until: float | None = None,
+    query: str | None = None,
+) -> tuple[list[str], list[Any]]:
+    """WHERE conditions (on alias i) and parameters of the listing filters."""
+    where: list[str] = []
+    params: list[Any] = []
+    if source:
+        where.append("i.source = ?")
+        params.append(source)
+    if since is not None:
+        where.append("i.created >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("i.created < ?")
+        params.append(until)
+    if query and query.strip():
+        where.append("i.path IN (SELECT path FROM images_fts WHERE images_fts MATCH ?)")
+        params.append(_match_query(query))
+    return where, params
+
+
+class ImageCatalog:
+    """Index of received, generated and edited images.
+
+    Images are recorded when they are saved, with their description once
+    one is written, so listing and searching never walk the image folders.
+    The folders are scanned once to import images saved before the catalog
+    existed. Pagination uses a cursor on (created, path), so each page is an
+    index range scan whatever its depth; an entry whose file was deleted is
+    dropped when it comes up, and the page is refilled past it.
+
+    Methods are blocking; the async variants run them in a thread.
+    """
+
+    def __init__(self, path: Path = CATALOG_PATH) -> None:
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            fresh = not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'images'"
+            ).fetchone()
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            if fresh:
+                self._import_folders()
+        return self._conn
+
+    def _import_folders(self) -> None:
+        """Index the images (and descriptions) already on disk."""
+        count = 0
+        for folder in IMAGE_DIRS.values():
+            if not folder.is_dir():
+                continue
+            with scandir(folder) as entries:
+                for entry in entries:
+                    path = Path(entry.path)
+                    if path.suffix not in IMAGE_EXTS:
+                        continue
+                    stat = entry.stat()
+                    self._add(path, source_of(path), stat.st_mtime, stat.st_size)
+                    desc = desc_path_for(path)
+                    if desc.is_file():
+                        self._describe(path, desc.read_text(encoding="utf-8"))
+                    count += 1
+        logger.info("Image catalog: imported %d existing images", count)
+
+    def _add(self, path: Path, source: str, created: float, size: int) -> None:
+        db = self._db()
+        db.execute(
+            "INSERT INTO images (path, source, created, size) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (path) DO UPDATE SET size = excluded.size",
+            (str(path), source, created, size),
+        )
+        db.commit()
+
+    def _describe(self, path: Path, description: str) -> None:
+        db = self._db()
+        with db:
+            updated = db.execute(
+                "UPDATE images SET description = ? WHERE path = ?",
+                (description, str(path)),
+            ).rowcount
+            if not updated:  # Not a cataloged image
+                return
+            db.execute("DELETE FROM images_fts WHERE path = ?", (str(path),))
+            db.execute(
+                "INSERT INTO images_fts (path, description) VALUES (?, ?)",
+                (str(path), description),
+            )
+
+    def add_sync(
+        self, path: Path | str, source: str | None = None, size: int | None = None
+    ) -> None:
+        """Record a saved image (source defaults to the one of its folder)."""
+        path = Path(path)
+        with self._lock:
+            self._add(
+                path,
+                source or source_of(path),
+                time(),
+                path.stat().st_size if size is None else size,
+            )
+
+    def describe_sync(self, path: Path | str, description: str) -> None:
+        """Record the description of an image, making it searchable."""
+        with self._lock:
+            self._describe(Path(path), description)
+
+    def page_sync(
+        self,
+        limit: int = 20,
+        cursor: str | None = None,
+        source: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        query: str | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """Return a page of images, newest first, and the next page cursor.
+
+        query searches the descriptions (all terms must match). The cursor
+        is the opaque next_cursor of the previous page, or None for the
+        first one. limit 0 returns every match.
+        """
+        where, params = _filters(source, since, until, query)
+        images: list[dict[str, Any]] = []
+        while True:
+            want = limit - len(images) if limit > 0 else 0
+            rows, missing = self._scan(where, params, cursor, want)
+            images += (
+                {
+                    "path": path,
+                    "source": source,
+                    "created": created,
+                    "has_description": description is not None,
+                }
+                for path, source, created, description in rows
+                if path not in missing
+            )
+            # A short scan is the end; a full one may hide more rows
+            if not want or len(rows) < want:
+                return images, None
+            cursor = f"{rows[-1][2]!r}|{rows[-1][0]}"
+            if len(images) == limit:
+                return images, cursor
+
+    def _scan(
+        self, where: list[str], params: list[Any], cursor: str | None, limit: int
+    ) -> tuple[list[tuple[Any, ...]], set[str]]:
+        """Fetch up to limit rows after cursor and the paths of deleted files.
+
+        Rows of deleted files are removed from the catalog but still
+        returned, so the caller knows where the scan stopped.
+        """
+        where, params = list(where), list(params)
+        if cursor:
+            created, _, path = cursor.partition("|")
+            where.append("(i.created, i.path) < (?, ?)")
+            params += [float(created), path]
+        sql = "SELECT i.path, i.source, i.created, i.description FROM images i"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY i.created DESC, i.path DESC"
+        if limit > 0:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            db = self._db()
+            rows = db.execute(sql, params).fetchall()
+            missing = {row[0] for row in rows if not Path(row[0]).is_file()}
+            if missing:
+                with db:
+                    for path in missing:
+                        db.execute("DELETE FROM images WHERE path = ?", (path,))
+                        db.execute("DELETE FROM images_fts WHERE path = ?", (path,))
+        return rows, missing
+
+    def count_sync(
+        self,
+        source: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        query: str | None = None,
+    ) -> int:
+        """Number of indexed images matching the filters of page_sync."""
+        where, params = _filters(source, since, until, query)
+        sql = "SELECT COUNT(*) FROM images i"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            return self._db().execute(sql, params).fetchone()[0]
+
+    async def add(
+        self, path: Path | str, source: str | None = None, size: int | None = None
+    ) -> None:
+        await to_thread(self.add_sync, path, source, size)
+
+    async def describe(self, path: Path | str, description: str) -> None:
+        await to_thread(self.describe_sync, path, description)
+
+    async def page(
+        self, limit: int = 20, cursor: str | None = None, **filters: Any
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        return await to_thread(self.page_sync, limit, cursor, **filters)
+
+    async def count(self, source: str | None = None, **filters: Any) -> int:
+        return await to_thread(self.count_sync, source, **filters)
+
+
+catalog = ImageCatalog()
@@ -0,0 +1,179 @@
+"""Shared image and audio description service for non-multimodal models."""
+
+from asyncio import Semaphore, Task, create_task, gather, shield
+from hashlib import sha256
+from logging import getLogger
+from os import getenv
+from pathlib import Path
+
+import aiofiles
+import aiofiles.os  # ty: explicit submodule import
+from dotenv import load_dotenv
+from langchain.chat_models import BaseChatModel
+from langchain.messages import HumanMessage
+
+from ..utils import extract_response
+from .imageprep import preparer
+from .llm import LLM
+
+load_dotenv()
+DESCRIBE_CONCURRENCY = int(getenv("DESCRIBE_CONCURRENCY", "4"))
+DESCRIPTION_DIR = Path(getenv("DATA_DIR", "./data")) / "descriptions"
+
+logger = getLogger(__name__)
+
+AUDIO_PROMPT = (
+    "Transcribe this audio message verbatim in the same language the speaker uses. "
+    "Preserve natural phrasing, filler words, and emotional tone. "
+    "Do not translate, summarize, or paraphrase — write exactly what was said."
+)
+
+# Description prompt that produces a structured JSON matching the generation
+# schema used by `generate_image`. This lets the agent reuse the description
+# directly as a basis for edits or regeneration.
+IMAGE_PROMPT = """\
+Analyze this image and return a SINGLE structured JSON object describing it \
+in full detail, using the same schema as for image generation. The JSON must \
+be valid and self-contained.
+
+Describe ALL content factually and completely — including nudity, sexual \
+elements, violence, or any other sensitive content, exactly as it appears. \
+Never censor, omit, euphemize, or soften your description of any visible \
+element.
+
+Use these keys (omit any that don't apply):
+- `aspect_ratio`: e.g. "16:9", "9:16", "1:1"
+- `format`: "still image", "photograph", "illustration", "screenshot", etc.
+- `subject`: nested object with type, build, hair, face, clothing (or "nude" \
+if naked), skin, pose, expression, and any other physical attributes
+- `composition`: framing, shot_type, camera_angle, subject_position, \
+focal_region, quiet_field
+- `environment`: location, surfaces, props, weather
+- `camera`: capture_style, focus, depth_of_field, lens_feel
+- `lighting`: main_source, shadow, contrast
+- `color_treatment`: dominant_family, palette (list of named colors), \
+focal_accent, saturation
+- `style_tags`: list of style descriptors
+- `visible_text`: any text visible in the image, verbatim
+- `prompt`: a rich, self-contained natural-language paragraph that \
+synthesizes all fields into a vivid description someone could use to \
+recreate the image exactly
+
+Return ONLY the JSON object, no markdown fences, no commentary."""
+
+
+def _strip_fences(text: str) -> str:
+    """Strip markdown fences if the model added them despite instructions."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[-1] if "\n" in text else text[3:]
+        if text.endswith("```"):
+            text = text[:-3].strip()
+        elif text.rfind("```") != -1:
+            text = text[: text.rfind("```")].strip()
+    return text
+
+
+class MediaDescriber:
+    """Describe images and transcribe audio with bounded concurrency.
+
+    Results are cached on disk by content hash, so the same media is only
+    sent to the model once whatever its file name. Identical requests in
+    flight at the same time share a single model call. The user's message
+    passed as context only steers a first description; a custom instruction
+    is part of the request key and bypasses the cache.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DESCRIBE_CONCURRENCY,
+        cache_dir: Path = DESCRIPTION_DIR,
+    ) -> None:
+        self._limit = Semaphore(max(concurrency, 1))
+        self.cache_dir = cache_dir
+        self._inflight: dict[tuple[str, str], Task[str]] = {}
+        self.counters = dict.fromkeys(("described", "cached", "coalesced"), 0)
+
+    def _cache_path(self, digest: str, mime: str) -> Path:
+        suffix = ".txt" if mime.startswith("audio") else ".json"
+        return self.cache_dir / f"{digest}{suffix}"
+
+    async def describe(
+        self,
+        data: bytes,
+        mime: str = "image/jpeg",
+        context: str = "",
+        instruction: str = "",
+        model: BaseChatModel | None = None,
+    ) -> str:
+        """Return the description (or transcription) of data.
+
+        model defaults to the utils Gemini model. Raises on model errors.
+        """
+        digest = sha256(data).hexdigest()
+        cache = None if instruction else self._cache_path(digest, mime)
+        if cache is not None and await aiofiles.os.path.isfile(cache):
+            self.counters["cached"] += 1
+            async with aiofiles.open(cache, encoding="utf-8") as f:
+                return await f.read()
+        key = (digest, instruction)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            task = create_task(
+                self._describe(data, mime, context, instruction, model, cache)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded: a cancelled caller must not cancel the shared request
+        return await shield(task)
+
+    async def describe_many(
+        self, media: list[tuple[bytes, str]], context: str = ""
+    ) -> list[str | BaseException]:
+        """Describe several (data, mime) items concurrently, in order.
+
+        Failures are returned in place of their description.
+        """
+        return await gather(
+            *(self.describe(data, mime, context) for data, mime in media),
+            return_exceptions=True,
+        )
+
+    async def _describe(
+        self,
+        data: bytes,
+        mime: str,
+        context: str,
+        instruction: str,
+        model: BaseChatModel | None,
+        cache: Path | None,
+    ) -> str:
+        is_audio = mime.startswith("audio")
+        if not is_audio:
+            data, mime = await preparer.prepare(data, mime=mime)
+        prompt = AUDIO_PROMPT if is_audio else IMAGE_PROMPT
+        if instruction:
+            prompt += f"\n\nAdditional user request: {instruction}"
+        if context:
+            prompt += f"\n\nUser's message for context: {context}"
+        parts = [
+            {"type": "text", "text": prompt},
+            {"type": "media", "data": data, "mime_type": mime},
+        ]
+        async with self._limit:
+            llm = model or LLM.get("gemini-small")
+            response = await llm.ainvoke([HumanMessage(content=parts)])
+        self.counters["described"] += 1
+        text = extract_response(response)[0].strip()
+        if not is_audio:
+            text = _strip_fences(text)
+        if cache is not None and text:
+            await aiofiles.os.makedirs(self.cache_dir, exist_ok=True)
+            async with aiofiles.open(cache, "w", encoding="utf-8") as f:
+                await f.write(text)
+        return text
+
+
+describer = MediaDescriber()
@@ -0,0 +1,141 @@
+"""Image preparation before vision and image editing model calls."""
+
+from asyncio import to_thread
+from contextlib import suppress
+from hashlib import sha256
+from io import BytesIO
+from logging import getLogger
+from os import getenv, scandir
+from pathlib import Path
+from threading import get_ident
+from typing import NamedTuple
+
+from dotenv import load_dotenv
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+load_dotenv()
+IMAGE_PREP_CACHE_SIZE = int(getenv("IMAGE_PREP_CACHE_SIZE", "512"))
+PREPARED_DIR = Path(getenv("DATA_DIR", "./data")) / "prepared"
+
+logger = getLogger(__name__)
+
+
+class ImageProfile(NamedTuple):
+    """Target of a prepared image: bounding size and encoding."""
+
+    max_side: int
+    format: str
+    quality: int
+
+
+# Vision models tile images around 768px: beyond 2x2 tiles, extra pixels
+# mostly cost tokens. Edits keep more detail for the image model to work on.
+PROFILES = {
+    "vision": ImageProfile(1536, "JPEG", 85),
+    "edit": ImageProfile(2048, "JPEG", 92),
+}
+
+_MIME = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+
+def prepare_image(data: bytes, profile: ImageProfile) -> tuple[bytes, str]:
+    """Downsize, strip metadata and re-encode an image for a profile.
+
+    The image is rotated upright according to its EXIF orientation first.
+    An image already in the target format and size, without metadata, is
+    returned unchanged, as is one without metadata that would re-encode to
+    more bytes at the same size. Raises if data is not a readable image.
+    """
+    with Image.open(BytesIO(data)) as img:
+        source_format = img.format or ""
+        has_metadata = bool(img.info.get("exif") or img.info.get("icc_profile"))
+        resize = max(img.size) > profile.max_side
+        if not resize and not has_metadata and source_format == profile.format:
+            return data, _MIME[profile.format]
+        img = ImageOps.exif_transpose(img)
+        if resize:
+            img.thumbnail(
+                (profile.max_side, profile.max_side), Image.Resampling.LANCZOS
+            )
+        if profile.format == "JPEG" and img.mode != "RGB":
+            rgba = img.convert("RGBA")
+            img = Image.new("RGB", rgba.size, "white")
+            img.paste(rgba, mask=rgba.getchannel("A"))
+        out = BytesIO()
+        img.save(out, profile.format, quality=profile.quality, optimize=True)
+    prepared = out.getvalue()
+    keep = not resize and not has_metadata and source_format in _MIME
+    if keep and len(prepared) >= len(data):
+        return data, _MIME[source_format]
+    return prepared, _MIME[profile.format]
+
+
+class ImagePreparer:
+    """Prepare images for model calls, cached by content hash and profile.
+
+    Prepared variants are kept on disk (the IMAGE_PREP_CACHE_SIZE most
+    recently prepared), so an image sent to several model calls, such as a
+    description then an edit, is only resized and encoded once per profile.
+    Unreadable images are passed through untouched.
+    """
+
+    def __init__(
+        self, cache_dir: Path = PREPARED_DIR, cache_size: int = IMAGE_PREP_CACHE_SIZE
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.counters = dict.fromkeys(
+            ("prepared", "cached", "unchanged", "failed", "saved_bytes"), 0
+        )
+
+    async def prepare(
+        self, data: bytes, profile: str = "vision", mime: str = "image/jpeg"
+    ) -> tuple[bytes, str]:
+        """Return (bytes, mime) of data prepared for the profile."""
+        return await to_thread(self.prepare_sync, data, profile, mime)
+
+    def prepare_sync(
+        self, data: bytes, profile: str = "vision", mime: str = "image/jpeg"
+    ) -> tuple[bytes, str]:
+        """Blocking variant of :meth:`prepare`, for synchronous callers."""
+        target = PROFILES[profile]
+        digest = sha256(data).hexdigest()
+        ext = target.format.lower()
+        path = self.cache_dir / f"{digest}-{profile}.{ext}"
+        if path.is_file():
+            self.counters["cached"] += 1
+            prepared = path.read_bytes()
+            self.counters["saved_bytes"] += len(data) - len(prepared)
+            return prepared, _MIME[target.format]
+        try:
+            prepared, prepared_mime = prepare_image(data, target)
+        except (UnidentifiedImageError, OSError, ValueError) as exc:
+            self.counters["failed"] += 1
+            logger.warning("Could not prepare image, sending it as is: %s", exc)
+            return data, mime
+        if prepared is data:
+            self.counters["unchanged"] += 1
+            return data, prepared_mime
+        self.counters["prepared"] += 1
+        self.counters["saved_bytes"] += len(data) - len(prepared)
+        if prepared_mime == _MIME[target.format]:
+            self._store(path, prepared)
+        return prepared, prepared_mime
+
+    def _store(self, path: Path, prepared: bytes) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        part = path.with_name(f"{path.name}.{get_ident()}.part")
+        part.write_bytes(prepared)
+        part.replace(path)
+        with scandir(self.cache_dir) as entries:
+            files = sorted(
+                (e for e in entries if not e.name.endswith(".part")),
+                key=lambda e: e.stat().st_mtime,
+                reverse=True,
+            )
+        for entry in files[self.cache_size :]:
+            with suppress(OSError):
+                Path(entry.path).unlink()
+
+
+preparer = ImagePreparer()
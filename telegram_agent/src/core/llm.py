@@ -202,16 +202,40 @@ class LLM(Singleton):
             return text
 
     @staticmethod
-    async def tts(text: str) -> bytes | None:
-        """Generate speech audio bytes from text using the TTS LLM."""
+    def tts_settings() -> tuple[str, str, float]:
+        """Return the configured TTS (model, voice, speed)."""
+        model = getenv("OPENROUTER_TTS_MODEL", "x-ai/grok-voice-tts-1.0")
+        voice = getenv("OPENROUTER_TTS_VOICE", "eve")
+        speed_str = getenv("OPENROUTER_TTS_SPEED", "1.15")
         try:
-            openrouter_tts_model = getenv(
-                "OPENROUTER_TTS_MODEL", "x-ai/grok-voice-tts-1.0"
+            speed = float(speed_str)
+        except ValueError:
+            getLogger(__name__).error(
+                "Invalid OPENROUTER_TTS_SPEED=%r — expected a number, "
+                "falling back to 1.15",
+                speed_str,
+            )
+            speed = 1.15
+        # OpenAI TTS API requires 0.25 <= speed <= 4.0; clamp out-of-range
+        # values instead of failing at call time.
+        if not 0.25 <= speed <= 4.0:
+            getLogger(__name__).warning(
+                "OPENROUTER_TTS_SPEED=%s out of range [0.25, 4.0] — clamping.",
+                speed,
             )
-            openrouter_tts_voice = getenv("OPENROUTER_TTS_VOICE", "eve")
+            speed = max(0.25, min(4.0, speed))
+        return model, voice, speed
+
+    @staticmethod
+    async def tts(text: str) -> bytes | None:
+        """Generate speech audio bytes (MP3) from text using the TTS LLM."""
+        try:
             tts = LLM().extra.get("tts")
             if not tts:
                 return None
+            openrouter_tts_model, openrouter_tts_voice, openrouter_tts_speed = (
+                LLM.tts_settings()
+            )
             # Strip emotion tags (e.g. [excited], [smiles]) from the text
             # so the TTS model never reads them aloud. The detected emotions
             # are passed through the instructions parameter instead.
@@ -224,24 +248,6 @@ class LLM(Singleton):
                     f" The speaker is feeling {', '.join(unique)} at various "
                     "points — reflect this in your delivery."
                 )
-            speed_str = getenv("OPENROUTER_TTS_SPEED", "1.15")
-            try:
-                openrouter_tts_speed = float(speed_str)
-            except ValueError:
-                getLogger(__name__).error(
-                    "Invalid OPENROUTER_TTS_SPEED=%r — expected a number, "
-                    "falling back to 1.15",
-                    speed_str,
-                )
-                openrouter_tts_speed = 1.15
-            # OpenAI TTS API requires 0.25 <= speed <= 4.0; clamp out-of-range
-            # values instead of failing at call time.
-            if not 0.25 <= openrouter_tts_speed <= 4.0:
-                getLogger(__name__).warning(
-                    "OPENROUTER_TTS_SPEED=%s out of range [0.25, 4.0] — clamping.",
-                    openrouter_tts_speed,
-                )
-                openrouter_tts_speed = max(0.25, min(4.0, openrouter_tts_speed))
             response = await tts.create(
                 input=clean_text,
                 model=openrouter_tts_model,
@@ -0,0 +1,328 @@
+"""Append-only columnar time series, memory-mapped for range queries."""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Sequence
+from contextlib import suppress
+from math import isnan, nan
+from mmap import ACCESS_READ, mmap
+from pathlib import Path
+from struct import calcsize
+from threading import Lock
+
+import numpy as np
+
+TIME_COLUMN = "time"
+
+type Column = np.ndarray
+
+
+class TimeSeries:
+    """Fixed-width columns of rows appended in time order.
+
+    Each column is a flat file of native values (``array`` typecodes, e.g.
+    ``"f"`` for float32, ``"b"`` for int8) in one directory, next to a
+    float64 column of UNIX timestamps. Timestamps never decrease (an older
+    one is clamped to the last), so the time column is its own index: a
+    range query is two binary searches over the memory-mapped column, and
+    reads only the pages of the requested range. Rows are appended one
+    column after the other; a row cut short by a crash is ignored, since the
+    length of the series is that of its shortest column.
+
+    Missing values are NaN in float columns and -1 in integer ones.
+    """
+
+    def __init__(self, path: Path, columns: dict[str, str]) -> None:
+        self.path = path
+        self.columns = {TIME_COLUMN: "d", **columns}
+        self._lock = Lock()
+        self._maps: dict[str, tuple[int, mmap]] = {}
+        self._last: float | None = None
+
+    def _file(self, name: str) -> Path:
+        return self.path / f"{name}.{self.columns[name]}"
+
+    def _missing(self, name: str) -> float | int:
+        return nan if self.columns[name] in "fd" else -1
+
+    def __len__(self) -> int:
+        sizes = []
+        for name, code in self.columns.items():
+            try:
+                sizes.append(self._file(name).stat().st_size // calcsize(code))
+            except FileNotFoundError:
+                return 0
+        return min(sizes)
+
+    def append_many(self, rows: Iterable[tuple[float, dict[str, float | None]]]) -> int:
+        """Append (timestamp, {column: value}) rows; returns the number written."""
+        with self._lock:
+            if self._last is None:
+                self._last = self.last_time() or 0.0
+            buffers = {name: array(code) for name, code in self.columns.items()}
+            for ts, values in rows:
+                self._last = max(ts, self._last)
+                buffers[TIME_COLUMN].append(self._last)
+                for name in self.columns.keys() - {TIME_COLUMN}:
+                    value = values.get(name)
+                    buffers[name].append(
+                        self._missing(name) if value is None else value
+                    )
+            count = len(buffers[TIME_COLUMN])
+            if count:
+                self.path.mkdir(parents=True, exist_ok=True)
+                length = len(self)
+                for name, buffer in buffers.items():
+                    path = self._file(name)
+                    with path.open("ab") as f:
+                        # Drop the tail of a row a crash left incomplete
+                        f.truncate(length * buffer.itemsize)
+                        buffer.tofile(f)
+                    with suppress(PermissionError):
+                        path.chmod(0o666)
+            return count
+
+    def append(self, ts: float, **values: float | None) -> None:
+        """Append one row."""
+        self.append_many([(ts, values)])
+
+    def _view(self, name: str, count: int) -> memoryview:
+        """Typed view of the first count values of a column."""
+        if count == 0:
+            return memoryview(b"").cast(self.columns[name])
+        size = count * calcsize(self.columns[name])
+        cached = self._maps.get(name)
+        if cached is None or cached[0] < size:
+            with self._file(name).open("rb") as f:
+                mapped = mmap(f.fileno(), 0, access=ACCESS_READ)
+            # Older maps are left to the garbage collector: views may hold them
+            cached = self._maps[name] = (len(mapped), mapped)
+        return memoryview(cached[1])[:size].cast(self.columns[name])
+
+    def first_time(self) -> float | None:
+        """Timestamp of the first row, or None when empty."""
+        count = len(self)
+        return self._view(TIME_COLUMN, count)[0] if count else None
+
+    def last_time(self) -> float | None:
+        """Timestamp of the last row, or None when empty."""
+        count = len(self)
+        return self._view(TIME_COLUMN, count)[count - 1] if count else None
+
+    def range(
+        self,
+        start: float | None = None,
+        end: float | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> dict[str, memoryview]:
+        """Return {column: typed view} of the rows with start <= time <= end.
+
+        Views point into the mapped files: copy them (e.g. ``tolist()``)
+        to keep the values around.
+        """
+        count = len(self)
+        times = self._view(TIME_COLUMN, count)
+        lo = 0 if start is None else bisect_left(times, start)
+        hi = count if end is None else bisect_right(times, end, lo)
+        names = [TIME_COLUMN, *(columns or self.columns.keys() - {TIME_COLUMN})]
+        return {name: self._view(name, count)[lo:hi] for name in names}
+
+
+class Rollup:
+    """Fixed-width time buckets aggregating rows as they arrive.
+
+    ``aggregates`` maps each output column to a (source value, function)
+    pair, function being one of min, max, avg or sum; missing values are
+    skipped, and a ``samples`` column counts the rows of each bucket.
+    Buckets start at multiples of ``size`` seconds, shifted by ``offset``
+    (e.g. a UTC offset, for buckets aligned on local days). A bucket is
+    written to its TimeSeries once a row of a later bucket arrives; the open
+    one stays in memory and is included in :meth:`rows`. Rows older than the
+    open bucket are ignored.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        size: float,
+        aggregates: dict[str, tuple[str, str]],
+        offset: float = 0.0,
+    ) -> None:
+        self.size = size
+        self.offset = offset
+        self.aggregates = aggregates
+        self.series = TimeSeries(
+            path, {**dict.fromkeys(aggregates, "f"), "samples": "i"}
+        )
+        self._lock = Lock()
+        self._bucket: float | None = None
+        self._samples = 0
+        self._acc: dict[str, list[float]] = {}
+
+    def bucket_of(self, ts: float) -> float:
+        """Start of the bucket holding ts."""
+        return (ts + self.offset) // self.size * self.size - self.offset
+
+    def resume_from(self) -> float | None:
+        """Start of the first bucket not written yet, or None when empty."""
+        last = self.series.last_time()
+        return None if last is None else last + self.size
+
+    def add(self, ts: float, values: dict[str, float | None]) -> None:
+        """Aggregate one row into its bucket."""
+        bucket = self.bucket_of(ts)
+        with self._lock:
+            if self._bucket is not None and bucket < self._bucket:
+                return
+            if bucket != self._bucket:
+                self._flush()
+                self._bucket = bucket
+            self._samples += 1
+            for name, (source, function) in self.aggregates.items():
+                value = values.get(source)
+                if value is None or isnan(value):
+                    continue
+                acc = self._acc.get(name)
+                if acc is None:
+                    self._acc[name] = [value, 1]
+                elif function == "min":
+                    acc[0] = min(acc[0], value)
+                elif function == "max":
+                    acc[0] = max(acc[0], value)
+                else:
+                    acc[0] += value
+                    acc[1] += 1
+
+    def _current(self) -> dict[str, float | None]:
+        row: dict[str, float | None] = {}
+        for name, (_, function) in self.aggregates.items():
+            acc = self._acc.get(name)
+            if acc is None:
+                row[name] = None
+            else:
+                row[name] = acc[0] / acc[1] if function == "avg" else acc[0]
+        return row
+
+    def _flush(self) -> None:
+        if self._bucket is not None and self._samples:
+            self.series.append(self._bucket, **self._current(), samples=self._samples)
+        self._bucket, self._samples, self._acc = None, 0, {}
+
+    def rows(
+        self, start: float | None = None, end: float | None = None
+    ) -> dict[str, list[float]]:
+        """Return {column: values} of the buckets overlapping [start, end]."""
+        first = None if start is None else self.bucket_of(start)
+        rows = {
+            name: view.tolist() for name, view in self.series.range(first, end).items()
+        }
+        with self._lock:
+            if (
+                self._bucket is not None
+                and (first is None or self._bucket >= first)
+                and (end is None or self._bucket <= end)
+            ):
+                current = self._current()
+                missing = self.series._missing
+                for name in self.aggregates:
+                    value = current[name]
+                    rows[name].append(missing(name) if value is None else value)
+                rows[TIME_COLUMN].append(self._bucket)
+                rows["samples"].append(self._samples)
+        return rows
+
+
+# ---- Analytics on columns (NumPy arrays, as copied from TimeSeries.range) ----
+
+
+def run_edges(columns: Sequence[Column]) -> Column:
+    """Mask keeping the first and last row of each run of identical rows.
+
+    A run of one row is kept once. NaN equals NaN.
+    """
+    count = len(columns[0]) if columns else 0
+    keep = np.ones(count, dtype=bool)
+    if count < 3:
+        return keep
+    changed = np.zeros(count - 1, dtype=bool)
+    for column in columns:
+        before, after = column[:-1], column[1:]
+        differs = before != after
+        if column.dtype.kind == "f":
+            differs &= ~(np.isnan(before) & np.isnan(after))
+        changed |= differs
+    # Row i starts a run if it differs from i-1, ends one if it differs from i+1
+    keep[1:-1] = changed[:-1] | changed[1:]
+    return keep
+
+
+def time_weights(times: Column, interval: float) -> Column:
+    """Seconds each sample stands for: the time until the next one.
+
+    The last sample, and one followed by a gap over two intervals (missed
+    readings), stand for one interval.
+    """
+    if not len(times):
+        return np.zeros(0)
+    gaps = np.diff(times, append=times[-1] + interval)
+    return np.where(gaps <= 2 * interval, gaps, interval)
+
+
+def weighted_mean(values: Column, weights: Column) -> float | None:
+    """Mean of the non-NaN values weighted by time, or None."""
+    valid = ~np.isnan(values)
+    total = weights[valid].sum()
+    if not total:
+        return None
+    return float(np.dot(values[valid], weights[valid]) / total)
+
+
+def duty_cycle(states: Column, weights: Column) -> float | None:
+    """Share of time in an on state (> 0), among samples of known state (>= 0)."""
+    known = states >= 0
+    total = weights[known].sum()
+    if not total:
+        return None
+    return float(weights[known & (states > 0)].sum() / total)
+
+
+def transitions(states: Column) -> int:
+    """Number of state changes between consecutive samples."""
+    return int(np.count_nonzero(states[1:] != states[:-1]))
+
+
+def lttb(x: Column, y: Column, threshold: int) -> Column:
+    """Indices of at most threshold points picked by Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last points; from each bucket in between, keeps the
+    point forming the largest triangle with the previous pick and the average
+    of the next bucket, so peaks and dips survive where striding drops them.
+    Gaps (NaN) in y are interpolated for the selection.
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    x = x.astype(float)
+    y = y.astype(float)
+    nan = np.isnan(y)
+    if nan.all():
+        y = np.zeros(count)
+    elif nan.any():
+        y[nan] = np.interp(x[nan], x[~nan], y[~nan])
+    edges = np.linspace(1, count - 1, threshold - 1).astype(int)
+    picked = np.empty(threshold, dtype=int)
+    picked[0], picked[-1] = 0, count - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[hi : edges[i + 2]].mean()
+            next_y = y[hi : edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs(
+            (x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a])
+        )
+        a = lo + int(area.argmax())
+        picked[i + 1] = a
+    return picked
@@ -0,0 +1,187 @@
+"""Bounded ffmpeg transcoding service."""
+
+from asyncio import (
+    Future,
+    Queue,
+    Task,
+    Timeout,
+    create_subprocess_exec,
+    create_task,
+    get_running_loop,
+    timeout,
+)
+from asyncio.subprocess import DEVNULL, PIPE, Process
+from collections.abc import AsyncIterable, Sequence
+from contextlib import suppress
+from logging import getLogger
+from os import getenv
+from shutil import which
+from time import monotonic
+from typing import Any
+
+from dotenv import load_dotenv
+
+load_dotenv()
+TRANSCODE_BINARY = getenv("TRANSCODE_BINARY", "ffmpeg")
+TRANSCODE_WORKERS = int(getenv("TRANSCODE_WORKERS", "2"))
+TRANSCODE_TIMEOUT = float(getenv("TRANSCODE_TIMEOUT", "120"))
+
+# MP3 in, OGG/OPUS out (the format of Telegram voice messages)
+OPUS_ARGS = ("-f", "mp3", "-i", "pipe:0", "-c:a", "libopus", "-f", "ogg", "pipe:1")
+
+logger = getLogger(__name__)
+
+
+class TranscodeError(RuntimeError):
+    """The encoder is unavailable, failed or timed out."""
+
+
+class _Job:
+    __slots__ = ("args", "future", "queued", "source")
+
+    def __init__(
+        self, args: Sequence[str], source: AsyncIterable[bytes], future: Future[bytes]
+    ) -> None:
+        self.args = args
+        self.source = source
+        self.future = future
+        self.queued = monotonic()
+
+
+class Transcoder:
+    """Job queue drained by a fixed number of encoder workers.
+
+    Each job streams its input into one encoder process while its output is
+    read concurrently, under a per-job timeout after which the process is
+    killed. Time spent waiting on the job's source (e.g. audio still being
+    synthesized) does not count toward the timeout. At most ``workers`` processes run at once; further jobs wait in
+    the queue, so a burst of requests never forks an unbounded number of
+    encoders. The binary is looked up once: when it is missing, jobs fail
+    right away instead of trying to spawn it each time. The binary is
+    configurable, so any stdin-to-stdout program (e.g. ``cat``) can stand
+    in for ffmpeg to exercise the service offline.
+    """
+
+    def __init__(
+        self,
+        binary: str = TRANSCODE_BINARY,
+        workers: int = TRANSCODE_WORKERS,
+        job_timeout: float = TRANSCODE_TIMEOUT,
+    ) -> None:
+        self.binary = which(binary)
+        self.workers = max(workers, 1)
+        self.job_timeout = job_timeout
+        self._queue: Queue[_Job] = Queue()
+        self._tasks: list[Task[None]] = []
+        self.running = 0
+        self.counters = dict.fromkeys(("done", "failed", "timeouts"), 0)
+        self.waited = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def available(self) -> bool:
+        return self.binary is not None
+
+    async def run(self, args: Sequence[str], source: AsyncIterable[bytes]) -> bytes:
+        """Queue a job feeding source to the encoder, and return its output."""
+        if self.binary is None:
+            raise TranscodeError("encoder binary not found")
+        if not self._tasks:
+            self._tasks = [create_task(self._worker()) for _ in range(self.workers)]
+        future: Future[bytes] = get_running_loop().create_future()
+        await self._queue.put(_Job(args, source, future))
+        return await future
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.future.cancelled():
+                continue
+            self.waited += monotonic() - job.queued
+            started = monotonic()
+            self.running += 1
+            try:
+                result = await self._transcode(job)
+                self.counters["done"] += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+            except TimeoutError:
+                self.counters["timeouts"] += 1
+                if not job.future.done():
+                    job.future.set_exception(TranscodeError("encoding timed out"))
+            except Exception as exc:
+                self.counters["failed"] += 1
+                if not job.future.done():
+                    job.future.set_exception(
+                        exc
+                        if isinstance(exc, TranscodeError)
+                        else TranscodeError(f"encoding failed: {exc}")
+                    )
+            finally:
+                self.running -= 1
+                self.elapsed += monotonic() - started
+
+    async def _transcode(self, job: _Job) -> bytes:
+        proc = await create_subprocess_exec(
+            self.binary or "",
+            *job.args,
+            stdin=PIPE,
+            stdout=PIPE,
+            stderr=DEVNULL,
+        )
+        try:
+            async with timeout(self.job_timeout) as deadline:
+                return await self._communicate(proc, job.source, deadline)
+        finally:
+            if proc.returncode is None:
+                with suppress(ProcessLookupError):
+                    proc.kill()
+                await proc.wait()
+
+    @staticmethod
+    async def _communicate(
+        proc: Process, source: AsyncIterable[bytes], deadline: Timeout
+    ) -> bytes:
+        stdin, stdout = proc.stdin, proc.stdout
+        if stdin is None or stdout is None:
+            raise TranscodeError("encoder pipes unavailable")
+        loop = get_running_loop()
+        output = create_task(stdout.read())
+        chunks = aiter(source)
+        try:
+            while True:
+                # The deadline is paused while waiting on the source
+                when, waiting = deadline.when(), loop.time()
+                deadline.reschedule(None)
+                try:
+                    data = await anext(chunks)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    if when is not None:
+                        deadline.reschedule(when + loop.time() - waiting)
+                stdin.write(data)
+                await stdin.drain()
+        except BrokenPipeError, ConnectionResetError:
+            logger.warning("Encoder closed its input early")
+        finally:
+            with suppress(OSError):
+                stdin.close()
+        result = await output
+        if await proc.wait() != 0 or not result:
+            raise TranscodeError(f"encoder exited with code {proc.returncode}")
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        """Return job counters, queue depth and average wait/run times."""
+        jobs = sum(self.counters.values())
+        return {
+            **self.counters,
+            "queued": self._queue.qsize(),
+            "running": self.running,
+            "avg_wait_s": round(self.waited / jobs, 3) if jobs else 0.0,
+            "avg_run_s": round(self.elapsed / jobs, 3) if jobs else 0.0,
+        }
+
+
+transcoder = Transcoder()
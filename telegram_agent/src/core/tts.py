@@ -0,0 +1,125 @@
+"""Pipelined text-to-speech producing Telegram-ready OGG/OPUS voice."""
+
+import re
+from asyncio import Semaphore, create_task, gather, to_thread, wait
+from collections.abc import AsyncIterator
+from contextlib import suppress
+from hashlib import sha256
+from logging import getLogger
+from os import getenv
+from pathlib import Path
+
+import aiofiles
+import aiofiles.os  # ty: explicit submodule import
+from dotenv import load_dotenv
+
+from .llm import LLM
+from .transcode import OPUS_ARGS, TranscodeError, transcoder
+
+load_dotenv()
+TTS_PARALLEL = int(getenv("TTS_PARALLEL", "3"))
+TTS_CHUNK_CHARS = int(getenv("TTS_CHUNK_CHARS", "400"))
+TTS_CACHE_SIZE = int(getenv("TTS_CACHE_SIZE", "256"))
+TTS_CACHE_DIR = Path(getenv("DATA_DIR", "./data")) / "tts_cache"
+
+logger = getLogger(__name__)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+
+def split_sentences(text: str, max_chars: int = TTS_CHUNK_CHARS) -> list[str]:
+    """Split text into chunks of whole sentences, each up to max_chars.
+
+    Short sentences are merged so every chunk carries enough context for a
+    natural delivery; a single sentence longer than max_chars stays whole.
+    """
+    chunks: list[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _cache_path(text: str) -> Path:
+    model, voice, speed = LLM.tts_settings()
+    key = sha256(f"{model}\0{voice}\0{speed}\0{text}".encode()).hexdigest()
+    return TTS_CACHE_DIR / f"{key}.ogg"
+
+
+async def _prune_cache() -> None:
+    """Keep the TTS_CACHE_SIZE most recently used voices."""
+    entries = await aiofiles.os.scandir(TTS_CACHE_DIR)
+    files = sorted(
+        (e for e in entries if e.name.endswith(".ogg")),
+        key=lambda e: e.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in files[TTS_CACHE_SIZE:]:
+        with suppress(OSError):
+            await aiofiles.os.remove(entry.path)
+
+
+async def _encode(chunks: list[str], parallel: int) -> bytes | None:
+    """Synthesize chunks concurrently and encode them in order as one stream.
+
+    Chunks are synthesized with bounded parallelism and streamed to a single
+    OPUS encoding job as soon as the next one in order is ready, so encoding
+    overlaps with the synthesis of later chunks. The job is only queued once
+    the first chunk is ready, so it does not hold an encoder idle while the
+    synthesis starts. Failed chunks are skipped.
+    When encoding is unavailable or fails, the raw MP3 audio is returned.
+    """
+    limit = Semaphore(max(parallel, 1))
+
+    async def synthesize(chunk: str) -> bytes | None:
+        async with limit:
+            return await LLM.tts(chunk)
+
+    tasks = [create_task(synthesize(chunk)) for chunk in chunks]
+
+    async def audio() -> AsyncIterator[bytes]:
+        for task in tasks:
+            if data := await task:
+                yield data
+
+    try:
+        if transcoder.available:
+            await wait(tasks[:1])
+            return await transcoder.run(OPUS_ARGS, audio())
+        logger.warning("ffmpeg unavailable, sending MP3 voice")
+    except TranscodeError as exc:
+        logger.warning("Voice encoding failed (%s), sending MP3", exc)
+    mp3 = b"".join(data for data in await gather(*tasks) if data)
+    return mp3 or None
+
+
+async def synthesize_voice(text: str, parallel: int = TTS_PARALLEL) -> bytes | None:
+    """Return OGG/OPUS voice for text, from cache or a pipelined synthesis.
+
+    Voices are cached on disk by (text, model, voice, speed), so the same
+    answer read twice costs neither synthesis nor encoding.
+    """
+    path = _cache_path(text)
+    if await aiofiles.os.path.isfile(path):
+        await to_thread(path.touch)  # Most recently used
+        async with aiofiles.open(path, "rb") as f:
+            return await f.read()
+    chunks = split_sentences(text)
+    if not chunks:
+        return None
+    voice = await _encode(chunks, parallel)
+    if voice and voice.startswith(b"OggS"):
+        await aiofiles.os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        async with aiofiles.open(path, "wb") as f:
+            await f.write(voice)
+        await _prune_cache()
+    return voice
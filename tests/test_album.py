@@ -0,0 +1,103 @@
+"""AlbumAggregator: ordering, failures, full albums and the open-album bound."""
+
+import asyncio
+from typing import Any
+
+from telegram_agent.src.bot.album import AlbumAggregator
+
+
+class Recorder:
+    """Handler collecting (context, items) for each delivered album."""
+
+    def __init__(self) -> None:
+        self.albums: list[tuple[Any, list[Any]]] = []
+        self.delivered = asyncio.Event()
+
+    async def __call__(self, context: Any, items: list[Any]) -> None:
+        self.albums.append((context, items))
+        self.delivered.set()
+
+
+async def fetch(value: Any, delay: float = 0.0) -> Any:
+    await asyncio.sleep(delay)
+    return value
+
+
+async def broken() -> Any:
+    raise OSError("download failed")
+
+
+def starter(album_id: str):
+    async def start() -> str:
+        return f"placeholder-{album_id}"
+
+    return start
+
+
+def test_members_are_delivered_in_order() -> None:
+    async def run() -> Recorder:
+        handler = Recorder()
+        albums = AlbumAggregator(handler, min_quiet=0.05, max_quiet=0.1)
+        # Arrive as 3, 1, 2 and finish fetching in yet another order
+        for order, delay in ((3, 0.0), (1, 0.03), (2, 0.01)):
+            albums.add("g", order, fetch(order, delay), starter("g"))
+        await asyncio.wait_for(handler.delivered.wait(), 2)
+        return handler
+
+    handler = asyncio.run(run())
+    assert handler.albums == [("placeholder-g", [1, 2, 3])]
+
+
+def test_failed_member_is_dropped() -> None:
+    async def run() -> tuple[Recorder, AlbumAggregator]:
+        handler = Recorder()
+        albums = AlbumAggregator(handler, min_quiet=0.05, max_quiet=0.1)
+        albums.add("g", 1, fetch("a"), starter("g"))
+        albums.add("g", 2, broken(), starter("g"))
+        albums.add("g", 3, fetch("c"), starter("g"))
+        await asyncio.wait_for(handler.delivered.wait(), 2)
+        return handler, albums
+
+    handler, albums = asyncio.run(run())
+    assert handler.albums == [("placeholder-g", ["a", "c"])]
+    assert albums.counters["failed"] == 1
+    assert albums.counters["items"] == 3
+
+
+def test_full_album_closes_without_waiting() -> None:
+    async def run() -> tuple[Recorder, float]:
+        handler = Recorder()
+        # A quiet window far longer than the test: only fullness can close it
+        albums = AlbumAggregator(handler, min_quiet=30, max_quiet=30)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for order in reversed(range(AlbumAggregator.max_items)):
+            albums.add("g", order, fetch(order), starter("g"))
+        await asyncio.wait_for(handler.delivered.wait(), 2)
+        return handler, loop.time() - started
+
+    handler, elapsed = asyncio.run(run())
+    assert handler.albums == [("placeholder-g", list(range(10)))]
+    assert elapsed < 1
+
+
+def test_oldest_album_is_flushed_beyond_max_albums() -> None:
+    async def run() -> tuple[Recorder, AlbumAggregator, list]:
+        handler = Recorder()
+        albums = AlbumAggregator(handler, min_quiet=30, max_quiet=30, max_albums=2)
+        for album_id in ("a", "b", "c"):
+            albums.add(album_id, 1, fetch(album_id), starter(album_id))
+        await asyncio.wait_for(handler.delivered.wait(), 2)
+        flushed = list(handler.albums)
+        await albums.drain()
+        return handler, albums, flushed
+
+    handler, albums, flushed = asyncio.run(run())
+    assert flushed == [("placeholder-a", ["a"])]
+    assert albums.counters["flushed"] == 1
+    assert sorted(handler.albums) == [
+        ("placeholder-a", ["a"]),
+        ("placeholder-b", ["b"]),
+        ("placeholder-c", ["c"]),
+    ]
+    assert albums.counters["albums"] == 3
@@ -0,0 +1,30 @@
+"""Markdown compiler: spoilers, tables and the two output variants."""
+
+import pytest
+
+from telegram_agent.src.bot.markdown import compile_telegram
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("||spoiler||", "<tg-spoiler>spoiler</tg-spoiler>"),
+        (
+            "Answer:\n||the butler did it||",
+            "Answer:\n<tg-spoiler>the butler did it</tg-spoiler>",
+        ),
+        ("x ||s|| y", "x <tg-spoiler>s</tg-spoiler> y"),
+    ],
+)
+def test_spoiler_line_is_not_a_table(text: str, expected: str) -> None:
+    # Regression: a line that is only a spoiler matched the table row pattern
+    assert compile_telegram(text) == (expected, expected)
+
+
+def test_table() -> None:
+    classic, rich = compile_telegram("| a | b |\n|---|---|\n| 1 | **2** |")
+    assert classic == "a | b\n1 | <b>2</b>"
+    assert rich == (
+        "<table>\n<tr><th>a</th><th>b</th></tr>\n"
+        "<tr><td>1</td><td><b>2</b></td></tr>\n</table>"
+    )
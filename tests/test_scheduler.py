@@ -0,0 +1,75 @@
+"""EditScheduler: latest-wins edits and closing a live message."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from telegram_agent.src.bot.scheduler import EditScheduler
+
+
+def message(msg_id: int = 1) -> Any:
+    return SimpleNamespace(id=msg_id, chat=SimpleNamespace(id=42))
+
+
+def test_only_the_latest_render_is_sent() -> None:
+    async def run() -> tuple[list[str], tuple[int, int]]:
+        sent: list[str] = []
+
+        async def send(_message: Any, text: str) -> None:
+            sent.append(text)
+
+        edits = EditScheduler(send, interval=0.05)
+        live = message()
+        for text in ("a", "b", "c"):
+            edits.submit(live, text)
+        await asyncio.sleep(0.01)
+        for text in ("d", "e"):
+            edits.submit(live, text)
+        await asyncio.sleep(0.1)
+        return sent, await edits.close(live)
+
+    sent, counts = asyncio.run(run())
+    assert sent == ["c", "e"]
+    assert counts == (2, 3)
+
+
+def test_close_waits_for_the_edit_in_flight() -> None:
+    async def run() -> tuple[list[str], tuple[int, int]]:
+        sent: list[str] = []
+
+        async def send(_message: Any, text: str) -> None:
+            await asyncio.sleep(0.05)
+            sent.append(text)
+
+        edits = EditScheduler(send, interval=0)
+        live = message()
+        edits.submit(live, "a")
+        await asyncio.sleep(0.01)
+        return sent, await edits.close(live)
+
+    assert asyncio.run(run()) == (["a"], (1, 0))
+
+
+def test_close_keeps_the_caller_cancellable() -> None:
+    async def run() -> bool:
+        release = asyncio.Event()
+
+        async def send(_message: Any, _text: str) -> None:
+            await release.wait()
+
+        edits = EditScheduler(send, interval=0)
+        live = message()
+        edits.submit(live, "a")
+        await asyncio.sleep(0.01)
+        closing = asyncio.create_task(edits.close(live))
+        await asyncio.sleep(0.01)
+        closing.cancel()
+        # Regression: close() used to swallow its caller's cancellation
+        with pytest.raises(asyncio.CancelledError):
+            await closing
+        release.set()
+        return closing.cancelled()
+
+    assert asyncio.run(run())
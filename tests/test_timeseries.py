@@ -0,0 +1,181 @@
+"""NumPy telemetry analytics: run dedup, LTTB and time-weighted summaries."""
+
+from random import Random
+
+import numpy as np
+import pytest
+
+from telegram_agent.src.core.timeseries import (
+    duty_cycle,
+    lttb,
+    run_edges,
+    time_weights,
+    transitions,
+    weighted_mean,
+)
+
+INTERVAL = 60
+
+
+def dedup_unchanged(readings: list[dict]) -> list[dict]:
+    """Per-reading dedup of gree_ac (``_dedup_unchanged``), keyed on time."""
+    deduped: list[dict] = []
+    run_sig: tuple | None = None
+    run_last: dict | None = None
+    for r in readings:
+        sig = tuple(sorted((k, v) for k, v in r.items() if k != "time"))
+        if sig != run_sig:
+            if run_last is not None:
+                deduped.append(run_last)
+                run_last = None
+            deduped.append(r)
+            run_sig = sig
+        else:
+            run_last = r
+    if run_last is not None:
+        deduped.append(run_last)
+    return deduped
+
+
+def make_readings(count: int, seed: int) -> list[dict]:
+    rng = Random(seed)
+    readings, room, power = [], 22.0, 1
+    for i in range(count):
+        if rng.random() < 0.2:
+            room += rng.choice((-0.5, 0.5))
+        if rng.random() < 0.1:
+            power = 1 - power
+        readings.append(
+            {
+                "time": i * INTERVAL,
+                # NaN marks a missing value, as in the store columns
+                "room": float("nan") if rng.random() < 0.05 else room,
+                "target": 24.0,
+                "power": -1 if rng.random() < 0.05 else power,
+            }
+        )
+    return readings
+
+
+def to_columns(readings: list[dict]) -> list[np.ndarray]:
+    return [
+        np.array([r["room"] for r in readings], dtype=float),
+        np.array([r["target"] for r in readings], dtype=float),
+        np.array([r["power"] for r in readings], dtype=np.int8),
+    ]
+
+
+# ---- run_edges ----
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_run_edges_matches_dict_dedup(seed: int) -> None:
+    readings = make_readings(500, seed)
+    # The dict dedup compares NaN by identity, which one shared NaN keeps true
+    nan = float("nan")
+    for r in readings:
+        if r["room"] != r["room"]:
+            r["room"] = nan
+    kept = np.flatnonzero(run_edges(to_columns(readings)))
+    assert [readings[i]["time"] for i in kept] == [
+        r["time"] for r in dedup_unchanged(readings)
+    ]
+
+
+def test_run_edges_keeps_both_ends_of_a_run() -> None:
+    room = np.array([20.0, 20.0, 20.0, 21.0, 21.0, 22.0])
+    assert run_edges([room]).tolist() == [True, False, True, True, True, True]
+
+
+def test_run_edges_short_and_empty() -> None:
+    assert run_edges([np.array([1.0, 1.0])]).tolist() == [True, True]
+    assert run_edges([]).tolist() == []
+
+
+# ---- lttb ----
+
+
+def flat_with_spike(count: int, at: int) -> tuple[np.ndarray, np.ndarray]:
+    x = np.arange(count, dtype=float) * INTERVAL
+    y = np.full(count, 22.0)
+    y[at] = 30.0
+    return x, y
+
+
+def test_lttb_keeps_endpoints_and_threshold() -> None:
+    rng = np.random.default_rng(1)
+    x = np.arange(5000, dtype=float)
+    y = rng.normal(22, 1, 5000)
+    picked = lttb(x, y, 200)
+    assert len(picked) == 200
+    assert picked[0] == 0
+    assert picked[-1] == 4999
+    assert np.all(np.diff(picked) > 0)
+
+
+def test_lttb_keeps_a_spike_striding_drops() -> None:
+    x, y = flat_with_spike(10_000, 4321)
+    assert 4321 in lttb(x, y, 100)
+    assert 4321 not in range(0, 10_000, 100)
+
+
+@pytest.mark.parametrize("threshold", [2, 10, 50])
+def test_lttb_keeps_everything_when_nothing_to_thin(threshold: int) -> None:
+    x, y = flat_with_spike(10, 5)
+    assert lttb(x, y, threshold).tolist() == list(range(10))
+
+
+def test_lttb_interpolates_nan() -> None:
+    x, y = flat_with_spike(1000, 600)
+    y[100:300] = np.nan
+    picked = lttb(x, y, 50)
+    assert len(picked) == 50
+    assert 600 in picked
+    all_nan = lttb(x, np.full(1000, np.nan), 50)
+    assert len(all_nan) == 50
+    assert all_nan[0] == 0
+    assert all_nan[-1] == 999
+
+
+# ---- time-weighted summaries ----
+
+
+def test_time_weights() -> None:
+    times = np.array([0, 60, 150, 600, 660], dtype=float)
+    # 60 s, a 90 s gap (late reading), a 450 s gap (missed readings) counts
+    # as one interval, and the last reading stands for one interval
+    assert time_weights(times, INTERVAL).tolist() == [60, 90, 60, 60, 60]
+    assert time_weights(np.array([]), INTERVAL).tolist() == []
+
+
+def test_weighted_mean_follows_time_not_reading_count() -> None:
+    times = np.array([0, 90, 120], dtype=float)
+    room = np.array([20.0, 30.0, 30.0])
+    weights = time_weights(times, INTERVAL)  # 90, 30, 60
+    # Changed on purpose: the plain mean over readings gave 26.7
+    assert weighted_mean(room, weights) == pytest.approx(25.0)
+
+
+def test_weighted_mean_skips_nan() -> None:
+    weights = np.full(4, 60.0)
+    assert weighted_mean(np.array([20.0, np.nan, 22.0, np.nan]), weights) == 21.0
+    assert weighted_mean(np.full(4, np.nan), weights) is None
+
+
+def test_duty_cycle_ignores_unknown_power() -> None:
+    weights = np.full(4, 60.0)
+    power = np.array([1, -1, 0, 1], dtype=np.int8)
+    # Changed on purpose: unknown power used to count as off, giving 50 %
+    assert duty_cycle(power, weights) == pytest.approx(2 / 3)
+    assert duty_cycle(np.array([-1, -1], dtype=np.int8), weights[:2]) is None
+
+
+def test_duty_cycle_is_time_weighted() -> None:
+    weights = time_weights(np.array([0, 60, 180], dtype=float), INTERVAL)
+    # On for 60 s, then off for 120 s, then on for one interval
+    assert duty_cycle(np.array([1, 0, 1], dtype=np.int8), weights) == 0.5
+
+
+def test_transitions() -> None:
+    assert transitions(np.array([1, 1, 0, 0, 1], dtype=np.int8)) == 2
+    assert transitions(np.array([], dtype=np.int8)) == 0
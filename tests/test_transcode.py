@@ -0,0 +1,85 @@
+"""Transcoder: bounded encoder jobs, exercised offline with cat as encoder."""
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from telegram_agent.src.core import tts
+from telegram_agent.src.core.transcode import TranscodeError, Transcoder
+
+
+async def chunks(*parts: bytes, delay: float = 0.0) -> AsyncIterator[bytes]:
+    for part in parts:
+        await asyncio.sleep(delay)
+        yield part
+
+
+def test_output_is_the_encoded_input() -> None:
+    async def run() -> list[bytes]:
+        transcoder = Transcoder("cat", workers=2)
+        return await asyncio.gather(
+            *(
+                transcoder.run((), chunks(b"a" * 100_000, str(i).encode()))
+                for i in range(4)
+            )
+        )
+
+    assert asyncio.run(run()) == [b"a" * 100_000 + str(i).encode() for i in range(4)]
+
+
+def test_waiting_on_the_source_is_not_encoding_time() -> None:
+    async def run() -> tuple[bytes, dict]:
+        transcoder = Transcoder("cat", job_timeout=0.2)
+        # 0.5 s of input arriving, far beyond the job timeout
+        output = await transcoder.run(
+            (), chunks(b"a", b"b", b"c", b"d", b"e", delay=0.1)
+        )
+        return output, transcoder.stats()
+
+    output, stats = asyncio.run(run())
+    assert output == b"abcde"
+    assert stats["timeouts"] == 0
+
+
+def test_stuck_encoder_times_out() -> None:
+    async def run() -> Transcoder:
+        # sleep neither reads its input nor writes any output
+        transcoder = Transcoder("sleep", job_timeout=0.2)
+        with pytest.raises(TranscodeError, match="timed out"):
+            await transcoder.run(("10",), chunks(b"a"))
+        return transcoder
+
+    assert asyncio.run(run()).counters["timeouts"] == 1
+
+
+def test_failed_encoder_and_missing_binary() -> None:
+    async def run() -> None:
+        with pytest.raises(TranscodeError, match="exited with code"):
+            await Transcoder("false").run((), chunks(b"a"))
+        with pytest.raises(TranscodeError, match="not found"):
+            await Transcoder("no-such-encoder").run((), chunks(b"a"))
+
+    asyncio.run(run())
+
+
+def test_voice_job_is_queued_once_audio_is_ready(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    transcoder = Transcoder("cat", workers=1, job_timeout=0.2)
+    running: list[int] = []
+
+    async def synthesize(text: str) -> bytes:
+        await asyncio.sleep(0.1)
+        running.append(transcoder.running)
+        return text.encode()
+
+    monkeypatch.setattr(tts.LLM, "tts", synthesize)
+    monkeypatch.setattr(tts, "transcoder", transcoder)
+    monkeypatch.setattr(tts, "OPUS_ARGS", ())  # cat takes no ffmpeg arguments
+    voice = asyncio.run(tts._encode(["one", "two", "three"], parallel=1))
+    # No encoder sat idle during the first synthesis, and 0.3 s of synthesis
+    # did not time out the 0.2 s job (which would fall back to raw audio)
+    assert running == [0, 1, 1]
+    assert voice == b"onetwothree"
+    assert transcoder.counters == {"done": 1, "failed": 0, "timeouts": 0}
@@ -0,0 +1,196 @@
+"""WebhookServer: secret check, full queue, control commands and dispatch."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, ClassVar
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer, unused_port
+from telebot import asyncio_helper
+from telebot.types import Message
+
+from telegram_agent.src.bot.instances import telegram
+from telegram_agent.src.bot.webhook import SECRET_HEADER, WebhookServer
+
+SECRET = "s3cret"
+TOKEN = "123:test"
+
+
+def update(update_id: int, text: str, chat_id: int = 42) -> dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+class Recorder:
+    """Update processor collecting the updates it was given."""
+
+    def __init__(self) -> None:
+        self.updates: list[dict[str, Any]] = []
+        self.processed = asyncio.Event()
+
+    async def __call__(self, data: dict[str, Any]) -> None:
+        self.updates.append(data)
+        self.processed.set()
+
+
+@asynccontextmanager
+async def client(server: WebhookServer) -> AsyncIterator[TestClient]:
+    """Test client of the app alone: nothing drains the queue."""
+    async with TestClient(TestServer(server.app())) as http:
+        yield http
+
+
+def post(http: TestClient, body: dict[str, Any], secret: str = SECRET) -> Any:
+    return http.post("/telegram", json=body, headers={SECRET_HEADER: secret})
+
+
+def test_wrong_secret_is_forbidden() -> None:
+    async def run() -> tuple[list[int], WebhookServer]:
+        server = WebhookServer(Recorder(), path="/telegram", secret=SECRET)
+        async with client(server) as http:
+            statuses = [
+                (await post(http, update(1, "hi"), secret="wrong")).status,
+                (await http.post("/telegram", json=update(2, "hi"))).status,
+                (await post(http, update(3, "hi"))).status,
+            ]
+        return statuses, server
+
+    statuses, server = asyncio.run(run())
+    assert statuses == [403, 403, 200]
+    assert server.counters["unauthorized"] == 2
+    assert server.counters["received"] == 1
+
+
+def test_full_queue_is_unavailable(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(WebhookServer, "max_queue", 2)
+
+    async def run() -> tuple[list[int], WebhookServer]:
+        server = WebhookServer(Recorder(), path="/telegram", secret=SECRET)
+        async with client(server) as http:
+            statuses = [(await post(http, update(i, "hi"))).status for i in range(1, 4)]
+        return statuses, server
+
+    statuses, server = asyncio.run(run())
+    # 503 has Telegram redeliver the update later instead of dropping it
+    assert statuses == [200, 200, 503]
+    assert server.counters["rejected"] == 1
+
+
+def test_cancel_skips_the_full_queue(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(WebhookServer, "max_queue", 1)
+
+    async def run() -> tuple[list[int], Recorder]:
+        process = Recorder()
+        server = WebhookServer(process, path="/telegram", secret=SECRET)
+        async with client(server) as http:
+            statuses = [
+                (await post(http, update(1, "hi"))).status,
+                (await post(http, update(2, "/cancel@test_bot"))).status,
+            ]
+            await asyncio.wait_for(process.processed.wait(), 2)
+        return statuses, process
+
+    statuses, process = asyncio.run(run())
+    assert statuses == [200, 200]
+    # Only /cancel ran: the queued update waits for the (absent) dispatcher
+    assert [u["message"]["text"] for u in process.updates] == ["/cancel@test_bot"]
+
+
+class BotAPI:
+    """Stub Bot API answering the calls the bot makes, recording messages."""
+
+    bot_user: ClassVar[dict[str, Any]] = {
+        "id": 123,
+        "is_bot": True,
+        "first_name": "Test",
+        "username": "test_bot",
+    }
+
+    def __init__(self) -> None:
+        self.methods: list[str] = []
+        self.sent: list[dict[str, str]] = []
+        self.called = asyncio.Event()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self._handle)
+        return app
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        assert request.match_info["token"] == TOKEN
+        method = request.match_info["method"]
+        self.methods.append(method)
+        if method == "getMe":
+            return web.json_response({"ok": True, "result": self.bot_user})
+        if method != "sendMessage":
+            return web.json_response({"ok": True, "result": True})
+        params = dict(await request.post())
+        self.sent.append(params)
+        self.called.set()
+        result = update(len(self.sent), params["text"], int(params["chat_id"]))
+        return web.json_response({"ok": True, "result": result["message"]})
+
+
+def test_update_reaches_a_handler_through_the_bot_api(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def run() -> tuple[int, BotAPI]:
+        api = BotAPI()
+        async with TestServer(api.app()) as stub:
+            # What TELEGRAM_API_URL does at import, pointed at the stub
+            url = str(stub.make_url("")).rstrip("/")
+            monkeypatch.setattr(telegram, "TELEGRAM_API_URL", url)
+            monkeypatch.setattr(asyncio_helper, "API_URL", f"{url}/bot{{0}}/{{1}}")
+            bot = telegram.TelegramBot(TOKEN, webhook=True)
+
+            async def echo(message: Message) -> None:
+                await bot.send(message, f"echo: {message.text}")
+
+            await bot.initialize(chat=echo)
+            port = unused_port()
+            server = WebhookServer(
+                bot._process_update,
+                host="127.0.0.1",
+                port=port,
+                path="/telegram",
+                secret=SECRET,
+            )
+            stop = asyncio.Event()
+            serving = asyncio.create_task(server.serve(stop))
+            status = 0
+            try:
+                async with aiohttp.ClientSession() as http:
+                    for _ in range(50):  # Until the server listens
+                        try:
+                            async with http.post(
+                                f"http://127.0.0.1:{port}/telegram",
+                                json=update(1, "hello"),
+                                headers={SECRET_HEADER: SECRET},
+                            ) as resp:
+                                status = resp.status
+                            break
+                        except aiohttp.ClientConnectionError:
+                            await asyncio.sleep(0.02)
+                await asyncio.wait_for(api.called.wait(), 5)
+            finally:
+                stop.set()
+                await serving
+                await bot.close()
+        return status, api
+
+    status, api = asyncio.run(run())
+    assert status == 200
+    assert api.methods == ["setMyCommands", "getMe", "sendMessage"]
+    assert api.sent[0]["chat_id"] == "42"
+    assert api.sent[0]["text"] == "echo: hello"